@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Agente sem interface: só a detecção de ociosidade e a gravação no banco.
+
+Para rodar em cada estação como serviço (Agendador de Tarefas, NSSM, systemd).
+Não importa Tk, matplotlib, NumPy nem o código do dashboard; o dashboard
+(monitor.py --visualizador) pode ser aberto em qualquer máquina só para consultar.
+SIGINT, SIGTERM (e SIGBREAK no Windows) encerram o agente gravando os períodos
+que ainda estão na fila. Com --coletor os lotes vão para o coletor central
+(coletor.py) por HTTP e a estação não precisa de acesso ao MySQL; com --banco a
+gravação pode ir para outro backend (ex.: SQLite local, sqlite:///ociosidade.db).
+
+Uso:
+python agente.py [--tempo-ocioso 300] [--host localhost] [--user root] [--password ''] [--database monitor_ociosidade]
+python agente.py --coletor servidor:8750
+python agente.py --banco sqlite:///ociosidade.db
+"""
+
+import argparse
+import functools
+import logging
+import signal
+import sys
+import threading
+
+from banco import abrir_banco, fechar_pools
+from escritor import CAMINHO_SPOOL_PADRAO, EscritorOciosidade
+from monitoramento import OciosidadeMonitor
+
+log = logging.getLogger('agente')
+
+def _registrar_sinais(parar):
+    def ao_receber(signum, frame):
+        log.info("Sinal %s recebido, encerrando.", signum)
+        parar.set()
+    for nome in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+        if hasattr(signal, nome):
+            signal.signal(getattr(signal, nome), ao_receber)
+
+def executar(args, parar=None):
+    """
+    Roda o monitor e o escritor até `parar` ser sinalizado (ou a thread do monitor
+    terminar por erro). Devolve o código de saída do processo.
+    """
+    parar = parar or threading.Event()
+    if args.coletor:
+        from cliente_coletor import ClienteColetor
+        fabrica_db = functools.partial(ClienteColetor, args.coletor, token=args.token_coletor)
+    else:
+        fabrica_db = functools.partial(abrir_banco, args.banco, args.host, args.user, args.password, args.database)
+    escritor = EscritorOciosidade(fabrica_db=fabrica_db, caminho_spool=args.spool,
+                                  ao_gravar=lambda lote: log.debug("%d período(s) gravado(s)", len(lote)))
+
+    def ao_detectar(inicio, fim, duracao):
+        log.info("Ociosidade: início=%s fim=%s duração=%ss", inicio, fim, duracao)
+
+    monitor = OciosidadeMonitor(args.tempo_ocioso, ao_detectar, escritor=escritor)
+    monitor.daemon = True
+    servidor_metricas = None
+    if args.metricas:
+        import metricas
+        servidor_metricas = metricas.servir(args.metricas)
+        log.info("Métricas em http://127.0.0.1:%d/metrics", args.metricas)
+    escritor.start()
+    monitor.start()
+    log.info("Agente iniciado (timeout: %ss, usuário: %s, host: %s).",
+             args.tempo_ocioso, monitor.usuario, monitor.host)
+    # Espera com timeout: no Windows os sinais só são tratados entre as esperas
+    while not parar.wait(1.0):
+        if not monitor.is_alive():
+            log.error("A thread de monitoramento terminou inesperadamente.")
+            break
+    monitor.stop()
+    monitor.join(5)
+    escritor.parar(10)
+    if escritor.pendentes():
+        log.warning("%d período(s) não gravado(s) ao encerrar.", escritor.pendentes())
+    fechar_pools()
+    if servidor_metricas:
+        servidor_metricas.shutdown()
+    log.info("Agente encerrado (gravados: %d, falhas de conexão: %d).", escritor.gravados, escritor.falhas)
+    return 0 if parar.is_set() else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agente de monitoramento de ociosidade (sem interface)")
+    parser.add_argument('--tempo-ocioso', type=int, default=5 * 60, help='segundos sem atividade (padrão: 300)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='monitor_ociosidade')
+    parser.add_argument('--banco', help='URL do backend (mysql://, sqlite:///arquivo.db, memoria:); '
+                                        'padrão: OCIOSIDADE_BANCO ou o MySQL de --host/--user/...')
+    parser.add_argument('--coletor', help='host:porta do coletor central; sem ele grava direto no banco')
+    parser.add_argument('--token-coletor', help='token do coletor (padrão: variável OCIOSIDADE_TOKEN_COLETOR)')
+    parser.add_argument('--spool', default=CAMINHO_SPOOL_PADRAO,
+                        help='arquivo local dos períodos pendentes com o banco fora do ar')
+    parser.add_argument('--metricas', type=int, metavar='PORTA',
+                        help='expõe as métricas em http://127.0.0.1:PORTA/metrics (Prometheus)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='registra também cada lote gravado')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+    parar = threading.Event()
+    _registrar_sinais(parar)
+    return executar(args, parar)
+
+if __name__ == '__main__':
+    sys.exit(main())
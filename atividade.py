@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Densidade de atividade: eventos de entrada por minuto e por fonte.
+
+Os callbacks do pynput continuam só incrementando os contadores acumulados do
+monitor; nada é acrescentado ao caminho de cada evento. Uma thread própria acorda
+na virada de cada minuto, copia os contadores e guarda a diferença em um anel de
+tamanho fixo (array, um slot por minuto com uma contagem por fonte). A cada
+intervalo_descarga segundos os minutos fechados vão ao banco em uma única gravação
+em lote, uma linha por minuto com eventos. Se o banco estiver fora do ar os
+minutos ficam no anel e seguem na descarga seguinte; só se perdem quando o anel
+dá a volta (capacidade minutos depois).
+
+Na mesma descarga vão as lacunas de atividade (intervalos sem nenhum evento de
+pelo menos `minimo` segundos) registradas pelo monitor, em um bloco compacto:
+pares uint32 (deslocamento do início em relação ao início do bloco, duração), 8
+bytes por lacuna. Delas limiares.py deriva a ociosidade para qualquer limite a
+partir do mínimo, sem depender do tempo_ocioso em vigor quando foram gravadas.
+"""
+
+import datetime
+import sys
+import threading
+import time
+from array import array
+
+# Fontes de eventos de entrada, na ordem dos contadores de OciosidadeMonitor e das
+# colunas de ociosidade_atividade_minuto
+FONTES = ('teclado', 'movimento', 'clique', 'rolagem')
+
+_MAXIMO = 0xFFFFFFFF
+_EPOCA = datetime.datetime(1970, 1, 1)
+
+def _datetime_do_minuto(minuto):
+    # Minuto desde a época (UTC) -> datetime local ingênuo, como os registros de ociosidade
+    return datetime.datetime.fromtimestamp(minuto * 60)
+
+def _segundos(data):
+    # Segundos desde a época no relógio de parede, como intervalos.para_epoca
+    return (data.toordinal() - _EPOCA.toordinal()) * 86400 + data.hour * 3600 + data.minute * 60 + data.second
+
+def codificar_lacunas(lacunas):
+    """
+    [(início em segundos desde a época, duração em segundos)] em ordem ->
+    (início do bloco, fim do bloco, quantidade, dados), com dados = pares uint32
+    little-endian (início - início do bloco, duração).
+    """
+    base = lacunas[0][0]
+    dados = array('I')
+    for inicio, duracao in lacunas:
+        dados.append(inicio - base)
+        dados.append(min(duracao, _MAXIMO))
+    if sys.byteorder == 'big':
+        dados.byteswap()
+    fim = max(inicio + duracao for inicio, duracao in lacunas)
+    return (_EPOCA + datetime.timedelta(seconds=base), _EPOCA + datetime.timedelta(seconds=fim),
+            len(lacunas), dados.tobytes())
+
+class RegistradorLacunas:
+    """
+    Acumula as lacunas de atividade fechadas pelo monitor até a próxima descarga.
+    """
+    def __init__(self, usuario, host, minimo=60, maximo=100000):
+        self.usuario = usuario
+        self.host = host
+        # Lacunas menores não são guardadas: limites abaixo disso não podem ser analisados
+        self.minimo = minimo
+        # Acima disso (banco fora do ar por muito tempo) as mais antigas são descartadas
+        self.maximo = maximo
+        self._lacunas = []
+        self._lock = threading.Lock()
+        self.descartadas = 0
+
+    def registrar(self, inicio, fim):
+        # Thread do monitor, uma vez por lacuna (não por evento)
+        s = _segundos(inicio)
+        duracao = _segundos(fim) - s
+        if duracao < self.minimo:
+            return
+        with self._lock:
+            self._lacunas.append((s, duracao))
+            if len(self._lacunas) > self.maximo:
+                excesso = len(self._lacunas) - self.maximo
+                del self._lacunas[:excesso]
+                self.descartadas += excesso
+
+    def retirar(self):
+        with self._lock:
+            lacunas, self._lacunas = self._lacunas, []
+        return lacunas
+
+    def devolver(self, lacunas):
+        # Gravação falhou: as lacunas voltam para a frente da fila
+        with self._lock:
+            self._lacunas[:0] = lacunas
+
+    def bloco(self, lacunas):
+        # Linha de inserir_lacunas: (inicio, fim, usuario, host, minimo_segundos, quantidade, dados)
+        inicio, fim, quantidade, dados = codificar_lacunas(lacunas)
+        return (inicio, fim, self.usuario, self.host, self.minimo, quantidade, dados)
+
+class DensidadeAtividade(threading.Thread):
+    """
+    Thread que amostra os contadores do monitor a cada minuto e descarrega em lote.
+    """
+    def __init__(self, contagem, fabrica_db, usuario, host, capacidade=1440, intervalo_descarga=300,
+                 lacunas=None):
+        super().__init__(daemon=True, name='atividade')
+        # Lista de contadores acumulados por fonte, escrita pelos listeners (só lida aqui)
+        self._contagem = contagem
+        # Sem fábrica, ou com um backend sem inserir_atividade (ex.: coletor), só o anel é mantido
+        self.fabrica_db = fabrica_db
+        self.usuario = usuario
+        self.host = host
+        self.capacidade = capacidade
+        self.intervalo_descarga = intervalo_descarga
+        # RegistradorLacunas descarregado junto com os minutos (opcional)
+        self.lacunas = lacunas
+        self._anel = array('I', [0]) * (capacidade * len(FONTES))
+        self._minutos = array('q', [-1]) * capacidade
+        self._anterior = list(contagem)
+        self._enviado_ate = -1
+        # Protege o anel entre esta thread e as leituras de recentes()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._db = None
+        self.gravados = 0
+        self.falhas = 0
+        self.descartados = 0
+
+    def run(self):
+        ultima_descarga = time.monotonic()
+        try:
+            # Acorda logo depois de cada virada de minuto
+            while not self._parar.wait(60 - time.time() % 60 + 0.05):
+                fechado = int(time.time() // 60) - 1
+                self.amostrar(fechado)
+                if time.monotonic() - ultima_descarga >= self.intervalo_descarga:
+                    self.descarregar(fechado)
+                    ultima_descarga = time.monotonic()
+        finally:
+            # Encerramento: o minuto em andamento entra parcial (o banco soma, não substitui)
+            atual = int(time.time() // 60)
+            self.amostrar(atual)
+            self.descarregar(atual)
+            if self._db is not None:
+                self._db.fechar()
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def amostrar(self, minuto):
+        # Soma ao minuto (desde a época) os eventos contados desde a amostra anterior
+        atual = list(self._contagem)
+        n = len(FONTES)
+        with self._lock:
+            slot = minuto % self.capacidade
+            base = slot * n
+            if self._minutos[slot] != minuto:
+                if self._minutos[slot] > self._enviado_ate:
+                    self.descartados += 1
+                self._minutos[slot] = minuto
+                for i in range(n):
+                    self._anel[base + i] = 0
+            for i in range(n):
+                self._anel[base + i] = min(self._anel[base + i] + atual[i] - self._anterior[i], _MAXIMO)
+        self._anterior = atual
+
+    def _minutos_no_anel(self, de, ate):
+        # [(minuto, contagens)] do anel com de < minuto <= ate, em ordem; chamar com o lock
+        n = len(FONTES)
+        minutos = sorted((m, slot) for slot, m in enumerate(self._minutos) if de < m <= ate)
+        return [(m, tuple(self._anel[slot * n:(slot + 1) * n])) for m, slot in minutos]
+
+    def pendentes(self, ate):
+        """
+        Linhas (minuto, usuario, host, teclado, movimento, clique, rolagem) dos minutos
+        ainda não gravados até `ate`, só os que tiveram eventos, e o último minuto coberto.
+        """
+        with self._lock:
+            minutos = self._minutos_no_anel(self._enviado_ate, ate)
+        linhas = [(_datetime_do_minuto(m), self.usuario, self.host) + contagens
+                  for m, contagens in minutos if any(contagens)]
+        return linhas, (minutos[-1][0] if minutos else None)
+
+    def descarregar(self, ate):
+        """
+        Grava em uma única chamada (uma transação) os minutos pendentes até `ate`, e as
+        lacunas acumuladas em um bloco. Devolve quantas linhas de minuto foram gravadas;
+        com falha os minutos e as lacunas ficam para a próxima.
+        """
+        self._descarregar_lacunas()
+        linhas, ultimo = self.pendentes(ate)
+        if ultimo is None:
+            return 0
+        if linhas and self._conectar():
+            try:
+                self._db.inserir_atividade(linhas)
+            except Exception:
+                self.falhas += 1
+                self._descartar_conexao()
+                return 0
+            self.gravados += len(linhas)
+        elif linhas and self.fabrica_db is not None:
+            return 0
+        self._enviado_ate = ultimo
+        return len(linhas)
+
+    def _descarregar_lacunas(self):
+        if self.lacunas is None:
+            return
+        lacunas = self.lacunas.retirar()
+        if not lacunas:
+            return
+        if not self._conectar() or not hasattr(self._db, 'inserir_lacunas'):
+            # Banco fora do ar: ficam no registrador (limitado a `maximo`); backend sem
+            # as tabelas (ex.: coletor): não são guardadas
+            if self.fabrica_db is not None:
+                self.lacunas.devolver(lacunas)
+            return
+        try:
+            self._db.inserir_lacunas([self.lacunas.bloco(lacunas)])
+        except Exception:
+            self.falhas += 1
+            self._descartar_conexao()
+            self.lacunas.devolver(lacunas)
+
+    def _conectar(self):
+        # True se há um backend com a tabela de atividade; sem ele (fabrica_db None) só o anel
+        if self.fabrica_db is None:
+            return False
+        if self._db is None:
+            try:
+                self._db = self.fabrica_db()
+            except Exception:
+                self.falhas += 1
+                return False
+        if not hasattr(self._db, 'inserir_atividade'):
+            self.fabrica_db = None
+            return False
+        return True
+
+    def _descartar_conexao(self):
+        try:
+            self._db.fechar()
+        except Exception:
+            pass
+        self._db = None
+
+    def recentes(self, minutos=60):
+        """
+        Os últimos `minutos` minutos do anel (gravados ou não), em ordem:
+        [(datetime do minuto, teclado, movimento, clique, rolagem)]. Para gráficos ao vivo.
+        """
+        agora = int(time.time() // 60)
+        with self._lock:
+            linhas = self._minutos_no_anel(agora - minutos, agora)
+        return [(_datetime_do_minuto(m),) + contagens for m, contagens in linhas]
+
+def mapa_de_calor(linhas, fonte=None):
+    """
+    Matriz dia x hora a partir das linhas de agregar_atividade (por 'hora' ou
+    'minuto'): [(datetime, teclado, movimento, clique, rolagem)]. Com fonte None
+    soma todas as fontes. Devolve (dias, matriz), uma linha de 24 valores por dia.
+    """
+    coluna = None if fonte is None else FONTES.index(fonte)
+    por_dia = {}
+    for chave, *contagens in linhas:
+        valor = sum(contagens) if coluna is None else contagens[coluna]
+        por_dia.setdefault(chave.date(), [0] * 24)[chave.hour] += valor
+    dias = sorted(por_dia)
+    return dias, [por_dia[dia] for dia in dias]
@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+"""
+Backends de armazenamento embutidos (SQLite em arquivo e em memória), com a mesma
+interface do DBHelper.
+
+Sem servidor, cada gravação ou consulta é uma chamada de biblioteca em vez de uma
+ida e volta pela rede. O arquivo usa WAL: leitores não bloqueiam o escritor nem
+são bloqueados por ele, e com synchronous=NORMAL o commit só acrescenta ao WAL,
+sem fsync (o fsync fica para os checkpoints). Uma queda de energia pode perder as
+últimas transações, mas não corrompe o banco; synchronous=FULL troca isso por um
+fsync por commit. Cada thread tem a sua conexão, fechada quando a thread termina
+(as threads curtas de exportação e relatório não deixam conexões abertas); as
+gravações do processo passam por um lock por arquivo e cada lote é uma transação
+(BEGIN IMMEDIATE).
+
+O backend em memória serve para testes, demonstrações e estações sem disco
+gravável: todos os BancoMemoria com o mesmo nome no processo compartilham os dados.
+"""
+
+import contextlib
+import datetime
+import os
+import threading
+import weakref
+
+import sqlite3
+
+import metricas
+from resumo import acumulador, resumir_registros
+
+SQL_INSERIR = """
+INSERT INTO ociosidade_log (inicio_ocioso, fim_ocioso, duracao_segundos, usuario, host)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+SQL_INSERIR_EVENTO = """
+INSERT OR IGNORE INTO ociosidade_log (evento_id, inicio_ocioso, fim_ocioso, duracao_segundos, usuario, host)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SQL_SOMAR_RESUMO = """
+INSERT INTO ociosidade_resumo_hora (dia, hora, usuario, host, total_segundos, eventos)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (dia, hora, usuario, host) DO UPDATE SET
+    total_segundos = total_segundos + excluded.total_segundos,
+    eventos = eventos + excluded.eventos
+"""
+
+SQL_SOMAR_ATIVIDADE = """
+INSERT INTO ociosidade_atividade_minuto (minuto, usuario, host, teclado, movimento, clique, rolagem)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (host, minuto, usuario) DO UPDATE SET
+    teclado = teclado + excluded.teclado,
+    movimento = movimento + excluded.movimento,
+    clique = clique + excluded.clique,
+    rolagem = rolagem + excluded.rolagem
+"""
+
+SQL_INSERIR_LACUNAS = """
+INSERT INTO ociosidade_lacunas (inicio, fim, usuario, host, minimo_segundos, quantidade, dados)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_COLUNAS = "id, inicio_ocioso, fim_ocioso, duracao_segundos, usuario, host"
+
+# Agrupamentos aceitos por agregar_resumo (colunas da tabela de resumo por hora)
+AGRUPAMENTOS = ('dia', 'hora')
+
+# Início do minuto/hora/dia de cada linha de atividade (texto ISO)
+AGRUPAMENTOS_ATIVIDADE = {
+    'minuto': "strftime('%Y-%m-%d %H:%M:00', minuto)",
+    'hora': "strftime('%Y-%m-%d %H:00:00', minuto)",
+    'dia': "strftime('%Y-%m-%d 00:00:00', minuto)",
+}
+
+# Ajustes de cada conexão ao arquivo: cache de 32 MB, temporários em memória e o
+# arquivo mapeado em memória (leituras sem cópia para o cache do SQLite)
+PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -32768",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+
+SINCRONISMOS = ('OFF', 'NORMAL', 'FULL')
+
+# Datas como texto ISO com segundos, como o DATETIME do MySQL (as conversões
+# padrão do sqlite3 estão obsoletas desde o Python 3.12)
+sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(' ', 'seconds'))
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+sqlite3.register_converter('TIMESTAMP', lambda b: datetime.datetime.fromisoformat(b.decode()))
+sqlite3.register_converter('DATE', lambda b: datetime.date.fromisoformat(b.decode()))
+
+def _m1_esquema(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        inicio_ocioso TIMESTAMP,
+        fim_ocioso TIMESTAMP,
+        duracao_segundos INTEGER,
+        usuario TEXT,
+        host TEXT,
+        evento_id TEXT
+    )
+    """)
+    # O rowid (id) faz parte de todo índice: (inicio_ocioso) atende à chave de paginação
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_inicio ON ociosidade_log (inicio_ocioso)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usuario_host_inicio ON ociosidade_log (usuario, host, inicio_ocioso)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_evento ON ociosidade_log (evento_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_resumo_hora (
+        dia DATE NOT NULL,
+        hora INTEGER NOT NULL,
+        usuario TEXT NOT NULL,
+        host TEXT NOT NULL,
+        total_segundos INTEGER NOT NULL DEFAULT 0,
+        eventos INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, hora, usuario, host)
+    ) WITHOUT ROWID
+    """)
+
+def _m2_atividade_minuto(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_atividade_minuto (
+        host TEXT NOT NULL,
+        minuto TIMESTAMP NOT NULL,
+        usuario TEXT NOT NULL,
+        teclado INTEGER NOT NULL DEFAULT 0,
+        movimento INTEGER NOT NULL DEFAULT 0,
+        clique INTEGER NOT NULL DEFAULT 0,
+        rolagem INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (host, minuto, usuario)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_atividade_minuto ON ociosidade_atividade_minuto (minuto)")
+
+def _m3_lacunas(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_lacunas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        host TEXT NOT NULL,
+        usuario TEXT NOT NULL,
+        inicio TIMESTAMP NOT NULL,
+        fim TIMESTAMP NOT NULL,
+        minimo_segundos INTEGER NOT NULL,
+        quantidade INTEGER NOT NULL,
+        dados BLOB NOT NULL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lacunas_host_inicio ON ociosidade_lacunas (host, inicio)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lacunas_inicio ON ociosidade_lacunas (inicio)")
+
+# Migrações do esquema SQLite; a versão aplicada fica em PRAGMA user_version
+MIGRACOES = [
+    (1, "Log, índices e resumo por hora", _m1_esquema),
+    (2, "Densidade de atividade por minuto", _m2_atividade_minuto),
+    (3, "Lacunas de atividade em blocos", _m3_lacunas),
+]
+
+def migrar(conn):
+    """
+    Aplica, em ordem e em uma transação, as migrações acima da versão do arquivo.
+    Devolve a lista de versões aplicadas nesta chamada.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        atual = conn.execute("PRAGMA user_version").fetchone()[0]
+        novas = []
+        for versao, _, migracao in MIGRACOES:
+            if versao > atual:
+                migracao(conn)
+                novas.append(versao)
+        if novas:
+            conn.execute(f"PRAGMA user_version = {novas[-1]}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return novas
+
+def versao_esquema(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+# Um lock de gravação por arquivo, compartilhado pelas instâncias do processo
+_locks_escrita = {}
+_locks_lock = threading.Lock()
+
+def _lock_escrita(caminho):
+    with _locks_lock:
+        return _locks_escrita.setdefault(os.path.abspath(caminho), threading.Lock())
+
+class _ConexaoDaThread:
+    # Fica no threading.local: quando a thread termina o Python descarta o local,
+    # e o weakref.finalize registrado em _conexao() fecha a conexão
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+
+class BancoSQLite:
+    """
+    Backend SQLite em arquivo (WAL), seguro entre threads: cada thread usa a própria
+    conexão, criada no primeiro uso e fechada quando a thread termina ou por fechar().
+    """
+    def __init__(self, caminho='monitor_ociosidade.db', sincronismo='NORMAL'):
+        sincronismo = sincronismo.upper()
+        if sincronismo not in SINCRONISMOS:
+            raise ValueError(f"Sincronismo inválido: {sincronismo!r} (use {', '.join(SINCRONISMOS)})")
+        self.caminho = caminho
+        self.sincronismo = sincronismo
+        self._local = threading.local()
+        self._conexoes = []
+        self._lock_conexoes = threading.Lock()
+        self._lock_gravacao = _lock_escrita(caminho)
+        with self._conexao() as conn:
+            # journal_mode fica gravado no arquivo; precisa estar fora de transação
+            conn.execute("PRAGMA journal_mode = WAL")
+            with self._lock_gravacao:
+                migrar(conn)
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, check_same_thread=False, isolation_level=None,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f"PRAGMA synchronous = {self.sincronismo}")
+        return conn
+
+    @contextlib.contextmanager
+    def _conexao(self):
+        dona = getattr(self._local, 'dona', None)
+        if dona is None:
+            conn = self._conectar()
+            dona = self._local.dona = _ConexaoDaThread(conn)
+            with self._lock_conexoes:
+                # As finalizações já executadas são de threads que terminaram
+                self._conexoes = [f for f in self._conexoes if f.alive]
+                self._conexoes.append(weakref.finalize(dona, conn.close))
+        yield dona.conn
+
+    @contextlib.contextmanager
+    def _transacao(self):
+        # Uma transação de gravação: BEGIN IMMEDIATE pega o lock de escrita do arquivo
+        # logo no início (sem impasse ao promover uma leitura a gravação)
+        with self._lock_gravacao, self._conexao() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _consultar(self, sql, vals):
+        with self._conexao() as conn:
+            return conn.execute(sql, vals).fetchall()
+
+    def _gravar(self, registros):
+        # Registros (inicio, fim, duracao, usuario, host) e o resumo por hora em uma transação
+        with self._transacao() as conn:
+            conn.executemany(SQL_INSERIR, registros)
+            conn.executemany(SQL_SOMAR_RESUMO, resumir_registros(registros))
+
+    @metricas.medir_gravacao('inserir_ociosidade')
+    def inserir_ociosidade(self, inicio_ocioso, fim_ocioso, duracao, usuario, host):
+        self._gravar([(inicio_ocioso, fim_ocioso, duracao, usuario, host)])
+
+    @metricas.medir_gravacao('inserir_ociosidade_lote')
+    def inserir_ociosidade_lote(self, registros):
+        self._gravar(registros)
+
+    @metricas.medir_gravacao('inserir_eventos')
+    def inserir_eventos(self, eventos):
+        """
+        Grava eventos (evento_id, inicio, fim, duracao, usuario, host) ignorando os ids já
+        gravados, com o resumo por hora só dos novos, em uma transação. Devolve quantos
+        eventos eram novos.
+        """
+        with self._transacao() as conn:
+            novos = []
+            for evento in eventos:
+                if conn.execute(SQL_INSERIR_EVENTO, evento).rowcount:
+                    novos.append(evento[1:])
+            conn.executemany(SQL_SOMAR_RESUMO, resumir_registros(novos))
+        return len(novos)
+
+    @staticmethod
+    def _filtros(dt_inicio=None, dt_fim=None, usuario=None, host=None, duracao_minima=None,
+                 inicio_antes_de=None):
+        # Mesmas condições de DBHelper._filtros, com os marcadores do sqlite3
+        conds = []
+        vals = []
+        if dt_inicio:
+            conds.append("inicio_ocioso >= ?")
+            vals.append(dt_inicio)
+        if dt_fim:
+            conds.append("fim_ocioso <= ? AND inicio_ocioso <= ?")
+            vals += [dt_fim, dt_fim]
+        if usuario:
+            conds.append("usuario = ?")
+            vals.append(usuario)
+        if host:
+            conds.append("host = ?")
+            vals.append(host)
+        if duracao_minima:
+            conds.append("duracao_segundos >= ?")
+            vals.append(duracao_minima)
+        if inicio_antes_de:
+            conds.append("inicio_ocioso < ?")
+            vals.append(inicio_antes_de)
+        return conds, vals
+
+    def _sql_pagina_logs(self, apos=None, limite=500, decrescente=True, **filtros):
+        sql = f"SELECT {_COLUNAS} FROM ociosidade_log"
+        conds, vals = self._filtros(**filtros)
+        if apos is not None:
+            inicio, id_ = apos
+            if decrescente:
+                conds.append("inicio_ocioso <= ? AND (inicio_ocioso < ? OR id < ?)")
+            else:
+                conds.append("inicio_ocioso >= ? AND (inicio_ocioso > ? OR id > ?)")
+            vals += [inicio, inicio, id_]
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        ordem = "DESC" if decrescente else "ASC"
+        sql += f" ORDER BY inicio_ocioso {ordem}, id {ordem} LIMIT ?"
+        vals.append(limite)
+        return sql, tuple(vals)
+
+    @metricas.medir_consulta('buscar_pagina_logs')
+    def buscar_pagina_logs(self, apos=None, limite=500, decrescente=True, dt_inicio=None, dt_fim=None,
+                           usuario=None, host=None, duracao_minima=None, inicio_antes_de=None):
+        # Como DBHelper.buscar_pagina_logs: (linhas, próxima chave ou None)
+        sql, vals = self._sql_pagina_logs(apos, limite, decrescente, dt_inicio=dt_inicio, dt_fim=dt_fim,
+                                          usuario=usuario, host=host, duracao_minima=duracao_minima,
+                                          inicio_antes_de=inicio_antes_de)
+        rows = self._consultar(sql, vals)
+        proxima = (rows[-1][1], rows[-1][0]) if len(rows) == limite else None
+        return rows, proxima
+
+    def paginar_logs(self, tamanho_pagina=500, decrescente=True, **filtros):
+        apos = None
+        while True:
+            rows, apos = self.buscar_pagina_logs(apos, tamanho_pagina, decrescente, **filtros)
+            if rows:
+                yield rows
+            if apos is None:
+                return
+
+    @metricas.medir_consulta('buscar_logs')
+    def buscar_logs(self, dt_inicio=None, dt_fim=None, usuario=None, host=None, duracao_minima=None):
+        sql = f"SELECT {_COLUNAS} FROM ociosidade_log"
+        conds, vals = self._filtros(dt_inicio, dt_fim, usuario, host, duracao_minima)
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " ORDER BY inicio_ocioso DESC, id DESC"
+        return self._consultar(sql, tuple(vals))
+
+    def explicar_buscar_logs(self, dt_inicio=None, dt_fim=None, usuario=None, host=None, apos=None):
+        """
+        Plano (EXPLAIN QUERY PLAN) da consulta de página, no formato de
+        DBHelper.explicar_buscar_logs: um dicionário por tabela lida, com 'key' = índice
+        usado (None em varredura completa) e o detalhe do SQLite em 'Extra'.
+        """
+        sql, vals = self._sql_pagina_logs(apos, dt_inicio=dt_inicio, dt_fim=dt_fim, usuario=usuario, host=host)
+        plano = []
+        for _, _, _, detalhe in self._consultar("EXPLAIN QUERY PLAN " + sql, vals):
+            partes = detalhe.split()
+            if partes[0] not in ('SEARCH', 'SCAN'):
+                continue
+            # Versões antigas do SQLite escrevem "SCAN TABLE nome"
+            if partes[1] == 'TABLE':
+                del partes[1]
+            indice = None
+            if 'INDEX' in partes:
+                indice = partes[partes.index('INDEX') + 1]
+            elif 'PRIMARY' in partes or 'INTEGER' in partes:
+                indice = 'PRIMARY'
+            plano.append({'table': partes[1], 'type': partes[0], 'key': indice, 'rows': None, 'Extra': detalhe})
+        return plano
+
+    def iterar_logs(self, dt_inicio=None, dt_fim=None, usuario=None, host=None, duracao_minima=None,
+                    tamanho_bloco=5000, inicio_antes_de=None):
+        # Blocos em ordem de inicio_ocioso; no WAL o gerador lê um retrato fixo do banco
+        sql = f"SELECT {_COLUNAS} FROM ociosidade_log"
+        conds, vals = self._filtros(dt_inicio, dt_fim, usuario, host, duracao_minima, inicio_antes_de)
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " ORDER BY inicio_ocioso"
+        with self._conexao() as conn:
+            cursor = conn.execute(sql, tuple(vals))
+            try:
+                while True:
+                    bloco = cursor.fetchmany(tamanho_bloco)
+                    if not bloco:
+                        return
+                    yield bloco
+            finally:
+                cursor.close()
+
+    @metricas.medir_consulta('agregar_resumo')
+    def agregar_resumo(self, por='dia', dt_inicio=None, dt_fim=None, usuario=None, host=None):
+        if por not in AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento inválido: {por!r} (use {', '.join(AGRUPAMENTOS)})")
+        sql = f"SELECT {por}, SUM(total_segundos), SUM(eventos) FROM ociosidade_resumo_hora"
+        conds = []
+        vals = []
+        if dt_inicio:
+            conds.append("(dia > ? OR (dia = ? AND hora >= ?))")
+            vals += [dt_inicio.date(), dt_inicio.date(), dt_inicio.hour]
+        if dt_fim:
+            conds.append("(dia < ? OR (dia = ? AND hora <= ?))")
+            vals += [dt_fim.date(), dt_fim.date(), dt_fim.hour]
+        if usuario:
+            conds.append("usuario = ?")
+            vals.append(usuario)
+        if host:
+            conds.append("host = ?")
+            vals.append(host)
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += f" GROUP BY {por} ORDER BY {por}"
+        return [(chave, int(total or 0), int(eventos or 0)) for chave, total, eventos in self._consultar(sql, tuple(vals))]
+
+    def reconstruir_resumo(self, tamanho_bloco=50000):
+        # Refaz a tabela de resumo a partir de todo o histórico de ociosidade_log
+        acumular = acumulador()
+        somas = {}
+        with self._transacao() as conn:
+            conn.execute("DELETE FROM ociosidade_resumo_hora")
+            cursor = conn.execute("""
+            SELECT inicio_ocioso, fim_ocioso, duracao_segundos, usuario, host
+            FROM ociosidade_log WHERE inicio_ocioso IS NOT NULL AND fim_ocioso IS NOT NULL
+            """)
+            while True:
+                bloco = cursor.fetchmany(tamanho_bloco)
+                if not bloco:
+                    break
+                acumular(somas, bloco)
+            conn.executemany(SQL_SOMAR_RESUMO, [chave + tuple(soma) for chave, soma in somas.items()])
+        return len(somas)
+
+    @metricas.medir_gravacao('inserir_atividade')
+    def inserir_atividade(self, linhas):
+        # Linhas (minuto, usuario, host, teclado, movimento, clique, rolagem); minutos repetidos somam
+        with self._transacao() as conn:
+            conn.executemany(SQL_SOMAR_ATIVIDADE, linhas)
+
+    @metricas.medir_consulta('agregar_atividade')
+    def agregar_atividade(self, por='hora', dt_inicio=None, dt_fim=None, usuario=None, host=None):
+        # Como DBHelper.agregar_atividade: [(início do período, teclado, movimento, clique, rolagem)]
+        if por not in AGRUPAMENTOS_ATIVIDADE:
+            raise ValueError(f"Agrupamento inválido: {por!r} (use {', '.join(AGRUPAMENTOS_ATIVIDADE)})")
+        sql = (f"SELECT {AGRUPAMENTOS_ATIVIDADE[por]} AS chave, SUM(teclado), SUM(movimento), SUM(clique), "
+               "SUM(rolagem) FROM ociosidade_atividade_minuto")
+        conds = []
+        vals = []
+        for cond, valor in (("minuto >= ?", dt_inicio), ("minuto <= ?", dt_fim),
+                            ("usuario = ?", usuario), ("host = ?", host)):
+            if valor:
+                conds.append(cond)
+                vals.append(valor)
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " GROUP BY chave ORDER BY chave"
+        return [(datetime.datetime.fromisoformat(chave),) + tuple(contagens)
+                for chave, *contagens in self._consultar(sql, tuple(vals))]
+
+    @metricas.medir_gravacao('inserir_lacunas')
+    def inserir_lacunas(self, blocos):
+        # Blocos (inicio, fim, usuario, host, minimo_segundos, quantidade, dados)
+        with self._transacao() as conn:
+            conn.executemany(SQL_INSERIR_LACUNAS, blocos)
+
+    @metricas.medir_consulta('buscar_lacunas')
+    def buscar_lacunas(self, dt_inicio=None, dt_fim=None, usuario=None, host=None):
+        # Como DBHelper.buscar_lacunas: [(inicio, usuario, host, minimo_segundos, dados)]
+        sql = "SELECT inicio, usuario, host, minimo_segundos, dados FROM ociosidade_lacunas"
+        conds = []
+        vals = []
+        for cond, valor in (("fim >= ?", dt_inicio), ("inicio <= ?", dt_fim),
+                            ("usuario = ?", usuario), ("host = ?", host)):
+            if valor:
+                conds.append(cond)
+                vals.append(valor)
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " ORDER BY inicio, id"
+        return self._consultar(sql, tuple(vals))
+
+    @metricas.medir_consulta('buscar_logs_por_id')
+    def buscar_logs_por_id(self, depois_de_id=None, antes_de_id=None, limite=200):
+        sql = f"SELECT {_COLUNAS} FROM ociosidade_log"
+        conds = []
+        vals = []
+        if depois_de_id is not None:
+            conds.append("id > ?")
+            vals.append(depois_de_id)
+        if antes_de_id is not None:
+            conds.append("id < ?")
+            vals.append(antes_de_id)
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += " ORDER BY id DESC LIMIT ?"
+        vals.append(limite)
+        return self._consultar(sql, tuple(vals))
+
+    def versao_esquema(self):
+        with self._conexao() as conn:
+            return versao_esquema(conn)
+
+    def contar(self):
+        return self._consultar("SELECT COUNT(*) FROM ociosidade_log", ())[0][0]
+
+    def fechar(self):
+        # Fecha as conexões de todas as threads; a instância não deve mais ser usada
+        with self._lock_conexoes:
+            conexoes, self._conexoes = self._conexoes, []
+        for fechar_conexao in conexoes:
+            fechar_conexao()
+        self._local = threading.local()
+
+_memorias = {}
+_memorias_lock = threading.Lock()
+
+class BancoMemoria(BancoSQLite):
+    """
+    Backend em memória (SQLite ':memory:'): uma conexão por nome, compartilhada pelas
+    instâncias e threads do processo e usada uma operação por vez. Os dados somem
+    quando o processo termina.
+    """
+    def __init__(self, nome=''):
+        self.caminho = ':memory:'
+        self.sincronismo = 'OFF'
+        self.nome = nome
+        with _memorias_lock:
+            compartilhada = _memorias.get(nome)
+            if compartilhada is None:
+                conn = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None,
+                                       detect_types=sqlite3.PARSE_DECLTYPES)
+                migrar(conn)
+                compartilhada = _memorias[nome] = (conn, threading.RLock())
+        self._conn, self._lock_gravacao = compartilhada
+
+    @contextlib.contextmanager
+    def _conexao(self):
+        with self._lock_gravacao:
+            yield self._conn
+
+    def iterar_logs(self, dt_inicio=None, dt_fim=None, usuario=None, host=None, duracao_minima=None,
+                    tamanho_bloco=5000, inicio_antes_de=None):
+        # A conexão é única: cada bloco é uma página por chave, sem prendê-la entre os blocos
+        return self.paginar_logs(tamanho_bloco, decrescente=False, dt_inicio=dt_inicio, dt_fim=dt_fim,
+                                 usuario=usuario, host=host, duracao_minima=duracao_minima,
+                                 inicio_antes_de=inicio_antes_de)
+
+    def fechar(self):
+        # A conexão pertence ao nome; ver descartar_memoria()
+        pass
+
+def descartar_memoria(nome=''):
+    # Apaga os dados em memória do nome dado (o próximo BancoMemoria começa vazio)
+    with _memorias_lock:
+        compartilhada = _memorias.pop(nome, None)
+    if compartilhada is not None:
+        compartilhada[0].close()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Barramento de mensagens das threads de trabalho para a thread do Tk.
+
+O Tkinter não deve ser chamado fora da thread do mainloop. As threads do monitor,
+do escritor e das leituras só publicam mensagens (tipo + dados) numa fila; a
+thread do Tk esvazia a fila em lotes a cada `intervalo` ms com after() e chama
+os tratadores assinados. Tratadores assinados com so_o_ultimo=True recebem só a
+mensagem mais recente de cada lote (ex.: texto da barra de status).
+"""
+
+import queue
+
+class BarramentoUI:
+    """
+    Fila única entre as threads de trabalho (publicar) e a thread do Tk (tratadores).
+    """
+    def __init__(self, raiz, intervalo=50, lote=1000):
+        self.raiz = raiz
+        self.intervalo = intervalo
+        self.lote = lote
+        self._fila = queue.SimpleQueue()
+        self._tratadores = {}
+        self._agendado = None
+
+    def assinar(self, tipo, tratador, so_o_ultimo=False):
+        # Só na thread do Tk, antes de iniciar()
+        self._tratadores[tipo] = (tratador, so_o_ultimo)
+
+    def publicar(self, tipo, *dados):
+        # Pode ser chamado de qualquer thread; não toca no Tk
+        self._fila.put((tipo, dados))
+
+    def iniciar(self):
+        self._agendado = self.raiz.after(self.intervalo, self._drenar)
+
+    def _drenar(self):
+        try:
+            self.drenar()
+        finally:
+            # Um tratador com erro não para o barramento (o Tk já mostra o traceback)
+            self._agendado = self.raiz.after(self.intervalo, self._drenar)
+
+    def drenar(self):
+        """
+        Entrega até `lote` mensagens pendentes, na ordem de publicação; as de tipos
+        so_o_ultimo são entregues uma vez, no fim, com os dados mais recentes.
+        Devolve quantas mensagens foram retiradas da fila.
+        """
+        ultimos = {}
+        retiradas = 0
+        while retiradas < self.lote:
+            try:
+                tipo, dados = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            retiradas += 1
+            tratador, so_o_ultimo = self._tratadores[tipo]
+            if so_o_ultimo:
+                ultimos[tipo] = dados
+            else:
+                tratador(*dados)
+        for tipo, dados in ultimos.items():
+            self._tratadores[tipo][0](*dados)
+        return retiradas
+
+    def parar(self):
+        if self._agendado is not None:
+            self.raiz.after_cancel(self._agendado)
+            self._agendado = None
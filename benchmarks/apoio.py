@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Apoio dos benchmarks: banco falso em memória e falhas simuladas sobre um backend
+real (BancoInstavel), gerador de entrada sintética para os callbacks do monitor e
+carga inicial de milhões de registros no backend SQLite de produção.
+"""
+
+import datetime
+import random
+import threading
+import time
+
+from banco_sqlite import SQL_INSERIR
+
+class BancoFalso:
+    """
+    Banco em memória com a mesma interface de gravação do DBHelper.
+    Com fora_do_ar=True toda operação falha, simulando o MySQL indisponível.
+    """
+    def __init__(self, latencia=0.0):
+        self.registros = []
+        self.latencia = latencia
+        self.fora_do_ar = False
+        self.lotes = 0
+
+    def _verificar(self):
+        if self.fora_do_ar:
+            raise ConnectionError("banco falso fora do ar")
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def inserir_ociosidade(self, inicio_ocioso, fim_ocioso, duracao, usuario, host):
+        self._verificar()
+        self.registros.append((inicio_ocioso, fim_ocioso, duracao, usuario, host))
+
+    def inserir_ociosidade_lote(self, registros):
+        self._verificar()
+        self.lotes += 1
+        self.registros.extend(registros)
+
+    def fechar(self):
+        pass
+
+class BancoInstavel(BancoFalso):
+    """
+    Envolve um backend real (ex.: abrir_banco('sqlite:///...')) para simular um banco
+    lento ou fora do ar: as gravações esperam `latencia` segundos e falham com
+    fora_do_ar=True. Leituras e os demais métodos vão direto ao backend.
+    """
+    def __init__(self, db, latencia=0.0):
+        super().__init__(latencia)
+        self.db = db
+
+    def __getattr__(self, nome):
+        return getattr(self.db, nome)
+
+    def inserir_ociosidade(self, inicio_ocioso, fim_ocioso, duracao, usuario, host):
+        self._verificar()
+        self.db.inserir_ociosidade(inicio_ocioso, fim_ocioso, duracao, usuario, host)
+
+    def inserir_ociosidade_lote(self, registros):
+        self._verificar()
+        self.lotes += 1
+        self.db.inserir_ociosidade_lote(registros)
+
+    def inserir_eventos(self, eventos):
+        self._verificar()
+        self.lotes += 1
+        return self.db.inserir_eventos(eventos)
+
+    def fechar(self):
+        # O backend é do benchmark, que o fecha no fim; reconexões do escritor não o fecham
+        pass
+
+def gerar_registros(quantidade, usuarios=50, hosts=50, inicio=datetime.datetime(2023, 1, 1), semente=7):
+    """
+    Registros (inicio, fim, duracao, usuario, host) sintéticos em ordem de início,
+    com durações parecidas com as reais: muitas pausas curtas e algumas longas.
+    """
+    aleatorio = random.Random(semente)
+    instante = inicio
+    for _ in range(quantidade):
+        instante += datetime.timedelta(seconds=aleatorio.randrange(1, 120))
+        duracao = int(aleatorio.expovariate(1 / 900)) + 30
+        yield (instante, instante + datetime.timedelta(seconds=duracao), duracao,
+               f'usuario{aleatorio.randrange(usuarios)}', f'host{aleatorio.randrange(hosts)}')
+
+def semear(db, quantidade, tamanho_bloco=100000, **opcoes):
+    """
+    Preenche um banco_sqlite.BancoSQLite com `quantidade` registros sintéticos, em
+    blocos (memória constante), e reconstrói o resumo por hora uma vez no fim.
+    Devolve o tempo gasto em segundos.
+    """
+    inicio = time.perf_counter()
+    bloco = []
+    for registro in gerar_registros(quantidade, **opcoes):
+        bloco.append(registro)
+        if len(bloco) >= tamanho_bloco:
+            _inserir_sem_resumo(db, bloco)
+            bloco = []
+    if bloco:
+        _inserir_sem_resumo(db, bloco)
+    db.reconstruir_resumo()
+    return time.perf_counter() - inicio
+
+def _inserir_sem_resumo(db, bloco):
+    # Só o log: o resumo de todos os blocos é refeito de uma vez por reconstruir_resumo
+    with db._transacao() as conn:
+        conn.executemany(SQL_INSERIR, bloco)
+
+class ArvoreFalsa:
+    """
+    Substituto do ttk.Treeview com os métodos usados por TabelaLogs (sem Tk).
+    """
+    def __init__(self):
+        self._itens = {}
+        self._ordem = []
+
+    def get_children(self):
+        return tuple(self._ordem)
+
+    def delete(self, *iids):
+        removidos = set(iids)
+        for iid in iids:
+            self._itens.pop(iid, None)
+        self._ordem = [iid for iid in self._ordem if iid not in removidos]
+
+    def insert(self, pai, posicao, iid, values):
+        self._itens[iid] = values
+        if posicao == 'end':
+            self._ordem.append(iid)
+        else:
+            self._ordem.insert(posicao, iid)
+        return iid
+
+    def exists(self, iid):
+        return iid in self._itens
+
+class EntradaSintetica(threading.Thread):
+    """
+    Injeta eventos de teclado e mouse nos callbacks do monitor a uma taxa fixa
+    (eventos por segundo), na mistura informada, como fariam as threads do pynput.
+    Ao terminar, cpu tem o tempo de CPU gasto pela thread.
+    """
+    def __init__(self, monitor, taxa, duracao, mistura=None, passo=0.01):
+        super().__init__(daemon=True)
+        self.monitor = monitor
+        self.taxa = taxa
+        self.duracao = duracao
+        # Fração de cada tipo de evento; o movimento do mouse domina na prática
+        self.mistura = mistura or {'movimento': 0.85, 'teclado': 0.1, 'clique': 0.03, 'rolagem': 0.02}
+        self.passo = passo
+        self.enviados = 0
+        self.cpu = 0.0
+
+    def _chamadas(self):
+        m = self.monitor
+        tipos = {
+            'movimento': lambda i: m._on_movimento(i, i),
+            'teclado': lambda i: m._on_tecla(i),
+            'clique': lambda i: m._on_clique(i, i, 1, True),
+            'rolagem': lambda i: m._on_rolagem(i, i, 0, 1),
+        }
+        aleatorio = random.Random(1)
+        # Sequência pré-sorteada para que o sorteio não entre na medida
+        return [tipos[t] for t in aleatorio.choices(list(self.mistura), weights=list(self.mistura.values()), k=4096)]
+
+    def run(self):
+        chamadas = self._chamadas()
+        por_passo = max(1, round(self.taxa * self.passo))
+        cpu = time.thread_time()
+        inicio = time.monotonic()
+        proximo = inicio
+        i = 0
+        while proximo - inicio < self.duracao:
+            for _ in range(por_passo):
+                chamadas[i & 4095](i)
+                i += 1
+            proximo += self.passo
+            espera = proximo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        self.enviados = i
+        self.cpu = time.thread_time() - cpu
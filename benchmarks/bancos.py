@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Latência e vazão dos backends de armazenamento (MySQL, SQLite em arquivo, memória).
+
+Cada backend parte de um banco vazio e recebe a mesma carga: --unitarios chamadas
+de inserir_ociosidade (latência mediana e p99 por gravação), o restante dos
+--registros com inserir_ociosidade_lote em lotes de --lote (registros/s),
+inserir_eventos com metade dos eventos reenviados, e as leituras do dashboard
+(primeira página, página funda, incremental por id, gráficos, exportação).
+No fim confere que todos devolveram as mesmas linhas e os mesmos totais
+('consistentes'); se não, ou se algum backend falhar, sai com código 1. O SQLite
+é medido com synchronous=NORMAL (padrão) e FULL (fsync a cada commit). O MySQL só entra com --mysql URL; use uma base descartável, ela
+é esvaziada antes da medida.
+
+Uso (na raiz do projeto):
+python -m benchmarks.bancos --registros 50000 --json
+python -m benchmarks.bancos --mysql mysql://root@localhost/bench_ociosidade
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import banco_sqlite
+from banco import DBHelper, abrir_banco
+from benchmarks.apoio import gerar_registros
+
+def _ms(segundos):
+    return round(segundos * 1000, 3)
+
+def _cronometrar(funcao, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return _ms(statistics.median(tempos))
+
+def _esvaziar_mysql(db):
+    with db.pool.conexao() as c:
+        cursor = c.cursor()
+        for tabela in ('ociosidade_log', 'ociosidade_resumo_hora'):
+            cursor.execute(f"TRUNCATE TABLE {tabela}")
+        cursor.close()
+
+def _pagina_funda(db, paginas):
+    apos = None
+    for _ in range(paginas):
+        _, apos = db.buscar_pagina_logs(apos, 200)
+
+def _retrato(db):
+    # O que o dashboard veria, sem os ids (a numeração pode variar entre motores)
+    primeira, _ = db.buscar_pagina_logs(None, 200)
+    return {
+        'registros': sum(len(bloco) for bloco in db.iterar_logs()),
+        'primeira_pagina': [tuple(linha[1:]) for linha in primeira],
+        'resumo_dia': [tuple(linha) for linha in db.agregar_resumo('dia')],
+        'resumo_hora': [tuple(linha) for linha in db.agregar_resumo('hora')],
+    }
+
+def medir_backend(db, args):
+    registros = list(gerar_registros(args.registros))
+    unitarios, resto = registros[:args.unitarios], registros[args.unitarios:]
+    resultado = {}
+
+    latencias = []
+    for registro in unitarios:
+        inicio = time.perf_counter()
+        db.inserir_ociosidade(*registro)
+        latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+    resultado['inserir_unitario_ms'] = {
+        'mediana': _ms(statistics.median(latencias)),
+        'p99': _ms(latencias[int(len(latencias) * 0.99)]),
+    }
+
+    inicio = time.perf_counter()
+    for i in range(0, len(resto), args.lote):
+        db.inserir_ociosidade_lote(resto[i:i + args.lote])
+    tempo = time.perf_counter() - inicio
+    resultado['inserir_lote'] = {'registros_por_s': round(len(resto) / tempo),
+                                 'ms_por_lote': _ms(tempo / -(-len(resto) // args.lote))}
+
+    ultimo = registros[-1][1]
+    eventos = [(f'{i:032x}',) + r for i, r in enumerate(gerar_registros(args.lote * 10, inicio=ultimo, semente=11))]
+    db.inserir_eventos(eventos[:len(eventos) // 2])
+    inicio = time.perf_counter()
+    novos = db.inserir_eventos(eventos)
+    resultado['inserir_eventos_com_reenvio'] = {'ms': _ms(time.perf_counter() - inicio), 'novos': novos,
+                                                'eventos': len(eventos)}
+
+    maior_id = db.buscar_logs_por_id(limite=1)[0][0]
+    dia = registros[len(registros) // 2][0].replace(hour=0, minute=0, second=0)
+    leituras = {
+        'primeira_pagina': lambda: db.buscar_pagina_logs(None, 200),
+        f'pagina_{args.paginas}': lambda: _pagina_funda(db, args.paginas),
+        'incremental_por_id': lambda: db.buscar_logs_por_id(depois_de_id=maior_id - 50),
+        'grafico_dia': lambda: db.agregar_resumo('dia'),
+        'grafico_hora_usuario': lambda: db.agregar_resumo('hora', usuario='usuario1'),
+        'exportacao_dia': lambda: sum(len(b) for b in db.iterar_logs(
+            dt_inicio=dia, dt_fim=dia + datetime.timedelta(days=1))),
+    }
+    resultado['leituras_ms'] = {nome: _cronometrar(funcao) for nome, funcao in leituras.items()}
+    return resultado, _retrato(db)
+
+def medir(args, pasta):
+    backends = {
+        'memoria': lambda: abrir_banco('memoria:benchmark'),
+        'sqlite': lambda: abrir_banco('sqlite:///' + os.path.join(pasta, 'normal.db')),
+        'sqlite_full': lambda: abrir_banco('sqlite:///' + os.path.join(pasta, 'full.db') + '?synchronous=FULL'),
+    }
+    if args.mysql:
+        backends['mysql'] = lambda: abrir_banco(args.mysql)
+    resultados = {}
+    retratos = {}
+    for nome, abrir in backends.items():
+        try:
+            db = abrir()
+            if isinstance(db, DBHelper):
+                _esvaziar_mysql(db)
+        except Exception as e:
+            resultados[nome] = {'erro': f"{type(e).__name__}: {e}"}
+            continue
+        try:
+            resultados[nome], retratos[nome] = medir_backend(db, args)
+        finally:
+            db.fechar()
+    banco_sqlite.descartar_memoria('benchmark')
+    referencia = next(iter(retratos.values()), None)
+    return {'registros': args.registros, 'backends': resultados,
+            'consistentes': all(retrato == referencia for retrato in retratos.values())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--registros', type=int, default=50000)
+    parser.add_argument('--unitarios', type=int, default=2000, help='gravações medidas uma a uma')
+    parser.add_argument('--lote', type=int, default=500)
+    parser.add_argument('--paginas', type=int, default=50, help='profundidade da página funda')
+    parser.add_argument('--mysql', help='URL mysql:// de uma base descartável para comparar')
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        resultado = medir(args, pasta)
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        for nome, valor in resultado['backends'].items():
+            print(f"{nome}: {valor}")
+        print(f"consistentes: {resultado['consistentes']}")
+    falhas = [f"{nome}: {valor['erro']}" for nome, valor in resultado['backends'].items() if 'erro' in valor]
+    if not resultado['consistentes']:
+        falhas.append("os backends devolveram linhas ou totais diferentes")
+    for falha in falhas:
+        print(f"FALHA {falha}", file=sys.stderr)
+    sys.exit(1 if falhas else 0)
+
+if __name__ == '__main__':
+    main()
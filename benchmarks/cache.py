@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Cache colunar (cache.CacheOciosidade) contra as linhas em tuplas lidas do banco.
+
+Com um banco SQLite semeado com --registros linhas: memória do histórico inteiro
+como lista de tuplas (id, datetime, datetime, int, str, str), como buscar_logs
+devolve, e nas colunas do cache (medida com tracemalloc); tempo da carga inicial e
+da atualização incremental do cache; e as leituras do dashboard (primeira página,
+página funda, gráficos com e sem filtro, exportação de um mês) no banco e no cache.
+
+Uso (na raiz do projeto):
+python -m benchmarks.cache --registros 1000000 --json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from banco import abrir_banco
+from benchmarks.apoio import gerar_registros, semear
+from cache import CacheOciosidade
+
+def _ms(segundos):
+    return round(segundos * 1000, 2)
+
+def _cronometrar(funcao, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return _ms(statistics.median(tempos))
+
+def _memoria(funcao):
+    # (resultado, MB alocados e ainda vivos depois da chamada)
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        atual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, round(atual / 2**20, 1)
+
+def _pagina_funda(leitor, paginas):
+    apos = None
+    for _ in range(paginas):
+        _, apos = leitor.buscar_pagina_logs(apos, 200)
+
+def medir(args, pasta):
+    db = abrir_banco('sqlite:///' + os.path.join(pasta, 'cache.db'))
+    semear(db, args.registros)
+    resultados = {'registros': args.registros}
+
+    linhas, mb_tuplas = _memoria(lambda: [linha for bloco in db.iterar_logs() for linha in bloco])
+    del linhas
+    # Memória medida em uma carga à parte: o tracemalloc deixa a carga bem mais lenta
+    _, mb_cache = _memoria(CacheOciosidade(db, limite_mb=args.limite_mb).atualizar)
+    cache = CacheOciosidade(db, limite_mb=args.limite_mb)
+    inicio = time.perf_counter()
+    cache.atualizar()
+    resultados['carga_inicial_ms'] = _ms(time.perf_counter() - inicio)
+    resultados['memoria_mb'] = {'tuplas': mb_tuplas, 'colunas': mb_cache,
+                                'bytes_por_registro_colunas': round(cache.memoria() / len(cache.colunas), 1)}
+    resultados['cobertura'] = {'registros_no_cache': len(cache.colunas), 'completo': cache.colunas.corte is None}
+
+    ultimo = db.buscar_logs_por_id(limite=1)[0]
+    db.inserir_ociosidade_lote(list(gerar_registros(50, inicio=ultimo[2], semente=99)))
+    inicio = time.perf_counter()
+    cache.atualizar()
+    resultados['atualizacao_50_registros_ms'] = _ms(time.perf_counter() - inicio)
+
+    primeiro = db.buscar_pagina_logs(limite=1, decrescente=False)[0][0][1]
+    de = (primeiro.replace(day=1, hour=0, minute=0, second=0) + datetime.timedelta(days=32)).replace(day=1)
+    ate = (de + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(seconds=1)
+    leituras = {
+        'primeira_pagina': lambda l: l.buscar_pagina_logs(None, 200),
+        f'pagina_{args.paginas}': lambda l: _pagina_funda(l, args.paginas),
+        'incremental_tabela': lambda l: l.buscar_logs_por_id(depois_de_id=ultimo[0], limite=200),
+        'grafico_dia_tudo': lambda l: l.agregar_resumo('dia'),
+        'grafico_hora_tudo': lambda l: l.agregar_resumo('hora'),
+        'grafico_dia_mes': lambda l: l.agregar_resumo('dia', dt_inicio=de, dt_fim=ate),
+        'grafico_hora_usuario': lambda l: l.agregar_resumo('hora', usuario='usuario1'),
+        'exportacao_mes': lambda l: sum(len(b) for b in l.iterar_logs(dt_inicio=de, dt_fim=ate)),
+    }
+    resultados['leituras_ms'] = {nome: {'banco': _cronometrar(lambda: funcao(db)),
+                                        'cache': _cronometrar(lambda: funcao(cache))}
+                                 for nome, funcao in leituras.items()}
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--registros', type=int, default=1_000_000)
+    parser.add_argument('--limite-mb', type=float, default=64)
+    parser.add_argument('--paginas', type=int, default=100, help='profundidade da página funda')
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        resultado = medir(args, pasta)
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        for nome, valor in resultado.items():
+            print(f"{nome}: {valor}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Teste de carga do coletor central com milhares de agentes simulados em uma máquina.
+
+O coletor roda em uma thread com o seu próprio loop asyncio, gravando em um
+banco SQLite local; os agentes são tarefas asyncio no loop principal, cada uma
+com a sua conexão HTTP persistente, enviando lotes como o ClienteColetor. Uma
+fração dos lotes é reenviada (resposta "perdida") para conferir a idempotência,
+e um limite_pendentes baixo força respostas 503 para conferir a contrapressão.
+O coletor exige um token; um lote enviado sem ele tem de receber 401.
+
+Mede eventos/s gravados, latência das requisições (p50/p99), lotes recusados e
+confere que cada evento está no banco exatamente uma vez.
+
+Uso (na raiz do projeto):
+python -m benchmarks.coletor --agentes 2000 --lotes 5 --eventos-por-lote 20 --json
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from banco import abrir_banco
+from benchmarks.apoio import BancoInstavel
+from cliente_coletor import CAMINHO_EVENTOS, cabecalho_token, codificar_eventos
+from coletor import Coletor
+
+TOKEN = 'token-do-teste-de-carga'
+
+def gerar_lote(agente, numero, quantidade):
+    base = datetime.datetime(2024, 1, 1, 8, 0, 0) + datetime.timedelta(days=numero)
+    lote = []
+    for i in range(quantidade):
+        inicio = base + datetime.timedelta(minutes=10 * i)
+        lote.append((inicio, inicio + datetime.timedelta(seconds=300), 300, f'usuario{agente}', f'host{agente}'))
+    return lote
+
+async def _post(reader, writer, corpo, token=TOKEN):
+    autorizacao = f"Authorization: {cabecalho_token(token)}\r\n" if token else ''
+    writer.write((f"POST {CAMINHO_EVENTOS} HTTP/1.1\r\nHost: coletor\r\n{autorizacao}"
+                  f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n").encode('latin-1') + corpo)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    tamanho = 0
+    while True:
+        linha = await reader.readline()
+        if linha in (b'\r\n', b''):
+            break
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        if nome.lower() == 'content-length':
+            tamanho = int(valor)
+    await reader.readexactly(tamanho)
+    return status
+
+async def simular_agente(agente, porta, args, limite, medidas):
+    aleatorio = random.Random(agente)
+    # Agentes não começam todos no mesmo instante
+    await asyncio.sleep(aleatorio.random() * args.espalhar)
+    async with limite:
+        reader, writer = await asyncio.open_connection('127.0.0.1', porta)
+        try:
+            for numero in range(args.lotes):
+                corpo = codificar_eventos(gerar_lote(agente, numero, args.eventos_por_lote))
+                envios = 2 if aleatorio.random() < args.reenvio else 1
+                for _ in range(envios):
+                    while True:
+                        inicio = time.perf_counter()
+                        status = await _post(reader, writer, corpo)
+                        medidas['latencias'].append(time.perf_counter() - inicio)
+                        if status == 200:
+                            break
+                        # 503: o agente real guardaria no spool; aqui espera um pouco e tenta de novo
+                        medidas['recusas'] += 1
+                        await asyncio.sleep(0.05 + aleatorio.random() * 0.1)
+                medidas['reenvios'] += envios - 1
+        finally:
+            writer.close()
+
+def _rodar_coletor(coletor, pronto, parar, resultado):
+    async def principal():
+        resultado['porta'] = await coletor.iniciar('127.0.0.1', 0)
+        pronto.set()
+        while not parar.is_set():
+            await asyncio.sleep(0.05)
+        await coletor.parar()
+    asyncio.run(principal())
+
+def medir(args, pasta):
+    db = BancoInstavel(abrir_banco('sqlite:///' + os.path.join(pasta, 'coletor.db')), latencia=args.latencia_banco)
+    coletor = Coletor(fabrica_db=lambda: db, tamanho_lote=args.tamanho_lote,
+                      limite_pendentes=args.limite_pendentes, token=TOKEN)
+    pronto, parar, info = threading.Event(), threading.Event(), {}
+    thread = threading.Thread(target=_rodar_coletor, args=(coletor, pronto, parar, info), daemon=True)
+    thread.start()
+    pronto.wait(10)
+
+    medidas = {'latencias': [], 'recusas': 0, 'reenvios': 0}
+
+    async def sem_token():
+        reader, writer = await asyncio.open_connection('127.0.0.1', info['porta'])
+        status = await _post(reader, writer, codificar_eventos(gerar_lote(-1, 0, 1)), token=None)
+        writer.close()
+        return status
+
+    async def agentes():
+        limite = asyncio.Semaphore(args.conexoes)
+        await asyncio.gather(*(simular_agente(a, info['porta'], args, limite, medidas)
+                               for a in range(args.agentes)))
+
+    status_sem_token = asyncio.run(sem_token())
+    inicio = time.perf_counter()
+    asyncio.run(agentes())
+    tempo = time.perf_counter() - inicio
+    estado = coletor.estado()
+    parar.set()
+    thread.join(30)
+
+    esperados = args.agentes * args.lotes * args.eventos_por_lote
+    gravados = db.contar()
+    db.db.fechar()
+    latencias = sorted(medidas['latencias'])
+    return {
+        'agentes': args.agentes,
+        'eventos_unicos': esperados,
+        'eventos_s': round(esperados / tempo),
+        'requisicoes': len(latencias),
+        'latencia_p50_ms': round(statistics.median(latencias) * 1000, 1),
+        'latencia_p99_ms': round(latencias[int(len(latencias) * 0.99) - 1] * 1000, 1),
+        'recusas_503': medidas['recusas'],
+        'lotes_reenviados': medidas['reenvios'],
+        'transacoes_banco': estado['lotes_banco'],
+        'eventos_por_transacao': round(estado['novos'] / max(estado['lotes_banco'], 1), 1),
+        'duplicados_ignorados': estado['duplicados'],
+        'gravados': gravados,
+        'cada_evento_uma_vez': gravados == esperados,
+        'sem_token_recusado': status_sem_token == 401,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agentes', type=int, default=2000)
+    parser.add_argument('--lotes', type=int, default=5, help='lotes enviados por agente')
+    parser.add_argument('--eventos-por-lote', type=int, default=20)
+    parser.add_argument('--reenvio', type=float, default=0.05, help='fração de lotes enviados duas vezes')
+    parser.add_argument('--conexoes', type=int, default=1000, help='conexões simultâneas no máximo')
+    parser.add_argument('--espalhar', type=float, default=1.0, help='segundos em que as partidas se espalham')
+    parser.add_argument('--tamanho-lote', type=int, default=5000)
+    parser.add_argument('--limite-pendentes', type=int, default=20000)
+    parser.add_argument('--latencia-banco', type=float, default=0.005, help='segundos extras por transação')
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        resultado = medir(args, pasta)
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        for nome, valor in resultado.items():
+            print(f"{nome}: {valor}")
+
+if __name__ == '__main__':
+    main()
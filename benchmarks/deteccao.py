@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Compara o laço antigo de polling (1s) com o motor por prazo do OciosidadeMonitor.
+
+Injeta rajadas sintéticas de eventos em on_input_event (sem pynput) e grava num
+banco falso em memória. Mede o tempo de CPU da thread de detecção e a latência
+de detecção do início e do fim de cada período ocioso, em dois cenários:
+
+- curto: pausas de --pausa segundos (padrão 3 s), muitos períodos por minuto.
+- ocioso_longo: poucas pausas de --pausa-longa segundos (padrão 20 s), mais
+  perto de uma estação real, que fica minutos ou horas parada entre rajadas.
+
+O polling paga uma volta por segundo de relógio; o motor por prazo, umas três
+por ciclo de atividade e pausa (ver a docstring de monitoramento.py). O custo é o
+despertar da thread, não a contabilidade do período (~20 µs). Por isso, com
+pausas de poucos segundos, os dois acordam quase o mesmo número de vezes e o
+motor por prazo pode gastar um pouco mais de CPU; com pausas longas gasta bem
+menos. A entrada "comparacao" mostra a razão de CPU (prazo / polling) em cada
+cenário.
+
+O cenário de
+reconfiguração mede o custo de reconfigurar() e confere que um período ocioso
+aberto sobrevive à troca de limite e que um limite menor vale já no prazo seguinte.
+
+Uso (na raiz do projeto):
+python -m benchmarks.deteccao --ciclos 5 --tempo-ocioso 1 --json
+"""
+
+import argparse
+import datetime
+import json
+import statistics
+import threading
+import time
+
+from benchmarks.apoio import BancoFalso
+from escritor import EscritorOciosidade
+from monitoramento import OciosidadeMonitor
+
+class MonitorPorPrazo(OciosidadeMonitor):
+    def _iniciar_listeners(self):
+        return []
+
+    def run(self):
+        inicio = time.thread_time()
+        super().run()
+        self.cpu = time.thread_time() - inicio
+
+class MonitorPolling(threading.Thread):
+    """
+    Réplica do laço original: acorda a cada segundo e compara time.time().
+    """
+    def __init__(self, tempo_ocioso, callback_on_evento_ocioso, escritor):
+        super().__init__()
+        self.tempo_ocioso = tempo_ocioso
+        self.callback_on_evento_ocioso = callback_on_evento_ocioso
+        self._stop_event = threading.Event()
+        self._ultimo_evento = time.time()
+        self.escritor = escritor
+        self.ocioso_ativo = False
+        self.inicio_ocioso = None
+
+    def run(self):
+        inicio = time.thread_time()
+        while not self._stop_event.is_set():
+            agora = time.time()
+            if not self.ocioso_ativo and (agora - self._ultimo_evento) > self.tempo_ocioso:
+                self.inicio_ocioso = datetime.datetime.now()
+                self.ocioso_ativo = True
+            elif self.ocioso_ativo and (agora - self._ultimo_evento) <= self.tempo_ocioso:
+                fim_ocioso = datetime.datetime.now()
+                duracao = (fim_ocioso - self.inicio_ocioso).total_seconds()
+                self.callback_on_evento_ocioso(self.inicio_ocioso, fim_ocioso, int(duracao))
+                self.escritor.enfileirar(self.inicio_ocioso, fim_ocioso, int(duracao), 'bench', 'bench')
+                self.ocioso_ativo = False
+            time.sleep(1)
+        self.cpu = time.thread_time() - inicio
+
+    def on_input_event(self, *args, **kwargs):
+        self._ultimo_evento = time.time()
+
+    def stop(self):
+        self._stop_event.set()
+
+def executar(classe, ciclos, tempo_ocioso, pausa, rajada=0.3, intervalo=0.01):
+    """
+    Alterna rajadas de atividade com pausas maiores que o limite e devolve as
+    latências (em segundos) entre o esperado e o registrado pelo monitor.
+    """
+    db = BancoFalso()
+    escritor = EscritorOciosidade(fabrica_db=lambda: db, intervalo_flush=0)
+    escritor.start()
+    monitor = classe(tempo_ocioso, lambda *a: None, escritor=escritor)
+    monitor.daemon = True
+    monitor.start()
+    comeco = time.monotonic()
+    esperados = []
+    for _ in range(ciclos):
+        fim_rajada = time.monotonic() + rajada
+        while time.monotonic() < fim_rajada:
+            monitor.on_input_event(1, 1)
+            time.sleep(intervalo)
+        ultimo = datetime.datetime.now()
+        monitor.on_input_event(1, 1)
+        time.sleep(pausa)
+        retomada = datetime.datetime.now()
+        monitor.on_input_event(1, 1)
+        esperados.append((ultimo + datetime.timedelta(seconds=tempo_ocioso), retomada))
+    # Dá tempo para o laço de polling fechar o último período
+    time.sleep(1.2)
+    monitor.stop()
+    monitor.join()
+    escritor.parar()
+    segundos = time.monotonic() - comeco
+
+    lat_inicio = [abs((reg[0] - esp[0]).total_seconds()) for reg, esp in zip(db.registros, esperados)]
+    lat_fim = [abs((reg[1] - esp[1]).total_seconds()) for reg, esp in zip(db.registros, esperados)]
+    return {
+        'motor': classe.__name__,
+        'periodos_esperados': len(esperados),
+        'periodos_registrados': len(db.registros),
+        'segundos': round(segundos, 1),
+        'cpu_thread_ms': round(monitor.cpu * 1000, 3),
+        'latencia_inicio_media_ms': round(statistics.mean(lat_inicio) * 1000, 2) if lat_inicio else None,
+        'latencia_inicio_max_ms': round(max(lat_inicio) * 1000, 2) if lat_inicio else None,
+        'latencia_fim_media_ms': round(statistics.mean(lat_fim) * 1000, 2) if lat_fim else None,
+        'latencia_fim_max_ms': round(max(lat_fim) * 1000, 2) if lat_fim else None,
+    }
+
+def medir_reconfiguracao(tempo_ocioso, chamadas=10000):
+    db = BancoFalso()
+    escritor = EscritorOciosidade(fabrica_db=lambda: db, intervalo_flush=0)
+    escritor.start()
+    monitor = MonitorPorPrazo(tempo_ocioso, lambda *a: None, escritor=escritor)
+    monitor.daemon = True
+    monitor.start()
+
+    # Durante um período ocioso: troca o limite várias vezes e fecha o período
+    ultimo = datetime.datetime.now()
+    monitor.on_input_event()
+    time.sleep(tempo_ocioso + 0.3)
+    inicio = time.perf_counter()
+    for i in range(chamadas):
+        monitor.reconfigurar(tempo_ocioso=tempo_ocioso * (2 + i % 2))
+    custo = (time.perf_counter() - inicio) / chamadas
+    monitor.on_input_event()
+    time.sleep(0.1)
+
+    # Em atividade: reduz o limite; a ociosidade começa no novo prazo
+    monitor.reconfigurar(tempo_ocioso=tempo_ocioso * 3)
+    monitor.on_input_event()
+    segundo = datetime.datetime.now()
+    time.sleep(tempo_ocioso / 2)
+    monitor.reconfigurar(tempo_ocioso=tempo_ocioso)
+    time.sleep(tempo_ocioso)
+    monitor.on_input_event()
+    time.sleep(0.1)
+    monitor.stop()
+    monitor.join()
+    escritor.parar()
+
+    esperados = [ultimo + datetime.timedelta(seconds=tempo_ocioso), segundo + datetime.timedelta(seconds=tempo_ocioso)]
+    erros = [abs((r[0] - e).total_seconds()) for r, e in zip(db.registros, esperados)]
+    return {
+        'reconfigurar_us': round(custo * 1e6, 3),
+        'periodos_registrados': len(db.registros),
+        # O primeiro período começou com o limite antigo e foi fechado depois das trocas
+        'periodo_aberto_preservado': bool(erros) and erros[0] < 0.05,
+        'erro_inicio_ms': [round(erro * 1000, 2) for erro in erros],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ciclos', type=int, default=5)
+    parser.add_argument('--tempo-ocioso', type=float, default=1.0)
+    parser.add_argument('--pausa', type=float, default=3.0, help='duração de cada pausa (s)')
+    parser.add_argument('--ciclos-longos', type=int, default=2, help='pausas do cenário ocioso_longo (0 desliga)')
+    parser.add_argument('--pausa-longa', type=float, default=20.0)
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    cenarios = [('curto', args.ciclos, args.pausa)]
+    if args.ciclos_longos:
+        cenarios.append(('ocioso_longo', args.ciclos_longos, args.pausa_longa))
+    resultados = []
+    razoes = {}
+    for cenario, ciclos, pausa in cenarios:
+        polling, prazo = [{'cenario': cenario, **executar(classe, ciclos, args.tempo_ocioso, pausa)}
+                          for classe in (MonitorPolling, MonitorPorPrazo)]
+        resultados += [polling, prazo]
+        razoes[cenario] = round(prazo['cpu_thread_ms'] / polling['cpu_thread_ms'], 2) if polling['cpu_thread_ms'] else None
+    resultados.append({'motor': 'comparacao', 'cpu_prazo_sobre_polling': razoes,
+                       'nota': 'polling: um despertar por segundo; prazo: ~3 por ciclo de atividade e pausa. '
+                               'Pausas curtas empatam ou favorecem o polling, longas o prazo.'})
+    resultados.append({'motor': 'reconfiguracao', **medir_reconfiguracao(args.tempo_ocioso)})
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        for r in resultados:
+            print(', '.join(f"{k}={v}" for k, v in r.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Custo por chamada dos callbacks de entrada no thread do listener.
+
+Compara o callback genérico on_input_event(*args, **kwargs) com o caminho
+rápido de movimento do mouse (_on_movimento), que agrupa rajadas por janela.
+
+Uso (na raiz do projeto):
+python -m benchmarks.entrada --chamadas 1000000 --json
+"""
+
+import argparse
+import json
+import time
+
+from monitoramento import OciosidadeMonitor
+
+def medir(funcao, chamadas):
+    inicio = time.perf_counter()
+    cpu = time.thread_time()
+    for i in range(chamadas):
+        funcao(i, i)
+    cpu = time.thread_time() - cpu
+    return {
+        'ns_por_chamada': round((time.perf_counter() - inicio) / chamadas * 1e9, 1),
+        'cpu_s': round(cpu, 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chamadas', type=int, default=1_000_000)
+    parser.add_argument('--janela', type=float, default=0.25, help='janela de agrupamento (s)')
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    monitor = OciosidadeMonitor(60, lambda *a: None, janela_movimento=args.janela)
+    resultados = {
+        'on_input_event': medir(monitor.on_input_event, args.chamadas),
+        '_on_movimento': medir(monitor._on_movimento, args.chamadas),
+        'contagem_eventos': monitor.contagem_eventos(),
+    }
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        for nome, r in resultados.items():
+            print(f"{nome}: {r}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Vazão e perda do EscritorOciosidade contra um banco SQLite local.
+
+- vazao: custo de enfileirar por evento (o que o monitor paga) e tempo até todos
+  os eventos estarem gravados, comparado com um INSERT em autocommit por evento.
+- perda: derruba o banco no meio da carga, confere que os eventos vão para o
+  spool e que, com o banco de volta, todos chegam à tabela e o spool é removido.
+  O escritor só é parado depois de reconectar e esvaziar o spool, para que o
+  resultado não dependa de em que ponto da espera de reconexão ele estava.
+
+Sai com código 1 se algum evento se perdeu ou foi gravado em dobro, ou se o
+spool não foi esvaziado, para que a medida sirva também de verificação.
+
+Uso (na raiz do projeto):
+python -m benchmarks.escrita --eventos 20000 --json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+from banco import abrir_banco
+from benchmarks.apoio import BancoInstavel
+from escritor import EscritorOciosidade
+
+def gerar_eventos(quantidade):
+    base = datetime.datetime(2024, 1, 1, 8, 0, 0)
+    for i in range(quantidade):
+        inicio = base + datetime.timedelta(minutes=10 * i)
+        yield (inicio, inicio + datetime.timedelta(seconds=120), 120, 'bench', f'host{i % 50}')
+
+def medir_vazao(quantidade, pasta):
+    direto = abrir_banco('sqlite:///' + os.path.join(pasta, 'direto.db'))
+    inicio = time.perf_counter()
+    for evento in gerar_eventos(quantidade):
+        direto.inserir_ociosidade(*evento)
+    tempo_direto = time.perf_counter() - inicio
+    direto.fechar()
+
+    db = BancoInstavel(abrir_banco('sqlite:///' + os.path.join(pasta, 'lote.db')))
+    escritor = EscritorOciosidade(fabrica_db=lambda: db, caminho_spool=os.path.join(pasta, 'vazao.jsonl'),
+                                  tamanho_lote=500, intervalo_flush=0.05)
+    escritor.start()
+    inicio = time.perf_counter()
+    for evento in gerar_eventos(quantidade):
+        escritor.enfileirar(*evento)
+    tempo_enfileirar = time.perf_counter() - inicio
+    escritor.parar()
+    tempo_lote = time.perf_counter() - inicio
+    gravados = db.contar()
+    db.db.fechar()
+    return {
+        'eventos': quantidade,
+        'insert_por_evento_eventos_s': round(quantidade / tempo_direto),
+        'lote_eventos_s': round(quantidade / tempo_lote),
+        'enfileirar_us_por_evento': round(tempo_enfileirar / quantidade * 1e6, 2),
+        'lotes': db.lotes,
+        'gravados': gravados,
+    }
+
+def medir_perda(quantidade, pasta):
+    db = BancoInstavel(abrir_banco('sqlite:///' + os.path.join(pasta, 'perda.db')))
+    caminho_spool = os.path.join(pasta, 'perda.jsonl')
+    escritor = EscritorOciosidade(fabrica_db=lambda: db, caminho_spool=caminho_spool,
+                                  tamanho_lote=100, intervalo_flush=0.01, intervalo_reconexao=0.1)
+    escritor.start()
+    eventos = list(gerar_eventos(quantidade))
+    terco = quantidade // 3
+    for evento in eventos[:terco]:
+        escritor.enfileirar(*evento)
+    time.sleep(0.2)
+    db.fora_do_ar = True
+    for evento in eventos[terco:2 * terco]:
+        escritor.enfileirar(*evento)
+    time.sleep(0.3)
+    spool_durante_queda = os.path.exists(caminho_spool)
+    db.fora_do_ar = False
+    for evento in eventos[2 * terco:]:
+        escritor.enfileirar(*evento)
+    # Espera a reconexão (e o reenvio do spool) antes de parar
+    limite = time.monotonic() + 10
+    while (os.path.exists(caminho_spool) or escritor.pendentes()) and time.monotonic() < limite:
+        time.sleep(0.01)
+    reconectou = not os.path.exists(caminho_spool)
+    escritor.parar()
+    gravados = db.contar()
+    db.db.fechar()
+    return {
+        'eventos': quantidade,
+        'gravados': gravados,
+        'perdidos': quantidade - gravados,
+        'spool_durante_queda': spool_durante_queda,
+        'reconectou_antes_de_parar': reconectou,
+        'spool_restante': os.path.exists(caminho_spool),
+        'falhas': escritor.falhas,
+    }
+
+def verificar(resultados):
+    # Problemas de correção (não de desempenho) encontrados na medida
+    falhas = []
+    vazao, perda = resultados['vazao'], resultados['perda']
+    if vazao['gravados'] != vazao['eventos']:
+        falhas.append(f"vazao: {vazao['gravados']} gravados de {vazao['eventos']} eventos")
+    if perda['perdidos']:
+        falhas.append(f"perda: {perda['gravados']} gravados de {perda['eventos']} eventos")
+    if perda['spool_restante']:
+        falhas.append("perda: o spool não foi esvaziado")
+    return falhas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--eventos', type=int, default=20000)
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        resultados = {
+            'vazao': medir_vazao(args.eventos, pasta),
+            'perda': medir_perda(min(args.eventos, 3000), pasta),
+        }
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        for nome, r in resultados.items():
+            print(f"{nome}: {r}")
+    falhas = verificar(resultados)
+    for falha in falhas:
+        print(f"FALHA {falha}", file=sys.stderr)
+    sys.exit(1 if falhas else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Tempo de import e memória (RSS) na partida do dashboard e do agente.
+
+Cada alvo é importado em um processo Python novo (partida a frio do interpretador,
+com o cache de bytecode já gerado). Para cada um: tempo do import, RSS logo depois
+e quais dependências pesadas acabaram carregadas. O dashboard não deve carregar
+matplotlib, openpyxl, NumPy nem pandas antes do primeiro gráfico/exportação; o
+alvo graficos (matplotlib com o backend Tk) mostra quanto isso custaria. Com
+--orcamento-ms/--orcamento-mb o comando termina com código 1 se algum alvo
+estourar o orçamento.
+
+Uso (na raiz do projeto):
+python -m benchmarks.inicializacao --repeticoes 5 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ALVOS = ('agente', 'monitor', 'copia02')
+REFERENCIAS = ('graficos',)
+PESADOS = ('tkinter', 'matplotlib', 'openpyxl', 'numpy', 'pandas', 'pyarrow')
+
+# Executado no processo filho; imprime uma linha JSON
+_FILHO = r"""
+import json, sys, time
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+antes = rss_mb()
+inicio = time.perf_counter()
+erro = None
+try:
+    __import__(sys.argv[1])
+except Exception as e:
+    erro = f"{type(e).__name__}: {e}"
+ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({'ms': ms, 'rss_mb': rss_mb(), 'rss_base_mb': antes, 'erro': erro,
+                  'pesados': [m for m in json.loads(sys.argv[2]) if m in sys.modules]}))
+"""
+
+def medir_alvo(alvo, repeticoes):
+    amostras = []
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-c', _FILHO, alvo, json.dumps(PESADOS)],
+                               cwd=raiz, capture_output=True, text=True, check=True).stdout
+        amostras.append(json.loads(saida.strip().splitlines()[-1]))
+    ultima = amostras[-1]
+    rss = [a['rss_mb'] for a in amostras if a['rss_mb'] is not None]
+    return {
+        'import_ms': round(statistics.median(a['ms'] for a in amostras), 1),
+        'rss_mb': round(statistics.median(rss), 1) if rss else None,
+        'rss_acima_do_interpretador_mb': (round(statistics.median(rss) - ultima['rss_base_mb'], 1)
+                                          if rss and ultima['rss_base_mb'] is not None else None),
+        'pesados_carregados': ultima['pesados'],
+        'erro': ultima['erro'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--orcamento-ms', type=float, help='tempo máximo de import de cada alvo')
+    parser.add_argument('--orcamento-mb', type=float, help='RSS máximo depois do import de cada alvo')
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    resultados = {alvo: medir_alvo(alvo, args.repeticoes) for alvo in ALVOS + REFERENCIAS}
+    estouros = []
+    for alvo in ALVOS:
+        r = resultados[alvo]
+        if args.orcamento_ms is not None and r['import_ms'] > args.orcamento_ms:
+            estouros.append(f"{alvo}: import {r['import_ms']} ms > {args.orcamento_ms} ms")
+        if args.orcamento_mb is not None and r['rss_mb'] is not None and r['rss_mb'] > args.orcamento_mb:
+            estouros.append(f"{alvo}: RSS {r['rss_mb']} MB > {args.orcamento_mb} MB")
+        # Dependência pesada carregada na partida é regressão, com ou sem orçamento
+        carregados = [m for m in r['pesados_carregados'] if m != 'tkinter']
+        if carregados:
+            estouros.append(f"{alvo}: carrega {', '.join(carregados)} na partida")
+    if args.json:
+        print(json.dumps({'resultados': resultados, 'estouros': estouros}, indent=2))
+    else:
+        for alvo, r in resultados.items():
+            print(f"{alvo}: {r}")
+        for estouro in estouros:
+            print(f"ESTOURO {estouro}")
+    sys.exit(1 if estouros else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Repartição de períodos ociosos por hora: motor NumPy x Python puro x pandas.
+
+- correcao: o motor vetorizado, o laço em Python (resumo.acumular_registros) e o
+  groupby do pandas chegam aos mesmos totais, e o total repartido é igual à soma
+  das durações.
+- desempenho: períodos por segundo em cada método. Com o pandas há dois pontos de
+  comparação: o groupby pela hora de início (o que os gráficos faziam antes, com a
+  atribuição errada) e a mesma repartição por hora feita em pandas (cada período
+  repetido uma vez por hora coberta, depois groupby). Sem o pandas, 'pandas'
+  aparece como 'ausente'.
+- erro_hora_inicio: fração do tempo ocioso que cai na hora errada quando tudo é
+  atribuído à hora de início.
+
+Uso (na raiz do projeto):
+python -m benchmarks.intervalos --periodos 200000 --json
+"""
+
+import argparse
+import datetime
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from intervalos import HORA, para_epoca, somar_por_balde
+from resumo import acumular_registros
+
+def gerar_periodos(quantidade, semente=42):
+    aleatorio = random.Random(semente)
+    base = datetime.datetime(2024, 1, 1)
+    periodos = []
+    for _ in range(quantidade):
+        inicio = base + datetime.timedelta(seconds=aleatorio.randrange(86400 * 90))
+        # Maioria curta, alguns longos (almoço, fim do expediente)
+        duracao = aleatorio.choice((60, 300, 900, 1800, 3600, 5400, 14400, 50000))
+        fim = inicio + datetime.timedelta(seconds=duracao)
+        periodos.append((inicio, fim, duracao, f'u{aleatorio.randrange(20)}', f'h{aleatorio.randrange(5)}'))
+    return periodos
+
+def _cronometrar(funcao, quantidade):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, round(quantidade / (time.perf_counter() - inicio))
+
+def medir(quantidade):
+    periodos = gerar_periodos(quantidade)
+    inicios = para_epoca([p[0] for p in periodos])
+    fins = para_epoca([p[1] for p in periodos])
+
+    python, python_s = _cronometrar(lambda: acumular_registros({}, periodos), quantidade)
+    (baldes, somas), numpy_s = _cronometrar(lambda: somar_por_balde(inicios, fins, HORA), quantidade)
+
+    por_hora_python = {}
+    for (dia, hora, _, _), (segundos, _) in python.items():
+        chave = datetime.datetime.combine(dia, datetime.time(hora))
+        por_hora_python[chave] = por_hora_python.get(chave, 0) + segundos
+    por_hora_numpy = {datetime.datetime(1970, 1, 1) + datetime.timedelta(hours=int(b)): int(s)
+                      for b, s in zip(baldes, somas)}
+
+    # Atribuição antiga: duração inteira na hora de início
+    inicio_hora = np.bincount(np.unique(inicios // HORA, return_inverse=True)[1],
+                              weights=fins - inicios).astype(np.int64)
+    baldes_inicio = np.unique(inicios // HORA)
+    antigo = dict(zip(baldes_inicio.tolist(), inicio_hora.tolist()))
+    novo = dict(zip(baldes.tolist(), somas.tolist()))
+    diferenca = sum(abs(novo.get(b, 0) - antigo.get(b, 0)) for b in set(novo) | set(antigo)) / 2
+
+    resultado = {
+        'periodos': quantidade,
+        'correcao': {
+            'python_igual_numpy': por_hora_python == por_hora_numpy,
+            'total_preservado': int(somas.sum()) == sum(p[2] for p in periodos),
+        },
+        'desempenho': {
+            'python_periodos_s': python_s,
+            'numpy_periodos_s': numpy_s,
+        },
+        'erro_hora_inicio': round(diferenca / int(somas.sum()), 4),
+    }
+    try:
+        import pandas as pd
+    except ImportError:
+        resultado['pandas'] = 'ausente'
+        return resultado
+    resultado['pandas'] = pd.__version__
+    df = pd.DataFrame(periodos, columns=['inicio', 'fim', 'duracao', 'usuario', 'host'])
+    _, resultado['desempenho']['pandas_hora_inicio_periodos_s'] = _cronometrar(
+        lambda: df.groupby(df['inicio'].dt.floor('h'))['duracao'].sum(), quantidade)
+    pandas, resultado['desempenho']['pandas_repartido_periodos_s'] = _cronometrar(
+        lambda: _repartir_pandas(pd, df), quantidade)
+    resultado['correcao']['pandas_igual_numpy'] = {
+        (chave - datetime.datetime(1970, 1, 1)) // datetime.timedelta(hours=1): int(segundos)
+        for chave, segundos in pandas.items()} == novo
+    return resultado
+
+def _repartir_pandas(pd, df):
+    # A repartição por hora em pandas: uma linha por (período, hora coberta), cortada
+    # nos limites da hora, e groupby pela hora
+    hora = pd.Timedelta(hours=1)
+    primeira = df['inicio'].dt.floor('h')
+    # O fim é exclusivo: um período que termina na virada da hora não entra na seguinte
+    horas = ((df['fim'] - pd.Timedelta(seconds=1)).dt.floor('h') - primeira) // hora + 1
+    repetidas = df.loc[df.index.repeat(horas), ['inicio', 'fim']]
+    balde = primeira.loc[repetidas.index] + repetidas.groupby(level=0).cumcount().to_numpy() * hora
+    segundos = ((repetidas['fim'].where(repetidas['fim'] < balde + hora, balde + hora)
+                 - repetidas['inicio'].where(repetidas['inicio'] > balde, balde)).dt.total_seconds())
+    return segundos.groupby(balde.to_numpy()).sum()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--periodos', type=int, default=200000)
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    resultado = medir(args.periodos)
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        for nome, valor in resultado.items():
+            print(f"{nome}: {valor}")
+    falhas = [nome for nome, ok in resultado['correcao'].items() if not ok]
+    for falha in falhas:
+        print(f"FALHA correcao: {falha}", file=sys.stderr)
+    sys.exit(1 if falhas else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Comparação de limites de ociosidade: uma passada para todos x uma varredura por limite.
+
+- correcao: analisar() (uma ordenação para todos os limites) chega às mesmas
+  contagens e somas que um laço em Python por limite sobre as lacunas.
+- desempenho: tempo para --limiares limites, com leitura e decodificação dos
+  blocos incluídas, contra uma varredura NumPy por limite e o laço em Python.
+- armazenamento: bytes por lacuna gravada (dados dos blocos).
+
+As lacunas são gravadas no backend em memória, em blocos como os da descarga do
+agente (--por-bloco lacunas por bloco).
+
+Uso (na raiz do projeto):
+python -m benchmarks.limiares --lacunas 500000 --json
+"""
+
+import argparse
+import datetime
+import json
+import random
+import time
+
+import numpy as np
+
+import banco_sqlite
+import limiares
+from atividade import RegistradorLacunas
+from banco import abrir_banco
+
+def gerar_lacunas(quantidade, usuarios=20, semente=42):
+    # Por usuário: pausas curtas frequentes, algumas longas (reuniões, almoço, noite)
+    aleatorio = random.Random(semente)
+    por_usuario = {}
+    base = datetime.datetime(2024, 1, 1)
+    for _ in range(quantidade):
+        usuario = f'u{aleatorio.randrange(usuarios)}'
+        por_usuario.setdefault(usuario, []).append(
+            (base + datetime.timedelta(seconds=aleatorio.randrange(86400 * 90)),
+             round(aleatorio.expovariate(1 / 300)) + 60 if aleatorio.random() < 0.95
+             else aleatorio.choice((3600, 14400, 50000))))
+    return {usuario: sorted(lacunas) for usuario, lacunas in por_usuario.items()}
+
+def gravar(db, por_usuario, por_bloco):
+    total_bytes = 0
+    for usuario, lacunas in por_usuario.items():
+        registrador = RegistradorLacunas(usuario, f'h-{usuario}')
+        for i in range(0, len(lacunas), por_bloco):
+            for inicio, duracao in lacunas[i:i + por_bloco]:
+                registrador.registrar(inicio, inicio + datetime.timedelta(seconds=duracao))
+            bloco = registrador.bloco(registrador.retirar())
+            total_bytes += len(bloco[-1])
+            db.inserir_lacunas([bloco])
+    return total_bytes
+
+def por_limiar_python(db, lista):
+    # Referência: uma varredura das lacunas por limite
+    resultado = []
+    for limiar in lista:
+        periodos = segundos = 0
+        for _, _, _, _, dados in db.buscar_lacunas():
+            pares = np.frombuffer(dados, dtype='<u4').reshape(-1, 2)
+            for duracao in pares[:, 1].tolist():
+                if duracao >= limiar:
+                    periodos += 1
+                    segundos += duracao - limiar
+        resultado.append((None, limiar, periodos, segundos))
+    return resultado
+
+def por_limiar_numpy(db, lista):
+    # Uma decodificação e uma máscara por limite
+    resultado = []
+    for limiar in lista:
+        _, duracoes, _, _, _ = limiares.decodificar(db.buscar_lacunas())
+        passou = duracoes[duracoes >= limiar]
+        resultado.append((None, limiar, int(passou.size), int((passou - limiar).sum())))
+    return resultado
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, round((time.perf_counter() - inicio) * 1000, 2)
+
+def medir(args):
+    por_usuario = gerar_lacunas(args.lacunas)
+    db = abrir_banco('memoria:limiares')
+    try:
+        total_bytes = gravar(db, por_usuario, args.por_bloco)
+        lista = sorted({60 * (i + 1) for i in range(args.limiares)})
+        uma, uma_ms = _cronometrar(lambda: limiares.analisar(db, lista))
+        numpy_, numpy_ms = _cronometrar(lambda: por_limiar_numpy(db, lista))
+        python, python_ms = _cronometrar(lambda: por_limiar_python(db, lista))
+        _, usuario_ms = _cronometrar(lambda: limiares.analisar(db, lista, por='usuario'))
+        _, dia_ms = _cronometrar(lambda: limiares.analisar(db, lista, por='dia'))
+    finally:
+        db.fechar()
+        banco_sqlite.descartar_memoria('limiares')
+    return {
+        'lacunas': args.lacunas,
+        'limiares': len(lista),
+        'correcao': {'uma_passada_igual_python': uma == python, 'numpy_igual_python': numpy_ == python},
+        'desempenho_ms': {
+            'uma_passada': uma_ms,
+            'uma_passada_por_usuario': usuario_ms,
+            'uma_passada_por_dia': dia_ms,
+            'numpy_por_limiar': numpy_ms,
+            'python_por_limiar': python_ms,
+        },
+        'bytes_por_lacuna': round(total_bytes / args.lacunas, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lacunas', type=int, default=500000)
+    parser.add_argument('--limiares', type=int, default=30, help='limites de 1 em 1 minuto')
+    parser.add_argument('--por-bloco', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    resultado = medir(args)
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        for chave, valor in resultado.items():
+            print(f"{chave}: {valor}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Relatório por usuário sobre um ano de dados da frota, com 1, 2, 4... processos.
+
+- escalonamento: tempo de gerar_relatorio e aceleração em relação a um processo,
+  para cada quantidade de processos (até --processos, padrão: núcleos da máquina).
+- consistencia: todas as execuções devolvem exatamente o mesmo relatório.
+- erro_quantis: maior erro relativo de p50/p90/p99 do esboço em relação aos
+  quantis exatos (NumPy sobre todas as durações de cada usuário).
+
+Sem --banco, gera --usuarios estações com --dias de períodos sem sobreposição
+(como o monitor grava) em um SQLite temporário. Com --banco URL mede um banco
+existente (use --de/--ate).
+
+Uso (na raiz do projeto):
+python -m benchmarks.relatorios --usuarios 50 --dias 365 --json
+python -m benchmarks.relatorios --banco sqlite:///ociosidade.db --de 2024-01-01 --ate 2024-12-31
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import relatorios
+from banco import abrir_banco
+
+INICIO = datetime.datetime(2024, 1, 1)
+
+def gerar_frota(usuarios, dias, semente=5):
+    # Por estação: atividade e pausas alternadas, algumas pausas longas (almoço, noite)
+    aleatorio = random.Random(semente)
+    fim = INICIO + datetime.timedelta(days=dias)
+    for u in range(usuarios):
+        instante = INICIO
+        while True:
+            instante += datetime.timedelta(seconds=aleatorio.choice((60, 300, 1200, 3600)))
+            if aleatorio.random() < 0.02:
+                duracao = aleatorio.randrange(3600, 16 * 3600)
+            else:
+                duracao = int(aleatorio.expovariate(1 / 600)) + 60
+            if instante >= fim:
+                break
+            yield (instante, instante + datetime.timedelta(seconds=duracao), duracao, f'usuario{u}', f'host{u}')
+            instante += datetime.timedelta(seconds=duracao)
+
+def semear(db, registros, lote=50000):
+    total = 0
+    bloco = []
+    for registro in registros:
+        bloco.append(registro)
+        if len(bloco) >= lote:
+            db.inserir_ociosidade_lote(bloco)
+            total += len(bloco)
+            bloco = []
+    if bloco:
+        db.inserir_ociosidade_lote(bloco)
+        total += len(bloco)
+    return total
+
+def erro_quantis(fabrica, relatorio, dt_inicio, dt_fim):
+    duracoes = {}
+    db = fabrica()
+    try:
+        for bloco in db.iterar_logs(dt_inicio=dt_inicio, inicio_antes_de=dt_fim + datetime.timedelta(seconds=1)):
+            for linha in bloco:
+                duracoes.setdefault(linha[4], []).append(linha[3])
+    finally:
+        db.fechar()
+    erro = 0.0
+    for linha in relatorio:
+        valores = np.array(duracoes[linha['chave']])
+        for q in (50, 90, 99):
+            exato = np.quantile(valores, q / 100, method='lower')
+            if exato:
+                erro = max(erro, abs(linha[f'p{q}_segundos'] / exato - 1))
+    return round(erro, 4)
+
+def medir(fabrica, args, dt_inicio, dt_fim):
+    maximo = args.processos or os.cpu_count() or 1
+    quantidades = sorted({1, maximo} | {2 ** i for i in range(1, maximo.bit_length()) if 2 ** i < maximo})
+    escalonamento = {}
+    relatorios_gerados = []
+    for processos in quantidades:
+        inicio = time.perf_counter()
+        relatorio = relatorios.gerar_relatorio(fabrica, dt_inicio, dt_fim, processos=processos,
+                                               dias_por_particao=args.dias_por_particao)
+        segundos = time.perf_counter() - inicio
+        relatorios_gerados.append(relatorio)
+        escalonamento[processos] = {'segundos': round(segundos, 2)}
+    base = escalonamento[1]['segundos']
+    for valor in escalonamento.values():
+        valor['aceleracao'] = round(base / valor['segundos'], 2) if valor['segundos'] else None
+    return {
+        'nucleos': os.cpu_count(),
+        'periodos': sum(linha['periodos'] for linha in relatorios_gerados[0]),
+        'chaves': len(relatorios_gerados[0]),
+        'escalonamento': escalonamento,
+        'consistencia': all(r == relatorios_gerados[0] for r in relatorios_gerados),
+        'erro_quantis': erro_quantis(fabrica, relatorios_gerados[0], dt_inicio, dt_fim),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--banco', help='URL de um banco já preenchido (não é alterado)')
+    parser.add_argument('--de', default='')
+    parser.add_argument('--ate', default='')
+    parser.add_argument('--processos', type=int, help='máximo de processos (padrão: núcleos)')
+    parser.add_argument('--dias-por-particao', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        if args.banco:
+            fabrica = functools.partial(abrir_banco, args.banco)
+            dt_inicio = datetime.datetime.strptime(args.de, '%Y-%m-%d')
+            dt_fim = datetime.datetime.strptime(args.ate, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            carga = None
+        else:
+            fabrica = functools.partial(abrir_banco, 'sqlite:///' + os.path.join(pasta, 'frota.db'))
+            dt_inicio = INICIO
+            dt_fim = INICIO + datetime.timedelta(days=args.dias) - datetime.timedelta(seconds=1)
+            db = fabrica()
+            inicio = time.perf_counter()
+            try:
+                carga = {'registros': semear(db, gerar_frota(args.usuarios, args.dias)),
+                         'segundos': round(time.perf_counter() - inicio, 1)}
+            finally:
+                db.fechar()
+        resultado = medir(fabrica, args, dt_inicio, dt_fim)
+        resultado['carga'] = carga
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        for chave, valor in resultado.items():
+            print(f"{chave}: {valor}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Suíte de benchmarks do monitor de ociosidade, sem pynput nem MySQL.
+
+Cenários (--cenarios, todos por padrão):
+- entrada: eventos sintéticos de teclado/mouse injetados nos callbacks do monitor
+  a taxas configuráveis; CPU da thread que faz o papel do listener.
+- deteccao: latência de detecção do início e do fim da ociosidade.
+- escrita: vazão de gravação do EscritorOciosidade em SQLite.
+- leitura: com o banco SQLite semeado com --registros linhas (milhões), tempo de
+  atualização da tabela do dashboard (carregar_dados: página inicial, incremental,
+  navegação), dos dados dos gráficos (e do desenho, se houver matplotlib) e da
+  exportação de um mês.
+
+A saída é um JSON com metadados (data, Python, plataforma, commit) para comparar
+execuções: --saida grava o arquivo e --comparar mostra a variação em relação a
+uma execução anterior.
+
+Uso (na raiz do projeto):
+python -m benchmarks.suite --registros 1000000 --saida resultados.json
+python -m benchmarks.suite --cenarios leitura --banco /tmp/semeado.db --comparar resultados.json
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import deteccao, escrita
+from banco import abrir_banco
+from benchmarks.apoio import ArvoreFalsa, EntradaSintetica, gerar_registros, semear
+from exportacao import exportar
+from monitoramento import OciosidadeMonitor
+from tabela import TabelaLogs
+
+CENARIOS = ('entrada', 'deteccao', 'escrita', 'leitura')
+
+def _ms(segundos):
+    return round(segundos * 1000, 2)
+
+def _cronometrar(funcao, repeticoes=5):
+    # Mediana de várias execuções, em ms, e o resultado da última
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return _ms(statistics.median(tempos)), resultado
+
+def cenario_entrada(args, pasta):
+    resultados = {}
+    for taxa in args.taxas:
+        monitor = OciosidadeMonitor(60, lambda *a: None, escritor=object())
+        entrada = EntradaSintetica(monitor, taxa, args.duracao_entrada)
+        entrada.start()
+        entrada.join()
+        resultados[f'{taxa}_eventos_s'] = {
+            'enviados': entrada.enviados,
+            'cpu_listener_pct': round(entrada.cpu / args.duracao_entrada * 100, 2),
+            'us_cpu_por_evento': round(entrada.cpu / max(entrada.enviados, 1) * 1e6, 3),
+        }
+    return resultados
+
+def cenario_deteccao(args, pasta):
+    return deteccao.executar(deteccao.MonitorPorPrazo, args.ciclos, args.tempo_ocioso, args.tempo_ocioso * 2)
+
+def cenario_escrita(args, pasta):
+    return escrita.medir_vazao(args.eventos, pasta)
+
+def _banco_semeado(args, pasta):
+    caminho = args.banco or os.path.join(pasta, 'semeado.db')
+    db = abrir_banco('sqlite:///' + caminho)
+    existentes = db.contar()
+    # Cada execução acrescenta os registros do teste incremental; o arquivo continua valendo
+    if existentes >= args.registros:
+        return db, None
+    if existentes:
+        raise SystemExit(f"{caminho} tem só {existentes} registros; use outro arquivo ou --registros {existentes}")
+    return db, semear(db, args.registros)
+
+def _desenhar(grupo):
+    # Gráfico de barras renderizado em memória (backend Agg), como no dashboard
+    from matplotlib.figure import Figure
+    figura = Figure(figsize=(8, 4))
+    eixo = figura.add_subplot()
+    eixo.bar([str(chave) for chave, _, _ in grupo], [total / 60 for _, total, _ in grupo])
+    figura.tight_layout()
+    figura.savefig(io.BytesIO(), format='png')
+
+def cenario_leitura(args, pasta):
+    db, tempo_semeadura = _banco_semeado(args, pasta)
+    resultados = {'registros': db.contar()}
+    if tempo_semeadura is not None:
+        resultados['semeadura_registros_s'] = round(args.registros / tempo_semeadura)
+
+    arvore = ArvoreFalsa()
+    tabela = TabelaLogs(arvore, db)
+    tabela_ms = {}
+    tabela_ms['recarregar_ms'], _ = _cronometrar(tabela.recarregar)
+    ultimo = db.buscar_logs_por_id(limite=1)[0]
+    novos = list(gerar_registros(50, inicio=ultimo[2], semente=99))
+    db.inserir_ociosidade_lote(novos)
+    inicio = time.perf_counter()
+    tabela.atualizar()
+    tabela_ms['atualizar_incremental_ms'] = _ms(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    for _ in range(args.paginas):
+        tabela.proxima_pagina()
+    tabela_ms['pagina_media_ms'] = _ms((time.perf_counter() - inicio) / args.paginas)
+    resultados['tabela'] = tabela_ms
+
+    # Um mês no meio do histórico, como filtro típico de gráfico/exportação
+    primeiro = db.buscar_pagina_logs(limite=1, decrescente=False)[0][0]
+    de = primeiro[1].replace(day=1, hour=0, minute=0, second=0) + datetime.timedelta(days=32)
+    de = de.replace(day=1)
+    ate = (de + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(seconds=1)
+    filtros = {'dt_inicio': de, 'dt_fim': ate}
+    graficos = {}
+    for por in ('dia', 'hora'):
+        graficos[f'dados_{por}_tudo_ms'], _ = _cronometrar(lambda: db.agregar_resumo(por))
+        graficos[f'dados_{por}_mes_ms'], grupo = _cronometrar(lambda: db.agregar_resumo(por, **filtros))
+        try:
+            graficos[f'desenho_{por}_ms'], _ = _cronometrar(lambda: _desenhar(grupo), 3)
+        except ImportError:
+            graficos[f'desenho_{por}_ms'] = None
+    resultados['graficos'] = graficos
+
+    exportacoes = {}
+    for extensao in args.formatos:
+        caminho = os.path.join(pasta, 'exportacao' + extensao)
+        inicio = time.perf_counter()
+        try:
+            linhas = exportar(db, caminho, filtros)
+        except ImportError as e:
+            exportacoes[extensao] = {'erro': str(e)}
+            continue
+        tempo = time.perf_counter() - inicio
+        exportacoes[extensao] = {'linhas': linhas, 'tempo_ms': _ms(tempo),
+                                 'linhas_s': round(linhas / tempo) if tempo else None}
+    resultados['exportacao'] = exportacoes
+    return resultados
+
+def _metadados(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'commit': commit or None,
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('saida', 'comparar', 'json')},
+    }
+
+def _folhas(valor, prefixo=''):
+    # {'a': {'b': 1}} -> {'a.b': 1}, só valores numéricos
+    if isinstance(valor, dict):
+        for chave, filho in valor.items():
+            yield from _folhas(filho, f"{prefixo}.{chave}" if prefixo else chave)
+    elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        yield prefixo, valor
+
+def comparar(anterior, atual):
+    """
+    Variação percentual de cada métrica numérica presente nas duas execuções.
+    """
+    antes = dict(_folhas(anterior['resultados']))
+    return {nome: round((valor - antes[nome]) / antes[nome] * 100, 1)
+            for nome, valor in _folhas(atual['resultados']) if antes.get(nome)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS))
+    parser.add_argument('--taxas', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='eventos de entrada por segundo')
+    parser.add_argument('--duracao-entrada', type=float, default=2.0)
+    parser.add_argument('--ciclos', type=int, default=3)
+    parser.add_argument('--tempo-ocioso', type=float, default=0.5)
+    parser.add_argument('--eventos', type=int, default=20000, help='eventos do cenário de escrita')
+    parser.add_argument('--registros', type=int, default=1_000_000, help='linhas semeadas no cenário de leitura')
+    parser.add_argument('--banco', help='arquivo SQLite semeado, reaproveitado entre execuções')
+    parser.add_argument('--paginas', type=int, default=20)
+    parser.add_argument('--formatos', nargs='+', default=['.csv', '.xlsx'])
+    parser.add_argument('--saida', help='grava o resultado em JSON neste arquivo')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    parser.add_argument('--json', action='store_true', help='saída legível por máquina')
+    args = parser.parse_args()
+
+    execucao = {'meta': _metadados(args), 'resultados': {}}
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in args.cenarios:
+            execucao['resultados'][nome] = globals()[f'cenario_{nome}'](args, pasta)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            execucao['variacao_pct'] = comparar(json.load(f), execucao)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(execucao, f, indent=2, default=str)
+    if args.json:
+        print(json.dumps(execucao, indent=2, default=str))
+    else:
+        for nome, resultado in execucao['resultados'].items():
+            print(f"{nome}: {json.dumps(resultado, default=str)}")
+        for nome, variacao in execucao.get('variacao_pct', {}).items():
+            print(f"  {nome}: {variacao:+.1f}%")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Cache colunar, em memória, do ociosidade_log para as leituras do dashboard.
+
+Os registros ficam em arrays NumPy, um por coluna, em ordem de (início, id):
+início e fim em segundos desde a época (int64, relógio de parede como
+intervalos.para_epoca), duração em int32 e usuário/host como códigos int32 de
+tabelas de nomes internados. São ~36 bytes por registro, contra algumas centenas
+de uma tupla com dois datetime e duas str.
+
+A carga inicial busca os registros mais recentes por data até o limite de memória;
+depois atualizar() só traz os registros com id acima do maior id já visto. Acima do
+limite, os registros mais antigos (por início) são descartados. O cache então cobre
+tudo com início depois de `corte`; leituras que precisam de algo anterior (ou
+chegam antes da primeira carga) vão direto ao banco.
+
+CacheOciosidade tem as mesmas leituras do DBHelper usadas pela tabela, pelos
+gráficos e pela exportação, e pode ser passado no lugar dele.
+"""
+
+import threading
+
+import numpy as np
+
+from intervalos import DIA, HORA, para_epoca, repartir
+
+# Bytes por registro nas seis colunas
+BYTES_POR_REGISTRO = 8 + 8 + 8 + 4 + 4 + 4
+
+class Nomes:
+    """
+    Tabela de internação: cada nome distinto recebe um código inteiro fixo.
+    """
+    def __init__(self):
+        self.codigos = {}
+        self.nomes = []
+
+    def codigo(self, nome):
+        codigo = self.codigos.get(nome)
+        if codigo is None:
+            codigo = self.codigos[nome] = len(self.nomes)
+            self.nomes.append(nome)
+        return codigo
+
+class Colunas:
+    """
+    Retrato imutável do cache: as colunas em ordem de (início, id) e o que elas cobrem.
+    corte: todo registro com início > corte está presente (None = histórico completo).
+    id_completo: todo registro com id > id_completo está presente.
+    """
+    __slots__ = ('ids', 'inicios', 'fins', 'duracoes', 'usuarios', 'hosts', 'corte', 'id_completo')
+
+    def __init__(self, ids, inicios, fins, duracoes, usuarios, hosts, corte, id_completo):
+        self.ids = ids
+        self.inicios = inicios
+        self.fins = fins
+        self.duracoes = duracoes
+        self.usuarios = usuarios
+        self.hosts = hosts
+        self.corte = corte
+        self.id_completo = id_completo
+
+    def __len__(self):
+        return self.ids.size
+
+    @property
+    def bytes(self):
+        return sum(getattr(self, nome).nbytes for nome in self.__slots__[:6])
+
+def _vazias():
+    return (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64),
+            np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.int32))
+
+def _epoca(data):
+    return int(para_epoca([data])[0])
+
+class CacheOciosidade:
+    """
+    Leituras do ociosidade_log servidas da memória, com atualização incremental por id.
+    """
+    def __init__(self, db, limite_mb=64, tamanho_bloco=20000):
+        self.db = db
+        self.limite_registros = int(limite_mb * 2**20) // BYTES_POR_REGISTRO
+        self.tamanho_bloco = tamanho_bloco
+        self.usuarios = Nomes()
+        self.hosts = Nomes()
+        self.maior_id = 0
+        # Substituído inteiro a cada atualização: leitores pegam um retrato e não precisam de lock
+        self.colunas = None
+        self._lock = threading.Lock()
+
+    def _converter(self, rows):
+        ids = np.fromiter((r[0] for r in rows), np.int64, len(rows))
+        inicios = para_epoca([r[1] for r in rows])
+        fins = para_epoca([r[2] for r in rows])
+        duracoes = np.fromiter((r[3] or 0 for r in rows), np.int32, len(rows))
+        usuarios = np.fromiter((self.usuarios.codigo(r[4]) for r in rows), np.int32, len(rows))
+        hosts = np.fromiter((self.hosts.codigo(r[5]) for r in rows), np.int32, len(rows))
+        return ids, inicios, fins, duracoes, usuarios, hosts
+
+    def _carregar(self):
+        # Mais recentes primeiro, em páginas por (início, id), até o limite de memória
+        blocos = []
+        total = 0
+        apos = None
+        while total < self.limite_registros:
+            rows, apos = self.db.buscar_pagina_logs(apos, min(self.tamanho_bloco, self.limite_registros - total))
+            if rows:
+                blocos.append(self._converter(rows))
+                total += len(rows)
+            if apos is None:
+                break
+        if blocos:
+            # Páginas e linhas vieram do mais novo para o mais antigo
+            colunas = [np.concatenate([parte[::-1] for parte in partes[::-1]]) for partes in zip(*blocos)]
+        else:
+            colunas = list(_vazias())
+        self.maior_id = int(colunas[0].max()) if total else 0
+        corte = int(colunas[1][0]) if apos is not None else None
+        return Colunas(*colunas, corte, self.maior_id if corte is not None else 0)
+
+    def _buscar_novos(self):
+        # Registros com id acima do maior já visto, em blocos decrescentes de id
+        rows = []
+        antes = None
+        while True:
+            bloco = self.db.buscar_logs_por_id(depois_de_id=self.maior_id, antes_de_id=antes,
+                                               limite=self.tamanho_bloco)
+            rows.extend(bloco)
+            if len(bloco) < self.tamanho_bloco:
+                return rows
+            antes = bloco[-1][0]
+
+    def atualizar(self, esperar=True):
+        """
+        Primeira chamada: carga inicial. Depois, acrescenta os registros novos e descarta
+        os mais antigos se passar do limite. Devolve quantos registros entraram. Com
+        esperar=False, não faz nada (devolve 0) se outra atualização estiver em andamento.
+        """
+        if not self._lock.acquire(esperar):
+            return 0
+        try:
+            if self.colunas is None:
+                self.colunas = self._carregar()
+                return len(self.colunas)
+            rows = self._buscar_novos()
+            if not rows:
+                return 0
+            atual = self.colunas
+            novas = self._converter(rows)
+            ordem = np.lexsort((novas[0], novas[1]))
+            novas = [coluna[ordem] for coluna in novas]
+            self.maior_id = max(self.maior_id, int(novas[0].max()))
+            colunas = [np.concatenate((velha, nova)) for velha, nova in zip(
+                (atual.ids, atual.inicios, atual.fins, atual.duracoes, atual.usuarios, atual.hosts), novas)]
+            # Quase sempre os novos começam depois de todos os do cache; só reordena tudo se não
+            if len(atual) and novas[1][0] < atual.inicios[-1]:
+                ordem = np.lexsort((colunas[0], colunas[1]))
+                colunas = [coluna[ordem] for coluna in colunas]
+            corte, id_completo = atual.corte, atual.id_completo
+            excesso = len(colunas[0]) - self.limite_registros
+            if excesso > 0:
+                # Descarta de uma vez um quarto do limite a mais, para não repetir a cada registro novo
+                excesso = min(len(colunas[0]), excesso + self.limite_registros // 4)
+                corte = max(corte or -2**62, int(colunas[1][excesso - 1]))
+                id_completo = max(id_completo, int(colunas[0][:excesso].max()))
+                colunas = [coluna[excesso:].copy() for coluna in colunas]
+            self.colunas = Colunas(*colunas, corte, id_completo)
+            return len(rows)
+        finally:
+            self._lock.release()
+
+    def memoria(self):
+        # Bytes das colunas (os nomes internados são desprezíveis)
+        colunas = self.colunas
+        return colunas.bytes if colunas is not None else 0
+
+    def _linhas(self, colunas, indices):
+        inicios = colunas.inicios[indices].astype('datetime64[s]').tolist()
+        fins = colunas.fins[indices].astype('datetime64[s]').tolist()
+        usuarios, hosts = self.usuarios.nomes, self.hosts.nomes
+        return [(id_, inicio, fim, duracao, usuarios[u], hosts[h]) for id_, inicio, fim, duracao, u, h in zip(
+            colunas.ids[indices].tolist(), inicios, fins, colunas.duracoes[indices].tolist(),
+            colunas.usuarios[indices].tolist(), colunas.hosts[indices].tolist())]
+
+    def _selecionar(self, colunas, dt_inicio=None, dt_fim=None, usuario=None, host=None, duracao_minima=None,
+                    inicio_antes_de=None, apos=None, decrescente=True, limite=None):
+        """
+        Índices, em ordem crescente de (início, id), dos registros que atendem aos filtros
+        do DBHelper. Com `limite`, só os `limite` primeiros na ordem da página, procurados
+        em janelas crescentes a partir da chave em vez de filtrar o cache inteiro.
+        """
+        inicios = colunas.inicios
+        baixo, alto = 0, len(colunas)
+        if dt_inicio:
+            baixo = int(np.searchsorted(inicios, _epoca(dt_inicio), 'left'))
+        if dt_fim:
+            alto = int(np.searchsorted(inicios, _epoca(dt_fim), 'right'))
+        if inicio_antes_de:
+            alto = min(alto, int(np.searchsorted(inicios, _epoca(inicio_antes_de), 'left')))
+        if apos is not None:
+            inicio_apos = _epoca(apos[0])
+            if decrescente:
+                alto = min(alto, int(np.searchsorted(inicios, inicio_apos, 'right')))
+            else:
+                baixo = max(baixo, int(np.searchsorted(inicios, inicio_apos, 'left')))
+        condicoes = []
+        if dt_fim:
+            condicoes.append((colunas.fins, np.less_equal, _epoca(dt_fim)))
+        for nome, nomes, coluna in ((usuario, self.usuarios, colunas.usuarios), (host, self.hosts, colunas.hosts)):
+            if nome:
+                codigo = nomes.codigos.get(nome)
+                if codigo is None:
+                    return np.empty(0, np.int64)
+                condicoes.append((coluna, np.equal, codigo))
+        if duracao_minima:
+            condicoes.append((colunas.duracoes, np.greater_equal, duracao_minima))
+
+        def filtrar(de, ate):
+            fatia = slice(de, ate)
+            manter = np.ones(ate - de, bool)
+            for coluna, comparar, valor in condicoes:
+                manter &= comparar(coluna[fatia], valor)
+            if apos is not None:
+                # Mesmo início da chave: desempata pelo id
+                ids = colunas.ids[fatia]
+                manter &= (inicios[fatia] != inicio_apos) | ((ids < apos[1]) if decrescente else (ids > apos[1]))
+            return np.flatnonzero(manter) + de
+
+        if baixo >= alto:
+            return np.empty(0, np.int64)
+        if limite is None:
+            return filtrar(baixo, alto)
+        partes = []
+        encontrados = 0
+        janela = max(limite * 2, 1024)
+        while baixo < alto and encontrados < limite:
+            if decrescente:
+                de, ate = max(baixo, alto - janela), alto
+                alto = de
+                partes.insert(0, filtrar(de, ate))
+            else:
+                de, ate = baixo, min(alto, baixo + janela)
+                baixo = ate
+                partes.append(filtrar(de, ate))
+            encontrados += partes[0 if decrescente else -1].size
+            janela *= 2
+        indices = np.concatenate(partes) if partes else np.empty(0, np.int64)
+        return indices[-limite:] if decrescente else indices[:limite]
+
+    def buscar_pagina_logs(self, apos=None, limite=500, decrescente=True, **filtros):
+        # Mesmo contrato de DBHelper.buscar_pagina_logs; fora da cobertura lê do banco
+        colunas = self.colunas
+        if colunas is not None:
+            indices = self._selecionar(colunas, apos=apos, decrescente=decrescente, limite=limite, **filtros)
+            if decrescente:
+                indices = indices[::-1]
+            if decrescente:
+                # Página cheia acima do corte, ou histórico completo
+                coberta = colunas.corte is None or (len(indices) == limite
+                                                    and colunas.inicios[indices[-1]] > colunas.corte)
+            else:
+                inicio = apos[0] if apos is not None else filtros.get('dt_inicio')
+                coberta = colunas.corte is None or (inicio is not None and _epoca(inicio) > colunas.corte)
+            if coberta:
+                rows = self._linhas(colunas, indices)
+                proxima = (rows[-1][1], rows[-1][0]) if len(rows) == limite else None
+                return rows, proxima
+        return self.db.buscar_pagina_logs(apos, limite, decrescente, **filtros)
+
+    def buscar_logs_por_id(self, depois_de_id=None, antes_de_id=None, limite=200):
+        colunas = self.colunas
+        if colunas is None or depois_de_id is None or depois_de_id < colunas.id_completo:
+            return self.db.buscar_logs_por_id(depois_de_id, antes_de_id, limite)
+        manter = colunas.ids > depois_de_id
+        if antes_de_id is not None:
+            manter &= colunas.ids < antes_de_id
+        indices = np.flatnonzero(manter)
+        indices = indices[np.argsort(-colunas.ids[indices], kind='stable')][:limite]
+        return self._linhas(colunas, indices)
+
+    def iterar_logs(self, dt_inicio=None, dt_fim=None, usuario=None, host=None, duracao_minima=None,
+                    tamanho_bloco=5000, inicio_antes_de=None):
+        colunas = self.colunas
+        if colunas is None or (colunas.corte is not None and
+                               (dt_inicio is None or _epoca(dt_inicio) <= colunas.corte)):
+            yield from self.db.iterar_logs(dt_inicio=dt_inicio, dt_fim=dt_fim, usuario=usuario, host=host,
+                                           duracao_minima=duracao_minima, tamanho_bloco=tamanho_bloco,
+                                           inicio_antes_de=inicio_antes_de)
+            return
+        indices = self._selecionar(colunas, dt_inicio, dt_fim, usuario, host, duracao_minima, inicio_antes_de)
+        for i in range(0, len(indices), tamanho_bloco):
+            yield self._linhas(colunas, indices[i:i + tamanho_bloco])
+
+    def agregar_resumo(self, por='dia', dt_inicio=None, dt_fim=None, usuario=None, host=None):
+        """
+        Mesmo resultado de DBHelper.agregar_resumo (períodos repartidos por hora, filtros
+        de data pela hora), calculado das colunas. Períodos que começaram antes de um
+        descarte ainda contam nas horas seguintes, então só é usado com histórico completo.
+        """
+        colunas = self.colunas
+        if colunas is None or colunas.corte is not None:
+            return self.db.agregar_resumo(por, dt_inicio=dt_inicio, dt_fim=dt_fim, usuario=usuario, host=host)
+        if por not in ('dia', 'hora'):
+            raise ValueError(f"Agrupamento inválido: {por!r} (use dia, hora)")
+        primeira = _epoca(dt_inicio) // HORA if dt_inicio else None
+        ultima = _epoca(dt_fim) // HORA if dt_fim else None
+        # Só os períodos que podem tocar as horas pedidas: começam até a última e terminam depois da primeira
+        indices = self._selecionar(colunas, usuario=usuario, host=host)
+        if ultima is not None:
+            indices = indices[colunas.inicios[indices] < (ultima + 1) * HORA]
+        if primeira is not None:
+            indices = indices[colunas.fins[indices] > primeira * HORA]
+        inicios, fins = colunas.inicios[indices], colunas.fins[indices]
+        indice, balde, segundos = repartir(inicios, fins, HORA)
+        dentro = np.ones(balde.size, bool)
+        if primeira is not None:
+            dentro &= balde >= primeira
+        if ultima is not None:
+            dentro &= balde <= ultima
+        balde, segundos = balde[dentro], segundos[dentro]
+        # Um evento por período, na hora do início, como no resumo
+        baldes_inicio = inicios // HORA
+        contados = np.ones(baldes_inicio.size, bool)
+        if primeira is not None:
+            contados &= baldes_inicio >= primeira
+        baldes_inicio = baldes_inicio[contados]
+        if por == 'dia':
+            chave, chave_inicio = balde * HORA // DIA, baldes_inicio * HORA // DIA
+        else:
+            chave, chave_inicio = balde % 24, baldes_inicio % 24
+        chaves = np.union1d(chave, chave_inicio)
+        totais = np.bincount(np.searchsorted(chaves, chave), weights=segundos, minlength=chaves.size)
+        eventos = np.bincount(np.searchsorted(chaves, chave_inicio), minlength=chaves.size)
+        if por == 'dia':
+            rotulos = chaves.astype('datetime64[D]').tolist()
+        else:
+            rotulos = chaves.tolist()
+        return [(rotulo, int(total), int(n)) for rotulo, total, n in zip(rotulos, totais, eventos)]
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Envio dos períodos de ociosidade para o coletor central (coletor.py) por HTTP.
+
+ClienteColetor tem a mesma interface de gravação do DBHelper, então o
+EscritorOciosidade o usa no lugar do banco sem mudança: lotes, spool local e
+reconexão continuam iguais, e a estação não precisa de credenciais do MySQL.
+
+Cada evento leva um id derivado do próprio conteúdo (usuário, host, início e
+fim), e não gerado aleatoriamente: o reenvio do spool ou de um lote cuja
+resposta se perdeu repete os mesmos ids, e o coletor grava cada um só uma vez.
+
+Com um token compartilhado (token=... ou a variável OCIOSIDADE_TOKEN_COLETOR),
+cada lote vai com "Authorization: Bearer <token>"; o coletor recusa com 401 os
+lotes sem ele.
+"""
+
+import datetime
+import hashlib
+import http.client
+import json
+import os
+import urllib.parse
+
+CAMINHO_EVENTOS = '/eventos'
+# Token compartilhado entre o coletor e os agentes, quando não vem na linha de comando
+VARIAVEL_TOKEN = 'OCIOSIDADE_TOKEN_COLETOR'
+
+class ColetorOcupado(Exception):
+    """
+    O coletor recusou o lote por estar com a fila cheia (HTTP 503); tentar mais tarde.
+    """
+
+def cabecalho_token(token):
+    # Valor do cabeçalho Authorization enviado com o token
+    return f"Bearer {token}"
+
+def id_evento(inicio_ocioso, fim_ocioso, usuario, host):
+    chave = f"{host}|{usuario}|{inicio_ocioso.isoformat()}|{fim_ocioso.isoformat()}"
+    return hashlib.sha256(chave.encode('utf-8')).hexdigest()[:32]
+
+def codificar_eventos(registros):
+    # Registros (inicio, fim, duracao, usuario, host) -> corpo JSON do POST /eventos
+    return json.dumps({'eventos': [
+        [id_evento(inicio, fim, usuario, host), inicio.isoformat(), fim.isoformat(), duracao, usuario, host]
+        for inicio, fim, duracao, usuario, host in registros
+    ]}).encode('utf-8')
+
+def decodificar_eventos(corpo):
+    """
+    Corpo JSON do POST /eventos -> [(evento_id, inicio, fim, duracao, usuario, host)].
+    Levanta ValueError se o formato for inválido.
+    """
+    try:
+        eventos = json.loads(corpo)['eventos']
+        resultado = []
+        for evento_id, inicio, fim, duracao, usuario, host in eventos:
+            inicio = datetime.datetime.fromisoformat(inicio)
+            fim = datetime.datetime.fromisoformat(fim)
+            if not evento_id:
+                evento_id = id_evento(inicio, fim, usuario, host)
+            resultado.append((str(evento_id)[:32], inicio, fim, int(duracao), usuario, host))
+        return resultado
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Lote de eventos inválido: {e}")
+
+class ClienteColetor:
+    """
+    Substituto do DBHelper que envia os lotes ao coletor em uma conexão HTTP persistente.
+    """
+    def __init__(self, url, timeout=10.0, token=None):
+        self.token = token or os.environ.get(VARIAVEL_TOKEN)
+        partes = urllib.parse.urlsplit(url if '://' in url else 'http://' + url)
+        self.host = partes.hostname
+        self.porta = partes.port or 8750
+        self.timeout = timeout
+        self._conexao = None
+
+    def _conectar(self):
+        if self._conexao is None:
+            self._conexao = http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+        return self._conexao
+
+    def inserir_ociosidade_lote(self, registros):
+        # Só retorna quando o coletor confirmou que o lote está no banco
+        corpo = codificar_eventos(registros)
+        conexao = self._conectar()
+        try:
+            cabecalhos = {'Content-Type': 'application/json'}
+            if self.token:
+                cabecalhos['Authorization'] = cabecalho_token(self.token)
+            conexao.request('POST', CAMINHO_EVENTOS, corpo, cabecalhos)
+            resposta = conexao.getresponse()
+            dados = resposta.read()
+        except Exception:
+            self.fechar()
+            raise
+        if resposta.status == 503:
+            raise ColetorOcupado(resposta.getheader('Retry-After', ''))
+        if resposta.status == 401:
+            # O lote fica no spool até o token ser corrigido
+            raise PermissionError(f"Coletor recusou o token (defina --token-coletor ou {VARIAVEL_TOKEN})")
+        if resposta.status != 200:
+            raise ConnectionError(f"Coletor respondeu {resposta.status}: {dados[:200]!r}")
+
+    def inserir_ociosidade(self, inicio_ocioso, fim_ocioso, duracao, usuario, host):
+        self.inserir_ociosidade_lote([(inicio_ocioso, fim_ocioso, duracao, usuario, host)])
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
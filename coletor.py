@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Coletor central (asyncio) dos períodos de ociosidade de todas as estações.
+
+Os agentes (agente.py --coletor host:porta) enviam lotes por HTTP em vez de
+abrir cada um a sua conexão MySQL como root. O coletor mantém poucas conexões
+com o banco e grava os lotes de muitos agentes juntos:
+
+- POST /eventos recebe {"eventos": [[evento_id, inicio, fim, duracao, usuario, host], ...]}
+  e só responde 200 depois que os eventos estão no banco;
+- enquanto uma gravação está em andamento os lotes que chegam se acumulam e
+  entram todos na próxima (agrupamento natural: lotes maiores sob carga, latência
+  mínima com pouca carga);
+- contrapressão: acima de limite_pendentes eventos aguardando gravação, ou com
+  o banco fora do ar, a resposta é 503 com Retry-After e o agente guarda o lote
+  no spool local;
+- idempotência: evento_id repetido (reenvio do agente) não é gravado de novo;
+- GET /saude devolve os contadores do coletor em JSON.
+
+Por padrão o coletor só ouve em 127.0.0.1. Para receber das estações, informe
+--endereco (ex.: 0.0.0.0) e um token compartilhado (--token ou a variável
+OCIOSIDADE_TOKEN_COLETOR, a mesma lida pelo agente): POST /eventos sem
+"Authorization: Bearer <token>" recebe 401, e o coletor não abre em um endereço
+externo sem token.
+
+Uso:
+python coletor.py [--porta 8750] [--host-banco localhost] [--user root] [--password ''] [--database monitor_ociosidade]
+python coletor.py --banco sqlite:///ociosidade.db
+OCIOSIDADE_TOKEN_COLETOR=segredo python coletor.py --endereco 0.0.0.0
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import hmac
+import ipaddress
+import json
+import os
+import signal
+
+from banco import abrir_banco, fechar_pools
+from cliente_coletor import CAMINHO_EVENTOS, VARIAVEL_TOKEN, cabecalho_token, decodificar_eventos
+
+PORTA_PADRAO = 8750
+
+_MOTIVOS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 413: 'Payload Too Large',
+            503: 'Service Unavailable'}
+
+def _local(endereco):
+    # Endereço de escuta só alcançável desta máquina
+    if endereco == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(endereco).is_loopback
+    except ValueError:
+        return False
+
+class Coletor:
+    """
+    Servidor HTTP mínimo sobre asyncio que grava em lote os eventos recebidos.
+    """
+    def __init__(self, fabrica_db=abrir_banco, tamanho_lote=5000, limite_pendentes=100000,
+                 tamanho_maximo_corpo=8 * 2**20, timeout_conexao=60.0, espera_sugerida=5, token=None):
+        self.fabrica_db = fabrica_db
+        # Com token, POST /eventos exige "Authorization: Bearer <token>"
+        self._autorizacao = cabecalho_token(token).encode('utf-8') if token else None
+        self.tamanho_lote = tamanho_lote
+        self.limite_pendentes = limite_pendentes
+        self.tamanho_maximo_corpo = tamanho_maximo_corpo
+        # Conexões de agentes paradas há mais que isso são fechadas
+        self.timeout_conexao = timeout_conexao
+        self.espera_sugerida = espera_sugerida
+        self._fila = None
+        self._pendentes = 0
+        self._servidor = None
+        self._gravador = None
+        self._conexoes = set()
+        # O banco é usado por uma única thread: as gravações ficam em série e em lote
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='coletor-db')
+        self._db = None
+        self.contadores = {'recebidos': 0, 'novos': 0, 'duplicados': 0, 'recusados': 0,
+                           'nao_autorizados': 0, 'lotes_banco': 0, 'falhas_banco': 0}
+
+    async def iniciar(self, endereco='127.0.0.1', porta=PORTA_PADRAO):
+        self._fila = asyncio.Queue()
+        self._gravador = asyncio.create_task(self._gravar_continuamente())
+        self._servidor = await asyncio.start_server(self._atender, endereco, porta, backlog=1024)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def parar(self):
+        # Para de aceitar conexões, grava o que já foi aceito e fecha o resto
+        self._servidor.close()
+        await self._fila.put(None)
+        await self._gravador
+        # Lotes que chegaram depois da marca de encerramento: o agente reenvia depois
+        while not self._fila.empty():
+            item = self._fila.get_nowait()
+            if item is not None and not item[1].done():
+                item[1].set_exception(ConnectionError("coletor encerrado"))
+        for writer in list(self._conexoes):
+            writer.close()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._fechar_db)
+        self._executor.shutdown()
+
+    def estado(self):
+        return dict(self.contadores, pendentes=self._pendentes, conexoes=len(self._conexoes))
+
+    async def _atender(self, reader, writer):
+        self._conexoes.add(writer)
+        try:
+            while True:
+                linha = await asyncio.wait_for(reader.readline(), self.timeout_conexao)
+                if not linha:
+                    break
+                try:
+                    metodo, caminho, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    await self._responder(writer, 400, {'erro': 'requisição inválida'})
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await asyncio.wait_for(reader.readline(), self.timeout_conexao)
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                if caminho == CAMINHO_EVENTOS and not self._autorizado(cabecalhos):
+                    # Antes de ler o corpo: sem token não se aceita nem o lote
+                    self.contadores['nao_autorizados'] += 1
+                    await self._responder(writer, 401, {'erro': 'token ausente ou inválido'},
+                                          {'WWW-Authenticate': 'Bearer'})
+                    break
+                tamanho = int(cabecalhos.get('content-length') or 0)
+                if tamanho > self.tamanho_maximo_corpo:
+                    await self._responder(writer, 413, {'erro': 'lote grande demais'})
+                    break
+                corpo = await asyncio.wait_for(reader.readexactly(tamanho), self.timeout_conexao) if tamanho else b''
+                status, resposta = await self._rotear(metodo, caminho, corpo)
+                extras = {'Retry-After': str(self.espera_sugerida)} if status == 503 else {}
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                await self._responder(writer, status, resposta, extras, manter)
+                if not manter:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._conexoes.discard(writer)
+            writer.close()
+
+    def _autorizado(self, cabecalhos):
+        if self._autorizacao is None:
+            return True
+        return hmac.compare_digest(cabecalhos.get('authorization', '').encode('utf-8'), self._autorizacao)
+
+    async def _responder(self, writer, status, resposta, extras=None, manter=False):
+        corpo = json.dumps(resposta).encode('utf-8')
+        cabecalhos = {'Content-Type': 'application/json', 'Content-Length': str(len(corpo)),
+                      'Connection': 'keep-alive' if manter else 'close'}
+        cabecalhos.update(extras or {})
+        writer.write((f"HTTP/1.1 {status} {_MOTIVOS[status]}\r\n"
+                      + ''.join(f"{nome}: {valor}\r\n" for nome, valor in cabecalhos.items())
+                      + "\r\n").encode('latin-1') + corpo)
+        await writer.drain()
+
+    async def _rotear(self, metodo, caminho, corpo):
+        if metodo == 'GET' and caminho == '/saude':
+            return 200, self.estado()
+        if metodo != 'POST' or caminho != CAMINHO_EVENTOS:
+            return 404, {'erro': 'caminho desconhecido'}
+        try:
+            eventos = decodificar_eventos(corpo)
+        except ValueError as e:
+            return 400, {'erro': str(e)}
+        if not eventos:
+            return 200, {'recebidos': 0}
+        if self._pendentes + len(eventos) > self.limite_pendentes:
+            self.contadores['recusados'] += len(eventos)
+            return 503, {'erro': 'coletor ocupado'}
+        # Só confirma ao agente depois da gravação, para que ele possa descartar o lote
+        confirmacao = asyncio.get_running_loop().create_future()
+        self._pendentes += len(eventos)
+        await self._fila.put((eventos, confirmacao))
+        try:
+            await confirmacao
+        except Exception:
+            self.contadores['recusados'] += len(eventos)
+            return 503, {'erro': 'banco indisponível'}
+        self.contadores['recebidos'] += len(eventos)
+        return 200, {'recebidos': len(eventos)}
+
+    async def _gravar_continuamente(self):
+        loop = asyncio.get_running_loop()
+        encerrar = False
+        while not encerrar:
+            item = await self._fila.get()
+            if item is None:
+                break
+            itens = [item]
+            total = len(item[0])
+            # Junta o que chegou enquanto a gravação anterior estava em andamento
+            while total < self.tamanho_lote and not self._fila.empty():
+                item = self._fila.get_nowait()
+                if item is None:
+                    encerrar = True
+                    break
+                itens.append(item)
+                total += len(item[0])
+            eventos = [evento for lote, _ in itens for evento in lote]
+            try:
+                novos = await loop.run_in_executor(self._executor, self._gravar, eventos)
+            except Exception as e:
+                self.contadores['falhas_banco'] += 1
+                for _, confirmacao in itens:
+                    if not confirmacao.done():
+                        confirmacao.set_exception(e)
+            else:
+                self.contadores['lotes_banco'] += 1
+                self.contadores['novos'] += novos
+                self.contadores['duplicados'] += len(eventos) - novos
+                for _, confirmacao in itens:
+                    if not confirmacao.done():
+                        confirmacao.set_result(None)
+            finally:
+                self._pendentes -= total
+
+    def _gravar(self, eventos):
+        # Roda na thread do banco; uma conexão que falhou é descartada e refeita no próximo lote
+        try:
+            if self._db is None:
+                self._db = self.fabrica_db()
+            return self._db.inserir_eventos(eventos)
+        except Exception:
+            self._fechar_db()
+            raise
+
+    def _fechar_db(self):
+        if self._db is not None:
+            try:
+                self._db.fechar()
+            except Exception:
+                pass
+            self._db = None
+
+async def servir(coletor, endereco, porta):
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for nome in ('SIGINT', 'SIGTERM'):
+        try:
+            loop.add_signal_handler(getattr(signal, nome), parar.set)
+        except (NotImplementedError, AttributeError):
+            # Windows: Ctrl+C chega como KeyboardInterrupt em asyncio.run
+            pass
+    porta = await coletor.iniciar(endereco, porta)
+    print(f"Coletor ouvindo em {endereco}:{porta}")
+    try:
+        await parar.wait()
+    finally:
+        await coletor.parar()
+        print(f"Coletor encerrado: {coletor.estado()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Coletor central dos eventos de ociosidade")
+    parser.add_argument('--endereco', default='127.0.0.1',
+                        help='interface de escuta (padrão: só esta máquina; 0.0.0.0 para todas)')
+    parser.add_argument('--token', default=os.environ.get(VARIAVEL_TOKEN),
+                        help=f'token compartilhado exigido dos agentes (padrão: variável {VARIAVEL_TOKEN})')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--host-banco', default='localhost')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='monitor_ociosidade')
+    parser.add_argument('--banco', help='URL do backend (mysql://, sqlite:///arquivo.db, memoria:); '
+                                        'padrão: OCIOSIDADE_BANCO ou o MySQL de --host-banco/--user/...')
+    parser.add_argument('--tamanho-lote', type=int, default=5000, help='eventos por transação no banco')
+    parser.add_argument('--limite-pendentes', type=int, default=100000,
+                        help='eventos aguardando gravação acima dos quais os agentes recebem 503')
+    args = parser.parse_args()
+    if not args.token and not _local(args.endereco):
+        parser.error(f"--endereco {args.endereco} aceita conexões de outras máquinas: "
+                     f"defina --token ou a variável {VARIAVEL_TOKEN}")
+    fabrica_db = functools.partial(abrir_banco, args.banco, args.host_banco, args.user, args.password, args.database)
+    coletor = Coletor(fabrica_db, args.tamanho_lote, args.limite_pendentes, token=args.token)
+    try:
+        asyncio.run(servir(coletor, args.endereco, args.porta))
+    finally:
+        fechar_pools()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Painel de diagnóstico do dashboard: métricas de execução atualizadas a cada
+segundo e o liga/desliga do perfilador por amostragem.
+
+Lê o mesmo registro exposto em /metrics (metricas.REGISTRO); eventos por
+segundo são calculados pela diferença entre duas leituras dos contadores.
+"""
+
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog
+
+import metricas
+from monitoramento import FONTES
+
+class PainelDiagnostico(tk.Toplevel):
+    """
+    Janela com as métricas do processo e o controle do perfilador.
+    """
+    INTERVALO = 1000  # ms
+
+    def __init__(self, master, url_metricas=None):
+        super().__init__(master)
+        self.title("Diagnóstico")
+        self.geometry("640x520")
+        self._anterior = None
+        self._perfilador = None
+
+        frm_top = ttk.Frame(self)
+        frm_top.pack(fill='x', padx=8, pady=5)
+        self.perfilando = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm_top, text="Perfilador por amostragem", variable=self.perfilando,
+                        command=self.alternar_perfilador).pack(side='left')
+        ttk.Button(frm_top, text="Salvar pilhas...", command=self.salvar_pilhas).pack(side='left', padx=8)
+        texto_url = f"Prometheus: {url_metricas}" if url_metricas else "Endpoint /metrics desligado (use --metricas)"
+        ttk.Label(frm_top, text=texto_url).pack(side='right')
+
+        self.texto = tk.Text(self, font=('Courier', 9), wrap='none')
+        self.texto.pack(fill='both', expand=1, padx=8, pady=(0, 8))
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.atualizar()
+
+    def _linhas(self):
+        metricas.REGISTRO.atualizar()
+        agora = time.monotonic()
+        contagens = {fonte: metricas.EVENTOS_ENTRADA.valor(fonte) for fonte in FONTES}
+        linhas = ["Eventos de entrada por segundo:"]
+        if self._anterior:
+            instante, anteriores = self._anterior
+            intervalo = max(agora - instante, 1e-6)
+            for fonte in FONTES:
+                linhas.append(f"  {fonte:<12}{max(contagens[fonte] - anteriores[fonte], 0) / intervalo:>10.1f}")
+        self._anterior = (agora, contagens)
+
+        linhas.append("")
+        linhas.append(f"Fila de gravação: {metricas.FILA_GRAVACAO.valor():g}    "
+                      f"Períodos detectados: {metricas.PERIODOS_OCIOSOS.valor():g}")
+        linhas.append("")
+        linhas.append(f"{'Atraso da detecção':<28}{'n':>7}{'média ms':>11}{'máx ms':>10}")
+        for momento in ('inicio', 'fim'):
+            n, media, maximo = metricas.ATRASO_DETECCAO.resumo(momento)
+            linhas.append(f"  {momento:<26}{n:>7}{media * 1000:>11.2f}{maximo * 1000:>10.2f}")
+        linhas.append("")
+        linhas.append(f"{'Gravações no banco':<28}{'n':>7}{'média ms':>11}{'máx ms':>10}{'falhas':>8}")
+        for (operacao,) in metricas.GRAVACAO_BANCO.series():
+            n, media, maximo = metricas.GRAVACAO_BANCO.resumo(operacao)
+            linhas.append(f"  {operacao:<26}{n:>7}{media * 1000:>11.2f}{maximo * 1000:>10.2f}"
+                          f"{metricas.FALHAS_BANCO.valor(operacao):>8g}")
+        linhas.append("")
+        linhas.append(f"{'Consultas':<28}{'n':>7}{'média ms':>11}{'máx ms':>10}{'linhas':>9}")
+        for (consulta,) in metricas.CONSULTA_BANCO.series():
+            n, media, maximo = metricas.CONSULTA_BANCO.resumo(consulta)
+            linhas.append(f"  {consulta:<26}{n:>7}{media * 1000:>11.2f}{maximo * 1000:>10.2f}"
+                          f"{metricas.LINHAS_CONSULTA.valor(consulta):>9g}")
+        linhas.append("")
+        linhas.append(f"{'Atualização da tabela':<28}{'n':>7}{'média ms':>11}{'máx ms':>10}")
+        for (modo,) in metricas.ATUALIZACAO_TABELA.series():
+            n, media, maximo = metricas.ATUALIZACAO_TABELA.resumo(modo)
+            linhas.append(f"  {modo:<26}{n:>7}{media * 1000:>11.2f}{maximo * 1000:>10.2f}")
+        if self._perfilador is not None:
+            linhas.append("")
+            linhas.append(f"Perfilador: {self._perfilador.amostras} amostras (funções no topo da pilha)")
+            for funcao, fracao in self._perfilador.mais_frequentes():
+                linhas.append(f"  {fracao * 100:5.1f}%  {funcao}")
+        return linhas
+
+    def atualizar(self):
+        posicao = self.texto.yview()[0]
+        self.texto.delete('1.0', 'end')
+        self.texto.insert('1.0', '\n'.join(self._linhas()))
+        self.texto.yview_moveto(posicao)
+        self._agendado = self.after(self.INTERVALO, self.atualizar)
+
+    def alternar_perfilador(self):
+        if self.perfilando.get():
+            self._perfilador = metricas.AmostradorPerfil()
+            self._perfilador.start()
+        elif self._perfilador is not None:
+            self._perfilador.parar()
+
+    def salvar_pilhas(self):
+        # Formato "collapsed" (uma pilha por linha), aceito pelo flamegraph.pl e pelo speedscope
+        if self._perfilador is None:
+            return
+        caminho = filedialog.asksaveasfilename(parent=self, defaultextension='.txt', title='Salvar pilhas')
+        if caminho:
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(self._perfilador.pilhas())
+
+    def fechar(self):
+        self.after_cancel(self._agendado)
+        if self._perfilador is not None:
+            self._perfilador.parar()
+        self.destroy()
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Gravação assíncrona (write-behind) dos períodos de ociosidade.
+
+O monitor apenas enfileira os eventos; uma thread própria os agrupa em lotes e
+grava cada lote com executemany em uma única transação. Se o banco estiver lento
+ou fora do ar a detecção não é afetada: o lote que falhou é anexado a um arquivo
+local (uma linha JSON por evento, com fsync) e reenviado, em ordem, assim que a
+conexão volta. O reenvio é "pelo menos uma vez": uma queda entre gravar um lote
+do spool e registrar a posição reenviada pode duplicar esse lote.
+
+Uma linha do spool ilegível (truncada por uma queda no meio da escrita) ou um
+registro que o banco recusa (DataError/IntegrityError da DB-API) vai para o
+arquivo .rejeitados ao lado do spool e o reenvio segue, para que uma linha ruim
+não trave a fila. Se nem o spool puder ser escrito (disco cheio, permissão), o
+lote fica em memória e é tentado de novo na próxima volta.
+"""
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+import metricas
+from banco import abrir_banco
+
+CAMINHO_SPOOL_PADRAO = os.path.join(os.path.expanduser('~'), '.monitor_ociosidade', 'pendentes.jsonl')
+
+# Marca de encerramento colocada na fila por parar()
+_FIM = object()
+
+def _recusado(erro):
+    # Erro causado pelo próprio registro, e não pela conexão: reenviar não adianta
+    return isinstance(erro, (TypeError, ValueError, OverflowError)) or any(
+        classe.__name__ in ('DataError', 'IntegrityError') for classe in type(erro).__mro__)
+
+def _decodificar(linha):
+    inicio, fim, duracao, usuario, host = json.loads(linha)
+    if not (isinstance(duracao, int) and isinstance(usuario, str) and isinstance(host, str)):
+        raise ValueError(f"Registro inválido no spool: {linha!r}")
+    return (datetime.datetime.fromisoformat(inicio), datetime.datetime.fromisoformat(fim), duracao, usuario, host)
+
+class EscritorOciosidade(threading.Thread):
+    """
+    Thread que grava em lote os eventos enfileirados, com spool local em caso de falha.
+    """
+    def __init__(self, fabrica_db=abrir_banco, caminho_spool=CAMINHO_SPOOL_PADRAO,
+                 tamanho_lote=100, intervalo_flush=1.0, intervalo_reconexao=30.0, ao_gravar=None):
+        super().__init__(daemon=True)
+        self.fabrica_db = fabrica_db
+        # Chamado (na thread do escritor) com cada lote depois que ele está no banco
+        self.ao_gravar = ao_gravar
+        self.caminho_spool = caminho_spool
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_flush = intervalo_flush
+        self.intervalo_reconexao = intervalo_reconexao
+        self._fila = queue.Queue()
+        self._db = None
+        self._proxima_tentativa = 0.0
+        # Lotes que nem o spool aceitou (disco cheio, permissão): tentados de novo a cada volta
+        self._retidos = []
+        self.gravados = 0
+        self.falhas = 0
+        self.rejeitados = 0
+        metricas.REGISTRO.coletar('escritor', lambda: metricas.FILA_GRAVACAO.definir(self.pendentes()))
+
+    def enfileirar(self, inicio_ocioso, fim_ocioso, duracao, usuario, host):
+        # Chamado pela thread do monitor; nunca bloqueia
+        self._fila.put((inicio_ocioso, fim_ocioso, duracao, usuario, host))
+
+    def pendentes(self):
+        return self._fila.qsize() + len(self._retidos)
+
+    def parar(self, timeout=None):
+        # Grava o que restou na fila (ou no spool) e encerra a thread
+        self._fila.put(_FIM)
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        encerrar = False
+        try:
+            while not encerrar:
+                lote, encerrar = self._coletar_lote()
+                if self._retidos:
+                    lote, self._retidos = self._retidos + lote, []
+                # No encerramento não há próxima volta: tenta o banco mesmo dentro da espera
+                if self._garantir_conexao(ignorar_espera=encerrar):
+                    if lote:
+                        try:
+                            self._gravar(lote)
+                        except Exception:
+                            self._descartar_conexao()
+                            self._guardar(lote)
+                elif lote:
+                    self._guardar(lote)
+        finally:
+            if self._db is not None:
+                self._db.fechar()
+
+    def _coletar_lote(self):
+        # Espera o primeiro evento e junta os seguintes até encher o lote ou vencer o intervalo
+        espera = self.intervalo_reconexao if self._db is None or self._tem_spool() or self._retidos else None
+        try:
+            item = self._fila.get(timeout=espera)
+        except queue.Empty:
+            return [], False
+        lote = []
+        prazo = time.monotonic() + self.intervalo_flush
+        while item is not _FIM:
+            lote.append(item)
+            if len(lote) >= self.tamanho_lote:
+                return lote, False
+            try:
+                item = self._fila.get(timeout=max(0.0, prazo - time.monotonic()))
+            except queue.Empty:
+                return lote, False
+        # Encerramento: o que ainda estiver na fila entra no último lote
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                return lote, True
+            if item is not _FIM:
+                lote.append(item)
+
+    def _garantir_conexao(self, ignorar_espera=False):
+        # (Re)conecta quando possível e reenvia o spool antes de qualquer gravação nova
+        if self._db is None:
+            if not ignorar_espera and time.monotonic() < self._proxima_tentativa:
+                return False
+            try:
+                self._db = self.fabrica_db()
+            except Exception:
+                self.falhas += 1
+                self._proxima_tentativa = time.monotonic() + self.intervalo_reconexao
+                return False
+        if self._tem_spool():
+            try:
+                self._reenviar_spool()
+            except Exception:
+                self._descartar_conexao()
+                return False
+        return True
+
+    def _gravar(self, lote):
+        self._db.inserir_ociosidade_lote(lote)
+        self.gravados += len(lote)
+        if self.ao_gravar:
+            try:
+                self.ao_gravar(lote)
+            except Exception:
+                # Um erro de quem foi notificado não pode fazer o lote já gravado ir ao spool
+                pass
+
+    def _descartar_conexao(self):
+        self.falhas += 1
+        try:
+            self._db.fechar()
+        except Exception:
+            pass
+        self._db = None
+        self._proxima_tentativa = time.monotonic() + self.intervalo_reconexao
+
+    def _tem_spool(self):
+        return os.path.exists(self.caminho_spool)
+
+    def _guardar(self, lote):
+        # Spool; se nem ele puder ser escrito, o lote fica em memória até a próxima volta
+        try:
+            self._gravar_spool(lote)
+        except OSError:
+            self.falhas += 1
+            self._retidos = lote + self._retidos
+
+    def _gravar_spool(self, lote):
+        os.makedirs(os.path.dirname(self.caminho_spool) or '.', exist_ok=True)
+        linhas = ''.join(json.dumps([inicio.isoformat(), fim.isoformat(), duracao, usuario, host]) + '\n'
+                         for inicio, fim, duracao, usuario, host in lote)
+        self._anexar(self.caminho_spool, linhas.encode('utf-8'))
+
+    @staticmethod
+    def _anexar(caminho, dados):
+        with open(caminho, 'a+b') as f:
+            # Uma escrita interrompida deixa a última linha sem quebra: não cola a próxima nela
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    dados = b'\n' + dados
+            f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rejeitar(self, linha):
+        # Guarda a linha como estava no spool, para conferência manual
+        self._anexar(self.caminho_spool + '.rejeitados', linha.rstrip(b'\r\n') + b'\n')
+        self.rejeitados += 1
+
+    @staticmethod
+    def _salvar_posicao(caminho_pos, posicao):
+        # Arquivo temporário + os.replace: uma queda nunca deixa a posição pela metade
+        temporario = caminho_pos + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as p:
+            p.write(str(posicao))
+            p.flush()
+            os.fsync(p.fileno())
+        os.replace(temporario, caminho_pos)
+
+    def _reenviar_spool(self):
+        # A posição já reenviada fica em um arquivo ao lado, para retomar sem duplicar
+        caminho_pos = self.caminho_spool + '.pos'
+        posicao = 0
+        if os.path.exists(caminho_pos):
+            with open(caminho_pos, 'r', encoding='utf-8') as p:
+                posicao = int(p.read() or 0)
+        with open(self.caminho_spool, 'rb') as f:
+            f.seek(posicao)
+            lote = []
+            while True:
+                linha = f.readline()
+                if linha.strip():
+                    try:
+                        lote.append((_decodificar(linha), linha))
+                    except (ValueError, TypeError):
+                        # Só é separada junto com o lote, para não repetir a cada reenvio que falha
+                        lote.append((None, linha))
+                if lote and (len(lote) >= self.tamanho_lote or not linha):
+                    self._reenviar_lote(lote)
+                    lote = []
+                    self._salvar_posicao(caminho_pos, f.tell())
+                if not linha:
+                    break
+        os.remove(self.caminho_spool)
+        if os.path.exists(caminho_pos):
+            os.remove(caminho_pos)
+
+    def _reenviar_lote(self, lote):
+        # lote: pares (registro, linha do spool), registro None se a linha é ilegível. Se o
+        # banco recusar algum registro, grava um a um e separa os recusados; outros erros
+        # (conexão) sobem e o reenvio para.
+        registros = [registro for registro, _ in lote if registro is not None]
+        recusadas = [linha for registro, linha in lote if registro is None]
+        try:
+            if registros:
+                self._gravar(registros)
+        except Exception as e:
+            if not _recusado(e):
+                raise
+            for registro, linha in lote:
+                if registro is None:
+                    continue
+                try:
+                    self._gravar([registro])
+                except Exception as e:
+                    if not _recusado(e):
+                        raise
+                    recusadas.append(linha)
+        for linha in recusadas:
+            self._rejeitar(linha)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Exportação em streaming dos logs de ociosidade para Excel, CSV ou Parquet.
+
+Os registros chegam do banco em blocos (DBHelper.iterar_logs) e cada bloco é
+escrito e descartado antes do próximo, então a memória usada não depende do
+tamanho do período exportado. O Excel usa o modo write-only do openpyxl; o
+Parquet é opcional e precisa do pyarrow (pip install pyarrow).
+
+O Excel ganha também a planilha 'Ociosidade por hora', com o tempo de cada
+período repartido entre as horas que ele cobre, somado bloco a bloco.
+
+Uma planilha do Excel tem no máximo 1.048.576 linhas (com o cabeçalho). Acima
+disso os registros continuam em 'Ociosidade (2)', 'Ociosidade (3)'...; para
+analisar volumes assim fora do Excel, prefira CSV ou Parquet, que não têm limite.
+"""
+
+import csv
+import datetime
+import os
+
+COLUNAS = ('ID', 'Início Ocioso', 'Fim Ocioso', 'Duração (s)', 'Usuário', 'Host')
+COLUNAS_POR_HORA = ('Dia', 'Hora', 'Usuário', 'Host', 'Segundos Ociosos', 'Períodos Iniciados')
+# Linhas por planilha do Excel, contando o cabeçalho
+LIMITE_LINHAS_EXCEL = 1048576
+
+FORMATOS = {
+    '.xlsx': 'excel',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+}
+
+def montar_filtros(de='', ate='', usuario='', host=''):
+    """
+    Converte os campos de filtro da interface (datas AAAA-MM-DD) nos argumentos
+    dt_inicio/dt_fim/usuario/host das consultas do DBHelper. A data final inclui
+    o dia inteiro. Levanta ValueError se uma data for inválida.
+    """
+    filtros = {}
+    if de.strip():
+        filtros['dt_inicio'] = datetime.datetime.strptime(de.strip(), '%Y-%m-%d')
+    if ate.strip():
+        filtros['dt_fim'] = datetime.datetime.strptime(ate.strip(), '%Y-%m-%d').replace(
+            hour=23, minute=59, second=59)
+    if usuario.strip():
+        filtros['usuario'] = usuario.strip()
+    if host.strip():
+        filtros['host'] = host.strip()
+    return filtros
+
+def exportar(db, caminho, filtros=None, progresso=None, tamanho_bloco=5000):
+    """
+    Exporta os logs que atendem aos filtros para caminho; o formato vem da extensão.
+    progresso(linhas) é chamado após cada bloco escrito. Devolve o total de linhas.
+    O arquivo é escrito com outro nome e só substitui o destino quando termina.
+    """
+    formato = FORMATOS.get(os.path.splitext(caminho)[1].lower())
+    if formato is None:
+        raise ValueError(f"Formato não suportado: {caminho} (use {', '.join(FORMATOS)})")
+    blocos = db.iterar_logs(tamanho_bloco=tamanho_bloco, **(filtros or {}))
+    escrever = {'excel': _escrever_excel, 'csv': _escrever_csv, 'parquet': _escrever_parquet}[formato]
+    temporario = caminho + '.parcial'
+    try:
+        total = escrever(temporario, blocos, progresso)
+    except BaseException:
+        blocos.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.replace(temporario, caminho)
+    return total
+
+def _avisar(progresso, total):
+    if progresso:
+        progresso(total)
+
+def _escrever_excel(caminho, blocos, progresso):
+    from openpyxl import Workbook
+    from resumo import acumulador
+    acumular = acumulador()
+    wb = Workbook(write_only=True)
+    escrever = _planilhas(wb, 'Ociosidade', COLUNAS)
+    por_hora = {}
+    total = 0
+    for bloco in blocos:
+        escrever(bloco)
+        acumular(por_hora, [row[1:] for row in bloco if row[1] is not None and row[2] is not None])
+        total += len(bloco)
+        _avisar(progresso, total)
+    _planilhas(wb, 'Ociosidade por hora', COLUNAS_POR_HORA)(
+        chave + tuple(por_hora[chave]) for chave in sorted(por_hora))
+    # O openpyxl decide o formato pela extensão do arquivo
+    with open(caminho, 'wb') as f:
+        wb.save(f)
+    return total
+
+def _planilhas(wb, titulo, colunas):
+    # Devolve escrever(linhas): acrescenta à planilha atual e abre 'titulo (2)',
+    # 'titulo (3)'... com o mesmo cabeçalho quando ela chega a LIMITE_LINHAS_EXCEL
+    estado = {'numero': 0}
+
+    def nova():
+        estado['numero'] += 1
+        nome = titulo if estado['numero'] == 1 else f"{titulo} ({estado['numero']})"
+        estado['ws'] = wb.create_sheet(nome)
+        estado['ws'].append(colunas)
+        estado['livres'] = LIMITE_LINHAS_EXCEL - 1
+
+    def escrever(linhas):
+        for linha in linhas:
+            if not estado['livres']:
+                nova()
+            estado['ws'].append(linha)
+            estado['livres'] -= 1
+
+    # A primeira planilha existe mesmo sem linhas (só com o cabeçalho)
+    nova()
+    return escrever
+
+def _escrever_csv(caminho, blocos, progresso):
+    total = 0
+    # utf-8-sig e ';' para o Excel em português abrir o arquivo direto
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(COLUNAS)
+        for bloco in blocos:
+            writer.writerows(bloco)
+            total += len(bloco)
+            _avisar(progresso, total)
+    return total
+
+def _escrever_parquet(caminho, blocos, progresso):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Exportação Parquet requer o pyarrow: pip install pyarrow")
+    esquema = pa.schema([
+        ('id', pa.int64()),
+        ('inicio_ocioso', pa.timestamp('s')),
+        ('fim_ocioso', pa.timestamp('s')),
+        ('duracao_segundos', pa.int32()),
+        ('usuario', pa.string()),
+        ('host', pa.string()),
+    ])
+    total = 0
+    with pq.ParquetWriter(caminho, esquema) as writer:
+        for bloco in blocos:
+            colunas = list(zip(*bloco))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=campo.type) for col, campo in zip(colunas, esquema)], schema=esquema))
+            total += len(bloco)
+            _avisar(progresso, total)
+    return total
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Gráficos de barras embutidos no dashboard (FigureCanvasTkAgg), sem pyplot.
+
+Cada gráfico cria a sua Figure uma única vez e depois só atualiza as barras:
+com as mesmas categorias, muda a altura dos retângulos e redesenha só as barras
+sobre o fundo guardado (blitting); com categorias novas (um dia a mais, filtro
+diferente), recria as barras; se a escala do eixo y precisar mudar, redesenha
+a figura inteira.
+As atualizações passam por agendar(), que junta as que chegarem em menos de
+INTERVALO_MINIMO ms e desenha só a última.
+"""
+
+import time
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+HORAS_DO_DIA = tuple(range(24))
+
+class GraficoBarras:
+    """
+    Gráfico de barras (minutos de ociosidade por categoria) dentro de um widget Tk.
+    """
+    INTERVALO_MINIMO = 1000  # ms entre dois desenhos
+
+    def __init__(self, master, titulo, rotulo_x, rotulo_y='Ociosidade (min)', categorias_fixas=None, rotacao=0):
+        self.categorias_fixas = categorias_fixas
+        self.rotacao = rotacao
+        self.figura = Figure(figsize=(8, 4))
+        self.eixo = self.figura.add_subplot()
+        self.eixo.set_title(titulo)
+        self.eixo.set_xlabel(rotulo_x)
+        self.eixo.set_ylabel(rotulo_y)
+        self.canvas = FigureCanvasTkAgg(self.figura, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(fill='both', expand=1)
+        self.categorias = None
+        self.barras = None
+        self._fundo = None
+        self._pendente = None
+        self._agendado = None
+        self._ultimo_desenho = 0.0
+        # Todo desenho completo (inclusive redimensionar a janela) renova o fundo do blitting
+        self.canvas.mpl_connect('draw_event', self._guardar_fundo)
+
+    def _valores(self, grupo):
+        # grupo: [(categoria, total_segundos, quantidade), ...] como em agregar_resumo
+        minutos = {chave: total / 60 for chave, total, _ in grupo}
+        categorias = self.categorias_fixas if self.categorias_fixas is not None else tuple(minutos)
+        return categorias, [minutos.get(chave, 0) for chave in categorias]
+
+    def agendar(self, grupo):
+        """
+        Atualiza com no máximo um desenho a cada INTERVALO_MINIMO ms; se vierem
+        várias atualizações nesse intervalo, só a última é desenhada.
+        """
+        self._pendente = grupo
+        if self._agendado is not None:
+            return
+        espera = self.INTERVALO_MINIMO - (time.monotonic() - self._ultimo_desenho) * 1000
+        self._agendado = self.widget.after(max(int(espera), 0), self._desenhar_pendente)
+
+    def _desenhar_pendente(self):
+        self._agendado = None
+        grupo, self._pendente = self._pendente, None
+        if grupo is not None:
+            self.atualizar(grupo)
+
+    def atualizar(self, grupo):
+        # Desenha já; fora do dashboard (testes, benchmarks) não há o que agendar
+        categorias, valores = self._valores(grupo)
+        self._ultimo_desenho = time.monotonic()
+        if categorias != self.categorias:
+            self._recriar(categorias, valores)
+            return
+        for barra, valor in zip(self.barras, valores):
+            barra.set_height(valor)
+        topo = self.eixo.get_ylim()[1]
+        maximo = max(valores, default=0)
+        if self._fundo is None or maximo > topo or maximo < topo / 4:
+            # Escala fora do lugar (ou fundo ainda não desenhado): eixos desenhados de novo
+            self.eixo.relim()
+            self.eixo.autoscale_view()
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._fundo)
+        for barra in self.barras:
+            self.eixo.draw_artist(barra)
+        self.canvas.blit(self.eixo.bbox)
+
+    def _recriar(self, categorias, valores):
+        if self.barras is not None:
+            self.barras.remove()
+        self.categorias = categorias
+        self._fundo = None
+        # Posições numéricas: o eixo categórico do matplotlib guardaria as categorias antigas
+        posicoes = range(len(categorias))
+        # animated: as barras ficam fora do fundo guardado e são desenhadas por cima dele
+        self.barras = self.eixo.bar(posicoes, valores, animated=True)
+        self.eixo.set_xticks(posicoes, [str(chave) for chave in categorias], rotation=self.rotacao)
+        self.eixo.relim()
+        self.eixo.autoscale_view()
+        self.figura.tight_layout()
+        self.canvas.draw_idle()
+
+    def _guardar_fundo(self, evento):
+        self._fundo = self.canvas.copy_from_bbox(self.eixo.bbox)
+        if self.barras is not None:
+            for barra in self.barras:
+                self.eixo.draw_artist(barra)
+            self.canvas.blit(self.eixo.bbox)
+
+    def destruir(self):
+        if self._agendado is not None:
+            self.widget.after_cancel(self._agendado)
+        self.widget.destroy()
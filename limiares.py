@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Ociosidade para vários limites de uma vez, a partir das lacunas de atividade.
+
+O agente grava cada pausa de pelo menos minimo_segundos (ociosidade_lacunas, ver
+atividade.RegistradorLacunas). Com um limite L, uma lacuna de duração d >= L é um
+período ocioso [início + L, início + d), de d - L segundos, exatamente como o
+monitor o teria gravado com tempo_ocioso = L. Assim "e se o limite fosse 2, 5 ou
+15 minutos?" é respondido para qualquer histórico, sem ter rodado com esses limites.
+
+Todos os limites saem de uma única passada: as durações são ordenadas uma vez por
+(grupo, duração) e as somas acumuladas dão, para cada par (grupo, limite), com uma
+busca binária, quantas lacunas passam do limite e a soma das suas durações. O custo
+é uma ordenação mais K buscas por grupo, em vez de uma varredura por limite.
+"""
+
+import numpy as np
+
+from intervalos import DIA, para_epoca
+
+# Chaves aceitas por analisar(por=...)
+AGRUPAMENTOS = (None, 'usuario', 'host', 'dia')
+
+def decodificar(blocos, dt_inicio=None, dt_fim=None):
+    """
+    Blocos de buscar_lacunas [(inicio, usuario, host, minimo_segundos, dados)] ->
+    (inicios, duracoes, grupos, chaves, minimo): arrays int64 alinhados com o início
+    de cada lacuna (segundos desde a época, relógio de parede), a duração e o índice
+    do par (usuario, host) em chaves; minimo é o maior minimo_segundos dos blocos.
+    Só entram as lacunas que começam entre dt_inicio e dt_fim.
+    """
+    vazio = np.empty(0, dtype=np.int64)
+    if not blocos:
+        return vazio, vazio, vazio, [], 0
+    codigos = {}
+    grupo_bloco = np.fromiter((codigos.setdefault((u, h), len(codigos)) for _, u, h, _, _ in blocos),
+                              np.int64, len(blocos))
+    quantidades = np.fromiter((len(dados) // 8 for *_, dados in blocos), np.int64, len(blocos))
+    pares = np.frombuffer(b''.join(dados for *_, dados in blocos), dtype='<u4').reshape(-1, 2).astype(np.int64)
+    inicios = np.repeat(para_epoca([inicio for inicio, *_ in blocos]), quantidades) + pares[:, 0]
+    duracoes = pares[:, 1]
+    grupos = np.repeat(grupo_bloco, quantidades)
+    dentro = np.ones(inicios.size, dtype=bool)
+    if dt_inicio:
+        dentro &= inicios >= para_epoca([dt_inicio])[0]
+    if dt_fim:
+        dentro &= inicios <= para_epoca([dt_fim])[0]
+    minimo = max(minimo for _, _, _, minimo, _ in blocos)
+    return inicios[dentro], duracoes[dentro], grupos[dentro], list(codigos), minimo
+
+def resumir_limiares(duracoes, limiares, grupos=None, n_grupos=1):
+    """
+    Para cada grupo e cada limite (segundos): quantos períodos ociosos as lacunas
+    dariam e quantos segundos somariam. Devolve (contagem, segundos), arrays
+    n_grupos x len(limiares). grupos é um código 0..n_grupos-1 por lacuna.
+    """
+    duracoes = np.asarray(duracoes, dtype=np.int64)
+    limiares = np.asarray(limiares, dtype=np.int64)
+    grupos = np.zeros(duracoes.size, dtype=np.int64) if grupos is None else np.asarray(grupos, dtype=np.int64)
+    if duracoes.size == 0:
+        zeros = np.zeros((n_grupos, limiares.size), dtype=np.int64)
+        return zeros, zeros.copy()
+    # Uma ordenação por (grupo, duração); a chave combinada mantém os grupos contíguos
+    ordem = np.lexsort((duracoes, grupos))
+    largura = int(duracoes.max()) + 2
+    chave = grupos[ordem] * largura + duracoes[ordem]
+    acumulada = np.concatenate(([0], np.cumsum(duracoes[ordem])))
+    base = np.arange(n_grupos, dtype=np.int64)[:, None] * largura
+    # Primeira lacuna >= L de cada grupo e o fim do grupo
+    desde = np.searchsorted(chave, base + np.minimum(limiares, largura - 1)[None, :], 'left')
+    ate = np.searchsorted(chave, base + largura, 'left')
+    ate = np.broadcast_to(ate, desde.shape)
+    contagem = ate - desde
+    segundos = acumulada[ate] - acumulada[desde] - limiares[None, :] * contagem
+    return contagem, segundos
+
+def analisar(db, limiares, dt_inicio=None, dt_fim=None, usuario=None, host=None, por=None,
+             omitir_abaixo_do_minimo=False):
+    """
+    Compara limites de ociosidade (segundos) sobre as lacunas gravadas no período.
+    Devolve [(chave, limiar, periodos, segundos)] em ordem de chave e limiar; chave é
+    None, o usuário, o host ou a data (por='dia', pela data de início da lacuna).
+    Levanta ValueError para limites abaixo do mínimo com que as lacunas foram gravadas
+    (com omitir_abaixo_do_minimo, eles só ficam de fora do resultado).
+    """
+    if por not in AGRUPAMENTOS:
+        raise ValueError(f"Agrupamento inválido: {por!r} (use usuario, host ou dia)")
+    limiares = sorted(set(int(limiar) for limiar in limiares))
+    if not limiares or limiares[0] <= 0:
+        raise ValueError("Informe limites positivos, em segundos.")
+    blocos = db.buscar_lacunas(dt_inicio, dt_fim, usuario, host)
+    inicios, duracoes, grupos, chaves, minimo = decodificar(blocos, dt_inicio, dt_fim)
+    if omitir_abaixo_do_minimo and limiares[-1] >= minimo:
+        limiares = [limiar for limiar in limiares if limiar >= minimo]
+    if limiares[0] < minimo:
+        raise ValueError(f"As lacunas foram gravadas a partir de {minimo} s; limites menores não podem ser "
+                         f"calculados: {limiares[0]} s")
+    if por is None:
+        rotulos = [None]
+        grupos = np.zeros(inicios.size, dtype=np.int64)
+    elif por == 'dia':
+        dias, grupos = np.unique(inicios // DIA, return_inverse=True)
+        rotulos = [np.datetime64(int(dia), 'D').item() for dia in dias]
+    else:
+        posicao = 0 if por == 'usuario' else 1
+        nomes = sorted(set(chave[posicao] for chave in chaves))
+        indice = {nome: i for i, nome in enumerate(nomes)}
+        grupos = np.array([indice[chave[posicao]] for chave in chaves], dtype=np.int64)[grupos]
+        rotulos = nomes
+    contagem, segundos = resumir_limiares(duracoes, limiares, grupos, len(rotulos))
+    return [(rotulo, limiar, int(contagem[g, k]), int(segundos[g, k]))
+            for g, rotulo in enumerate(rotulos) for k, limiar in enumerate(limiares)]
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Comandos de manutenção do banco do monitor de ociosidade.
+
+Uso:
+python manutencao.py migrar
+python manutencao.py reconstruir-resumo
+python manutencao.py particionar [--meses-a-frente 3]
+python manutencao.py retencao --meses 12
+python manutencao.py explicar [--de AAAA-MM-DD] [--ate AAAA-MM-DD]
+python manutencao.py limiares --limiares 2 5 15 [--de ...] [--ate ...] [--por usuario|host|dia]
+python manutencao.py relatorio --de AAAA-MM-DD --ate AAAA-MM-DD [--por usuario|host|estacao] [--processos N]
+python manutencao.py --banco sqlite:///ociosidade.db reconstruir-resumo
+
+A retenção pode ser agendada (Agendador de Tarefas/cron); ela também cria as
+partições dos próximos meses quando a tabela é particionada. Particionamento e
+retenção só existem no MySQL; migrar, reconstruir-resumo e explicar valem para
+qualquer backend.
+"""
+
+import argparse
+import functools
+import sys
+
+import migracoes
+from banco import DBHelper, abrir_banco
+from exportacao import montar_filtros
+
+def reconstruir_resumo(db, args):
+    linhas = db.reconstruir_resumo()
+    print(f"Resumo por hora reconstruído: {linhas} linhas.")
+
+def _exigir_mysql(db, comando):
+    if not isinstance(db, DBHelper):
+        sys.exit(f"{comando}: disponível só no backend MySQL.")
+
+def migrar(db, args):
+    # Os backends já aplicam as migrações pendentes ao abrir; aqui só informa o estado
+    if not isinstance(db, DBHelper):
+        import banco_sqlite
+        versao = db.versao_esquema()
+        for numero, descricao, _ in banco_sqlite.MIGRACOES:
+            print(f"{numero:3d} {'ok' if numero <= versao else 'pendente'}  {descricao}")
+        return
+    with db.pool.conexao() as c:
+        cursor = c.cursor()
+        aplicadas = migracoes.versoes_aplicadas(cursor)
+        cursor.close()
+    for versao, descricao, _ in migracoes.MIGRACOES:
+        print(f"{versao:3d} {'ok' if versao in aplicadas else 'pendente'}  {descricao}")
+
+def particionar(db, args):
+    _exigir_mysql(db, 'particionar')
+    with db.pool.conexao() as c:
+        if migracoes.particionar(c.conn, args.meses_a_frente):
+            print("ociosidade_log particionada por mês.")
+        else:
+            print("ociosidade_log já é particionada.")
+
+def retencao(db, args):
+    _exigir_mysql(db, 'retencao')
+    with db.pool.conexao() as c:
+        criadas = migracoes.garantir_particoes(c.conn, args.meses_a_frente)
+        removidas, apagadas = migracoes.aplicar_retencao(c.conn, args.meses)
+    if criadas:
+        print(f"Partições criadas: {', '.join(criadas)}")
+    if removidas:
+        print(f"Partições removidas: {', '.join(removidas)}")
+    else:
+        print(f"Registros apagados: {apagadas}")
+
+def explicar(db, args):
+    filtros = montar_filtros(args.de, args.ate)
+    plano = db.explicar_buscar_logs(**filtros)
+    for linha in plano:
+        print(f"tabela={linha.get('table')} tipo={linha.get('type')} indice={linha.get('key')} "
+              f"linhas={linha.get('rows')} extra={linha.get('Extra')}")
+    # Sem índice (varredura completa) com filtro de data é regressão de desempenho
+    if filtros and any(linha.get('key') is None for linha in plano):
+        sys.exit(1)
+
+def comparar_limiares(db, args):
+    # NumPy só é carregado por este comando
+    import limiares
+    filtros = montar_filtros(args.de, args.ate, args.usuario, args.filtro_host)
+    try:
+        linhas = limiares.analisar(db, [round(m * 60) for m in args.limiares], por=args.por, **filtros)
+    except ValueError as e:
+        sys.exit(f"limiares: {e}")
+    for chave, limiar, periodos, segundos in linhas:
+        rotulo = '' if chave is None else f"{chave}  "
+        print(f"{rotulo}{limiar / 60:g} min: {periodos} períodos, {segundos / 3600:.2f} h ociosas")
+
+def _minutos(segundos):
+    return '-' if segundos is None else f"{segundos / 60:.1f}"
+
+def relatorio(db, args):
+    # NumPy e o pool de processos só são carregados por este comando
+    import relatorios
+    filtros = montar_filtros(args.de, args.ate, args.usuario, args.filtro_host)
+    if 'dt_inicio' not in filtros or 'dt_fim' not in filtros:
+        sys.exit("relatorio: informe --de e --ate.")
+    # Cada processo abre a sua conexão com os mesmos parâmetros
+    fabrica = functools.partial(abrir_banco, args.banco, args.host, args.user, args.password, args.database)
+    linhas = relatorios.gerar_relatorio(
+        fabrica, filtros['dt_inicio'], filtros['dt_fim'], por=None if args.por == 'estacao' else args.por,
+        usuario=filtros.get('usuario'), host=filtros.get('host'), processos=args.processos,
+        dias_por_particao=args.dias_por_particao, expediente=tuple(args.expediente), tolerancia=args.tolerancia)
+    print("chave; períodos; total (h); média (min); p50; p90; p99 (min); expediente ocioso; maior sequência")
+    for linha in linhas:
+        chave = '/'.join(linha['chave']) if isinstance(linha['chave'], tuple) else linha['chave']
+        sequencias = linha['maiores_sequencias']
+        maior = f"{sequencias[0][0]:%Y-%m-%d %H:%M} a {sequencias[0][1]:%Y-%m-%d %H:%M}" if sequencias else '-'
+        print(f"{chave}; {linha['periodos']}; {linha['total_segundos'] / 3600:.2f}; "
+              f"{_minutos(linha['media_segundos'])}; {_minutos(linha['p50_segundos'])}; "
+              f"{_minutos(linha['p90_segundos'])}; {_minutos(linha['p99_segundos'])}; "
+              f"{linha['fracao_expediente']:.1%}; {maior}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção do banco monitor_ociosidade")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='monitor_ociosidade')
+    parser.add_argument('--banco', help='URL do backend (mysql://, sqlite:///arquivo.db); '
+                                        'padrão: OCIOSIDADE_BANCO ou o MySQL de --host/--user/...')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    cmd = comandos.add_parser('reconstruir-resumo',
+                              help='refaz ociosidade_resumo_hora a partir de todo o ociosidade_log')
+    cmd.set_defaults(executar=reconstruir_resumo)
+
+    cmd = comandos.add_parser('migrar', help='aplica e lista as migrações do esquema')
+    cmd.set_defaults(executar=migrar)
+
+    cmd = comandos.add_parser('particionar', help='particiona ociosidade_log por mês (reescreve a tabela)')
+    cmd.add_argument('--meses-a-frente', type=int, default=3)
+    cmd.set_defaults(executar=particionar)
+
+    cmd = comandos.add_parser('retencao', help='remove meses antigos de ociosidade_log')
+    cmd.add_argument('--meses', type=int, required=True, help='quantidade de meses mantidos')
+    cmd.add_argument('--meses-a-frente', type=int, default=3)
+    cmd.set_defaults(executar=retencao)
+
+    cmd = comandos.add_parser('explicar', help='mostra o plano de execução de buscar_logs')
+    cmd.add_argument('--de', default='')
+    cmd.add_argument('--ate', default='')
+    cmd.set_defaults(executar=explicar)
+
+    cmd = comandos.add_parser('limiares', help='compara limites de ociosidade sobre as lacunas gravadas')
+    cmd.add_argument('--limiares', type=float, nargs='+', default=[2, 5, 15], help='limites em minutos')
+    cmd.add_argument('--de', default='')
+    cmd.add_argument('--ate', default='')
+    cmd.add_argument('--usuario', default='')
+    cmd.add_argument('--host', dest='filtro_host', default='')
+    cmd.add_argument('--por', choices=('usuario', 'host', 'dia'))
+    cmd.set_defaults(executar=comparar_limiares)
+
+    cmd = comandos.add_parser('relatorio', help='estatísticas por usuário/host, calculadas em paralelo')
+    cmd.add_argument('--de', default='')
+    cmd.add_argument('--ate', default='')
+    cmd.add_argument('--usuario', default='')
+    cmd.add_argument('--host', dest='filtro_host', default='')
+    cmd.add_argument('--por', choices=('usuario', 'host', 'estacao'), default='usuario',
+                     help='estacao = par usuário/host')
+    cmd.add_argument('--processos', type=int, help='padrão: um por núcleo')
+    cmd.add_argument('--dias-por-particao', type=int, default=7)
+    cmd.add_argument('--expediente', type=int, nargs=2, default=[8, 18], metavar=('INICIO', 'FIM'),
+                     help='horas do expediente nos dias úteis')
+    cmd.add_argument('--tolerancia', type=int, default=120,
+                     help='segundos de atividade que ainda emendam uma sequência de ociosidade')
+    cmd.set_defaults(executar=relatorio)
+
+    args = parser.parse_args()
+    db = abrir_banco(args.banco, args.host, args.user, args.password, args.database)
+    args.executar(db, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de execução do monitor e do dashboard, no formato texto do Prometheus.
+
+Contadores, medidores e histogramas ficam em um registro global (REGISTRO) e são
+atualizados nos pontos de interesse (detecção, gravação, consultas, tabela).
+Valores que já existem em outro lugar (contagem de eventos de entrada por fonte,
+tamanho da fila de gravação) não são duplicados no caminho quente: são lidos só
+na hora da coleta, por funções registradas com coletar().
+
+servir() expõe GET /metrics em uma porta local; o painel de diagnóstico do
+dashboard lê o mesmo registro. AmostradorPerfil é um perfilador por amostragem
+(pilhas de todas as threads a intervalos fixos) para ligar só durante a análise.
+"""
+
+import bisect
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+
+# Limites dos histogramas de tempo, em segundos
+BALDES_TEMPO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _rotulos(nomes, valores):
+    if not nomes:
+        return ''
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(nomes, valores)) + '}'
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _serie(self, valores):
+        if len(valores) != len(self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}")
+        return tuple(str(v) for v in valores)
+
+    def series(self):
+        # Combinações de rótulos já vistas
+        with self._lock:
+            return list(self._series)
+
+    def linhas(self):
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} {self.tipo}"
+        with self._lock:
+            series = list(self._series.items())
+        for valores, valor in series:
+            yield from self._linhas_serie(valores, valor)
+
+    def _linhas_serie(self, valores, valor):
+        yield f"{self.nome}{_rotulos(self.rotulos, valores)} {valor:g}"
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def inc(self, *valores, n=1):
+        chave = self._serie(valores)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + n
+
+    def definir(self, valor, *valores):
+        # Para contadores mantidos em outro lugar e copiados na coleta
+        chave = self._serie(valores)
+        with self._lock:
+            self._series[chave] = valor
+
+    def valor(self, *valores):
+        return self._series.get(self._serie(valores), 0)
+
+class Medidor(_Metrica):
+    tipo = 'gauge'
+
+    def definir(self, valor, *valores):
+        chave = self._serie(valores)
+        with self._lock:
+            self._series[chave] = valor
+
+    def valor(self, *valores):
+        return self._series.get(self._serie(valores), 0)
+
+class _Distribuicao:
+    __slots__ = ('baldes', 'soma', 'contagem', 'maximo')
+
+    def __init__(self, quantidade):
+        self.baldes = [0] * quantidade
+        self.soma = 0.0
+        self.contagem = 0
+        self.maximo = 0.0
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), limites=BALDES_TEMPO):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(limites)
+
+    def observar(self, valor, *valores):
+        chave = self._serie(valores)
+        posicao = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            dist = self._series.get(chave)
+            if dist is None:
+                dist = self._series[chave] = _Distribuicao(len(self.limites) + 1)
+            dist.baldes[posicao] += 1
+            dist.soma += valor
+            dist.contagem += 1
+            if valor > dist.maximo:
+                dist.maximo = valor
+
+    def cronometrar(self, *valores):
+        return _Cronometro(self, valores)
+
+    def resumo(self, *valores):
+        # (contagem, média, máximo) para o painel de diagnóstico
+        dist = self._series.get(self._serie(valores))
+        if dist is None or not dist.contagem:
+            return 0, 0.0, 0.0
+        return dist.contagem, dist.soma / dist.contagem, dist.maximo
+
+    def _linhas_serie(self, valores, dist):
+        acumulado = 0
+        for limite, quantidade in zip(self.limites + (float('inf'),), dist.baldes):
+            acumulado += quantidade
+            le = '+Inf' if limite == float('inf') else f'{limite:g}'
+            yield f"{self.nome}_bucket{_rotulos(self.rotulos + ('le',), valores + (le,))} {acumulado}"
+        yield f"{self.nome}_sum{_rotulos(self.rotulos, valores)} {dist.soma:g}"
+        yield f"{self.nome}_count{_rotulos(self.rotulos, valores)} {dist.contagem}"
+
+class _Cronometro:
+    __slots__ = ('histograma', 'valores', 'inicio')
+
+    def __init__(self, histograma, valores):
+        self.histograma = histograma
+        self.valores = valores
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observar(time.perf_counter() - self.inicio, *self.valores)
+        return False
+
+class Registro:
+    """
+    Conjunto de métricas do processo; métricas com o mesmo nome são reaproveitadas.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metricas = {}
+        self._coletas = {}
+
+    def _obter(self, classe, nome, ajuda, rotulos, **opcoes):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, ajuda, rotulos, **opcoes)
+            return metrica
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._obter(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome, ajuda, rotulos=()):
+        return self._obter(Medidor, nome, ajuda, rotulos)
+
+    def histograma(self, nome, ajuda, rotulos=(), limites=BALDES_TEMPO):
+        return self._obter(Histograma, nome, ajuda, rotulos, limites=limites)
+
+    def coletar(self, chave, funcao):
+        """
+        Registra funcao(), chamada a cada coleta para atualizar métricas a partir de
+        valores mantidos em outro lugar. Uma nova função com a mesma chave substitui
+        a anterior (ex.: monitor reiniciado).
+        """
+        with self._lock:
+            self._coletas[chave] = funcao
+
+    def atualizar(self):
+        with self._lock:
+            coletas = list(self._coletas.values())
+        for funcao in coletas:
+            try:
+                funcao()
+            except Exception:
+                pass
+
+    def texto(self):
+        # Exposição no formato texto 0.0.4 do Prometheus
+        self.atualizar()
+        with self._lock:
+            metricas = list(self._metricas.values())
+        return '\n'.join(linha for metrica in metricas for linha in metrica.linhas()) + '\n'
+
+REGISTRO = Registro()
+
+# Métricas usadas em mais de um módulo
+EVENTOS_ENTRADA = REGISTRO.contador('ociosidade_eventos_entrada_total',
+                                    'Eventos de teclado/mouse recebidos, por fonte', ('fonte',))
+ATRASO_DETECCAO = REGISTRO.histograma('ociosidade_deteccao_atraso_segundos',
+                                      'Atraso da thread de detecção em relação ao prazo ou ao evento', ('momento',))
+PERIODOS_OCIOSOS = REGISTRO.contador('ociosidade_periodos_total', 'Períodos ociosos detectados')
+FILA_GRAVACAO = REGISTRO.medidor('ociosidade_fila_gravacao', 'Períodos aguardando gravação no banco')
+GRAVACAO_BANCO = REGISTRO.histograma('ociosidade_banco_gravacao_segundos',
+                                     'Duração das gravações no banco', ('operacao',))
+FALHAS_BANCO = REGISTRO.contador('ociosidade_banco_falhas_total', 'Gravações no banco que falharam',
+                                 ('operacao',))
+CONSULTA_BANCO = REGISTRO.histograma('ociosidade_consulta_segundos', 'Duração das consultas ao banco',
+                                     ('consulta',))
+LINHAS_CONSULTA = REGISTRO.contador('ociosidade_consulta_linhas_total', 'Linhas devolvidas pelas consultas',
+                                    ('consulta',))
+ATUALIZACAO_TABELA = REGISTRO.histograma('ociosidade_tabela_atualizacao_segundos',
+                                         'Duração da atualização da tabela do dashboard', ('modo',))
+
+def medir_consulta(nome):
+    """
+    Decorador de consultas do DBHelper: registra a duração e o número de linhas
+    devolvidas (a lista, ou o primeiro item de uma tupla (linhas, ...)).
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = funcao(*args, **kwargs)
+            CONSULTA_BANCO.observar(time.perf_counter() - inicio, nome)
+            linhas = resultado[0] if isinstance(resultado, tuple) else resultado
+            LINHAS_CONSULTA.inc(nome, n=len(linhas))
+            return resultado
+        return medida
+    return decorador
+
+def medir_gravacao(nome):
+    # Decorador de gravações do DBHelper: duração (com ou sem sucesso) e falhas
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            except Exception:
+                FALHAS_BANCO.inc(nome)
+                raise
+            finally:
+                GRAVACAO_BANCO.observar(time.perf_counter() - inicio, nome)
+        return medida
+    return decorador
+
+def _responder_metricas(manipulador, registro):
+    if manipulador.path.split('?')[0] != '/metrics':
+        manipulador.send_error(404)
+        return
+    corpo = registro.texto().encode('utf-8')
+    manipulador.send_response(200)
+    manipulador.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+    manipulador.send_header('Content-Length', str(len(corpo)))
+    manipulador.end_headers()
+    manipulador.wfile.write(corpo)
+
+def servir(porta=9464, endereco='127.0.0.1', registro=REGISTRO):
+    """
+    Expõe GET /metrics em uma thread daemon. Só escuta em localhost por padrão.
+    Devolve o servidor (servidor.shutdown() para parar; server_address tem a porta).
+    """
+    # http.server só é carregado quando o endpoint é ligado (partida do agente)
+    import http.server
+
+    class Manipulador(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            _responder_metricas(self, registro)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = http.server.ThreadingHTTPServer((endereco, porta), Manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='metricas', daemon=True).start()
+    return servidor
+
+class AmostradorPerfil(threading.Thread):
+    """
+    Perfilador por amostragem: a cada `intervalo` segundos registra a pilha de todas
+    as outras threads. Custo fixo por amostra, independente de quanto código roda,
+    e nenhum custo quando desligado. mais_frequentes() lista as funções em que as
+    threads mais foram vistas; pilhas() devolve o formato "collapsed" dos flame graphs.
+    """
+    def __init__(self, intervalo=0.005, profundidade=30):
+        super().__init__(name='perfilador', daemon=True)
+        self.intervalo = intervalo
+        self.profundidade = profundidade
+        self.amostras = 0
+        self._pilhas = collections.Counter()
+        self._proprias = collections.Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        proprio = threading.get_ident()
+        nomes = {}
+        while not self._parar.wait(self.intervalo):
+            nomes.update((t.ident, t.name) for t in threading.enumerate())
+            for ident, quadro in sys._current_frames().items():
+                if ident == proprio:
+                    continue
+                pilha = []
+                while quadro is not None and len(pilha) < self.profundidade:
+                    codigo = quadro.f_code
+                    pilha.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{quadro.f_lineno})")
+                    quadro = quadro.f_back
+                if not pilha:
+                    continue
+                self._proprias[pilha[0]] += 1
+                self._pilhas[(nomes.get(ident, str(ident)),) + tuple(reversed(pilha))] += 1
+            self.amostras += 1
+
+    def parar(self):
+        self._parar.set()
+        if self.is_alive():
+            self.join(1)
+
+    def mais_frequentes(self, n=15):
+        # [(função no topo da pilha, fração das amostras)]
+        total = sum(self._proprias.values()) or 1
+        return [(funcao, quantidade / total) for funcao, quantidade in self._proprias.most_common(n)]
+
+    def pilhas(self):
+        return '\n'.join(';'.join(pilha) + f' {quantidade}' for pilha, quantidade in self._pilhas.most_common())
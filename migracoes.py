@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Migrações versionadas do esquema do banco monitor_ociosidade.
+
+Cada migração tem um número de versão e só é aplicada uma vez; as versões já
+aplicadas ficam na tabela schema_versao. Todas são idempotentes, para que um
+banco criado antes deste mecanismo (tabelas já existentes, sem schema_versao)
+seja atualizado sem erro. Um GET_LOCK evita que dois processos migrem ao mesmo
+tempo.
+
+O particionamento mensal de ociosidade_log é opcional, porque reescreve a
+tabela: particionar() converte a tabela, garantir_particoes() cria os meses
+seguintes e aplicar_retencao() descarta meses antigos com DROP PARTITION (ou, sem
+partições, com DELETE em blocos pelo índice de data).
+"""
+
+import datetime
+
+from resumo import preencher_resumo
+
+TABELA_LOG = 'ociosidade_log'
+NOME_LOCK = 'monitor_ociosidade_migracao'
+
+def _m1_tabela_log(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_log (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        inicio_ocioso DATETIME,
+        fim_ocioso DATETIME,
+        duracao_segundos INT,
+        usuario VARCHAR(64),
+        host VARCHAR(64)
+    )
+    """)
+
+def _m2_resumo_hora(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_resumo_hora (
+        dia DATE NOT NULL,
+        hora TINYINT NOT NULL,
+        usuario VARCHAR(64) NOT NULL,
+        host VARCHAR(64) NOT NULL,
+        total_segundos BIGINT NOT NULL DEFAULT 0,
+        eventos INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, hora, usuario, host)
+    )
+    """)
+    # O histórico já existente é somado pela migração 4
+
+def _m3_indices(cursor):
+    # Filtros e ordenação por data; relatórios por usuário/host dentro de um período.
+    # O InnoDB inclui o id em todo índice secundário, então (inicio_ocioso) também
+    # atende à chave de paginação (inicio_ocioso, id).
+    _criar_indice(cursor, TABELA_LOG, 'idx_inicio', 'inicio_ocioso')
+    _criar_indice(cursor, TABELA_LOG, 'idx_usuario_host_inicio', 'usuario, host, inicio_ocioso')
+
+def _m4_resumo_repartido(cursor):
+    # O resumo somava a duração inteira na hora de início; refaz repartindo cada
+    # período entre as horas que ele cobre
+    cursor.execute("DELETE FROM ociosidade_resumo_hora")
+    preencher_resumo(cursor)
+
+def _m5_evento_id(cursor):
+    # Identificador do evento gerado no agente: o coletor grava cada evento uma vez só,
+    # mesmo que o agente reenvie o lote. A chave única inclui inicio_ocioso porque em
+    # tabela particionada toda chave única precisa conter a coluna de partição.
+    cursor.execute("""
+    SELECT COUNT(*) FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = %s AND column_name = 'evento_id'
+    """, (TABELA_LOG,))
+    if not cursor.fetchone()[0]:
+        cursor.execute("ALTER TABLE ociosidade_log ADD COLUMN evento_id CHAR(32) NULL")
+    _criar_indice(cursor, TABELA_LOG, 'uq_evento', 'evento_id, inicio_ocioso', unico=True)
+
+def _m6_atividade_minuto(cursor):
+    # Densidade de atividade: eventos de entrada por minuto e fonte, só os minutos com
+    # eventos. A chave começa pelo host para "quão ativo estava o host X entre 14h e 15h"
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_atividade_minuto (
+        host VARCHAR(64) NOT NULL,
+        minuto DATETIME NOT NULL,
+        usuario VARCHAR(64) NOT NULL,
+        teclado INT UNSIGNED NOT NULL DEFAULT 0,
+        movimento INT UNSIGNED NOT NULL DEFAULT 0,
+        clique INT UNSIGNED NOT NULL DEFAULT 0,
+        rolagem INT UNSIGNED NOT NULL DEFAULT 0,
+        PRIMARY KEY (host, minuto, usuario),
+        KEY idx_minuto (minuto)
+    )
+    """)
+
+def _m7_lacunas(cursor):
+    # Lacunas de atividade (pausas de pelo menos minimo_segundos) em blocos compactos,
+    # um por descarga do agente: dados = pares uint32 (deslocamento do início, duração).
+    # Ver atividade.codificar_lacunas e limiares.py
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ociosidade_lacunas (
+        id BIGINT PRIMARY KEY AUTO_INCREMENT,
+        host VARCHAR(64) NOT NULL,
+        usuario VARCHAR(64) NOT NULL,
+        inicio DATETIME NOT NULL,
+        fim DATETIME NOT NULL,
+        minimo_segundos INT NOT NULL,
+        quantidade INT NOT NULL,
+        dados MEDIUMBLOB NOT NULL,
+        KEY idx_host_inicio (host, inicio),
+        KEY idx_inicio (inicio)
+    )
+    """)
+
+MIGRACOES = [
+    (1, "Tabela ociosidade_log", _m1_tabela_log),
+    (2, "Resumo por hora (ociosidade_resumo_hora)", _m2_resumo_hora),
+    (3, "Índices por data e por usuário/host/data", _m3_indices),
+    (4, "Resumo por hora com períodos repartidos entre as horas", _m4_resumo_repartido),
+    (5, "Identificador único de evento (evento_id) para o coletor", _m5_evento_id),
+    (6, "Densidade de atividade por minuto (ociosidade_atividade_minuto)", _m6_atividade_minuto),
+    (7, "Lacunas de atividade em blocos (ociosidade_lacunas)", _m7_lacunas),
+]
+
+def _criar_indice(cursor, tabela, nome, colunas, unico=False):
+    # CREATE INDEX IF NOT EXISTS só existe no MariaDB; consulta o catálogo antes
+    cursor.execute("""
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (tabela, nome))
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE {'UNIQUE ' if unico else ''}INDEX {nome} ON {tabela} ({colunas})")
+
+def versoes_aplicadas(cursor):
+    cursor.execute("SELECT versao FROM schema_versao")
+    return {versao for (versao,) in cursor.fetchall()}
+
+def migrar(conn):
+    """
+    Aplica, em ordem, as migrações ainda não registradas em schema_versao.
+    Devolve a lista de versões aplicadas nesta chamada.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 60)", (NOME_LOCK,))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Não foi possível obter o lock de migração do banco.")
+        try:
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_versao (
+                versao INT PRIMARY KEY,
+                descricao VARCHAR(255),
+                aplicada_em DATETIME
+            )
+            """)
+            aplicadas = versoes_aplicadas(cursor)
+            novas = []
+            for versao, descricao, migracao in MIGRACOES:
+                if versao in aplicadas:
+                    continue
+                migracao(cursor)
+                cursor.execute("INSERT INTO schema_versao (versao, descricao, aplicada_em) VALUES (%s, %s, NOW())",
+                               (versao, descricao))
+                conn.commit()
+                novas.append(versao)
+            return novas
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (NOME_LOCK,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+def _primeiro_dia_mes(data, meses=0):
+    total = data.year * 12 + data.month - 1 + meses
+    return datetime.date(total // 12, total % 12 + 1, 1)
+
+def _nome_particao(mes):
+    return f"p{mes:%Y%m}"
+
+def _definicao_particao(mes):
+    # A partição pAAAAMM guarda o mês AAAA-MM (tudo antes do primeiro dia do mês seguinte)
+    return f"PARTITION {_nome_particao(mes)} VALUES LESS THAN (TO_DAYS('{_primeiro_dia_mes(mes, 1):%Y-%m-%d}'))"
+
+def _mes_da_particao(nome):
+    # pAAAAMM -> date(AAAA, MM, 1); None para pfuturo ou nomes fora do padrão
+    if len(nome) == 7 and nome.startswith('p') and nome[1:].isdigit():
+        return datetime.date(int(nome[1:5]), int(nome[5:7]), 1)
+    return None
+
+def particoes(cursor, tabela=TABELA_LOG):
+    """
+    Partições da tabela como [(nome, expressão do limite)], em ordem; [] se não particionada.
+    """
+    cursor.execute("""
+    SELECT partition_name, partition_description FROM information_schema.partitions
+    WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+    ORDER BY partition_ordinal_position
+    """, (tabela,))
+    return cursor.fetchall()
+
+def particionar(conn, meses_a_frente=3, hoje=None):
+    """
+    Converte ociosidade_log para particionamento mensal por RANGE(TO_DAYS(inicio_ocioso)).
+    A chave primária passa a ser (id, inicio_ocioso), exigência do MySQL para tabelas
+    particionadas. Cria uma partição por mês desde o registro mais antigo até
+    meses_a_frente meses depois de hoje, mais pfuturo (MAXVALUE).
+    """
+    hoje = hoje or datetime.date.today()
+    cursor = conn.cursor()
+    try:
+        if particoes(cursor):
+            return False
+        cursor.execute("SELECT SUM(inicio_ocioso IS NULL), MIN(inicio_ocioso) FROM ociosidade_log")
+        nulos, mais_antigo = cursor.fetchone()
+        if nulos:
+            raise RuntimeError(f"{nulos} registros sem inicio_ocioso impedem o particionamento.")
+        mes = _primeiro_dia_mes(mais_antigo or hoje)
+        ultimo = _primeiro_dia_mes(hoje, meses_a_frente)
+        definicoes = []
+        while mes <= ultimo:
+            definicoes.append(_definicao_particao(mes))
+            mes = _primeiro_dia_mes(mes, 1)
+        definicoes.append("PARTITION pfuturo VALUES LESS THAN MAXVALUE")
+        cursor.execute("""
+        ALTER TABLE ociosidade_log
+            MODIFY inicio_ocioso DATETIME NOT NULL,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id, inicio_ocioso)
+        """)
+        cursor.execute("ALTER TABLE ociosidade_log PARTITION BY RANGE (TO_DAYS(inicio_ocioso)) (\n"
+                       + ",\n".join(definicoes) + "\n)")
+        return True
+    finally:
+        cursor.close()
+
+def garantir_particoes(conn, meses_a_frente=3, hoje=None):
+    """
+    Separa de pfuturo as partições dos próximos meses que ainda não existem.
+    Devolve os nomes criados (nada a fazer se a tabela não é particionada).
+    """
+    hoje = hoje or datetime.date.today()
+    cursor = conn.cursor()
+    try:
+        meses = [_mes_da_particao(nome) for nome, _ in particoes(cursor)]
+        meses = [mes for mes in meses if mes is not None]
+        if not meses:
+            return []
+        # Continua a partir do último mês existente, sem deixar buracos
+        mes = _primeiro_dia_mes(max(meses), 1)
+        ultimo = _primeiro_dia_mes(hoje, meses_a_frente)
+        novas = []
+        while mes <= ultimo:
+            novas.append(mes)
+            mes = _primeiro_dia_mes(mes, 1)
+        if novas:
+            definicoes = [_definicao_particao(mes) for mes in novas]
+            definicoes.append("PARTITION pfuturo VALUES LESS THAN MAXVALUE")
+            cursor.execute("ALTER TABLE ociosidade_log REORGANIZE PARTITION pfuturo INTO (\n"
+                           + ",\n".join(definicoes) + "\n)")
+        return [_nome_particao(mes) for mes in novas]
+    finally:
+        cursor.close()
+
+def aplicar_retencao(conn, meses, hoje=None, tamanho_bloco=10000):
+    """
+    Remove de ociosidade_log os meses anteriores aos últimos `meses` meses. Com a
+    tabela particionada, descarta partições inteiras (DROP PARTITION, instantâneo);
+    sem partições, apaga em blocos pelo índice de data. O resumo por hora é mantido.
+    Devolve (partições removidas, linhas apagadas por DELETE).
+    """
+    hoje = hoje or datetime.date.today()
+    corte = _primeiro_dia_mes(hoje, -meses)
+    cursor = conn.cursor()
+    try:
+        existentes = particoes(cursor)
+        if existentes:
+            antigas = [nome for nome, _ in existentes
+                       if _mes_da_particao(nome) is not None and _mes_da_particao(nome) < corte]
+            if antigas:
+                cursor.execute(f"ALTER TABLE ociosidade_log DROP PARTITION {', '.join(antigas)}")
+            return antigas, 0
+        apagadas = 0
+        while True:
+            cursor.execute("DELETE FROM ociosidade_log WHERE inicio_ocioso < %s LIMIT %s", (corte, tamanho_bloco))
+            conn.commit()
+            apagadas += cursor.rowcount
+            if cursor.rowcount < tamanho_bloco:
+                return [], apagadas
+    finally:
+        cursor.close()
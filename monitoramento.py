@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Detecção de ociosidade por prazo (deadline), independente da interface gráfica.
+
+A thread não acorda mais a cada segundo: ela dorme exatamente até o momento em
+que o limite de ociosidade pode expirar (último evento + tempo_ocioso, em relógio
+monotônico). Durante um período ocioso ela fica bloqueada até que um evento de
+teclado/mouse a acorde para fechar o intervalo.
+
+Custo: o polling acorda uma vez por segundo de relógio. Este motor acorda cerca de
+duas vezes por período ocioso (o prazo e o evento que o fecha), mais uma vez por
+tempo_ocioso de atividade contínua (o prazo calculado antes dos últimos eventos
+vence cedo e é refeito). Cada despertar custa na ordem de 0,1 ms de CPU da thread,
+e a contabilidade de um período (métricas, lacuna, callbacks, fila do escritor),
+uns 20 µs. Por isso, com limites e pausas de poucos segundos (o cenário padrão de
+benchmarks/deteccao.py, com tempo_ocioso de 1 s), os dois gastam o mesmo ou o
+motor por prazo gasta um pouco mais. Com limites reais (a partir de 30 s) e
+estações paradas por minutos ou horas, ele acorda dezenas a milhares de vezes
+menos.
+
+Com minimo_lacuna (padrão 60 s) a thread acorda também quando uma pausa chega a
+esse tamanho e registra cada lacuna de atividade (do último evento ao seguinte)
+em atividade.RegistradorLacunas, independentemente do tempo_ocioso; com elas a
+ociosidade pode ser recalculada depois para outros limites (limiares.py).
+
+As configurações (tempo_ocioso, janela_movimento) podem ser trocadas com a thread
+rodando, por reconfigurar(): nada é recriado e o novo limite vale a partir do
+próximo prazo, sem perder um período ocioso em andamento.
+
+O movimento do mouse (centenas de chamadas por segundo) tem um caminho rápido
+próprio: rajadas são agrupadas em um único carimbo de atividade por janela
+(janela_movimento), sem lock. A imprecisão máxima no início da ociosidade é o
+tamanho dessa janela.
+"""
+
+import threading
+import time
+import os
+import socket
+import datetime
+
+import metricas
+from atividade import FONTES, DensidadeAtividade, RegistradorLacunas
+from banco import abrir_banco
+from escritor import EscritorOciosidade
+
+TECLADO, MOVIMENTO, CLIQUE, ROLAGEM = range(len(FONTES))
+
+_agora = time.monotonic
+
+def _usuario_atual():
+    # os.getlogin() falha sem terminal associado (serviços, agendador de tarefas)
+    try:
+        return os.getlogin()
+    except (AttributeError, OSError):
+        return os.environ.get('USERNAME') or os.environ.get('USER') or 'unknown'
+
+class OciosidadeMonitor(threading.Thread):
+    """
+    Thread principal responsável por monitorar eventos de teclado e mouse.
+    Detecta início e fim da ociosidade e salva eventos no banco de dados.
+    """
+    def __init__(self, tempo_ocioso, callback_on_evento_ocioso, escritor=None, janela_movimento=0.25,
+                 callback_on_gravado=None, callback_on_estado=None, fabrica_db=abrir_banco, minimo_lacuna=60):
+        super().__init__()
+        self.tempo_ocioso = tempo_ocioso
+        self.janela_movimento = janela_movimento
+        # Um contador por fonte; cada posição só é escrita pela thread do seu listener
+        self._contagem = [0] * len(FONTES)
+        self.callback_on_evento_ocioso = callback_on_evento_ocioso
+        # callback_on_estado(ocioso, desde): transições ativo/ocioso, com o instante
+        # monotônico do último evento de entrada (para contadores ao vivo sem polling)
+        self.callback_on_estado = callback_on_estado
+        self._stop_event = threading.Event()
+        # Acorda a thread antes do prazo (fim de ociosidade ou parada)
+        self._despertar = threading.Event()
+        self.ocioso_ativo = False
+        self.inicio_ocioso = None
+        # Lacuna ou ociosidade aberta: o próximo evento de entrada acorda a thread
+        self._aguardando_evento = False
+        # Instante monotônico da última reconfiguração (ver reconfigurar)
+        self._reconfigurado = 0.0
+        self._resetar_timer_atividade()
+        # Gravação assíncrona: o monitor só encerra o escritor que ele mesmo criou
+        self._dono_escritor = escritor is None
+        self.escritor = escritor if escritor is not None else EscritorOciosidade(fabrica_db, ao_gravar=callback_on_gravado)
+        self.usuario = _usuario_atual()
+        self.host = socket.gethostname()
+        self.lacunas = (RegistradorLacunas(self.usuario, self.host, minimo_lacuna)
+                        if minimo_lacuna is not None else None)
+        # Eventos por minuto e fonte, amostrados dos contadores pela thread da densidade
+        # e gravados (com as lacunas) pelo mesmo backend do escritor
+        self.atividade = DensidadeAtividade(self._contagem, getattr(self.escritor, 'fabrica_db', None),
+                                            self.usuario, self.host, lacunas=self.lacunas)
+        # Os contadores por fonte só são copiados para as métricas na coleta
+        metricas.REGISTRO.coletar('monitor', self._copiar_metricas)
+
+    def run(self):
+        if self._dono_escritor:
+            self.escritor.start()
+        listeners = self._iniciar_listeners()
+        self.atividade.start()
+        try:
+            while not self._stop_event.is_set():
+                ultimo = self._ultimo_evento
+                # Com o registro de lacunas a thread acorda no início de cada lacuna, que
+                # pode vir antes do prazo de ociosidade
+                espera = self.tempo_ocioso if self.lacunas is None else min(self.tempo_ocioso, self.lacunas.minimo)
+                restante = ultimo + espera - time.monotonic()
+                if restante > 0:
+                    # Ainda ativo: dorme até o prazo (eventos apenas adiam o prazo)
+                    self._despertar.wait(restante)
+                    self._despertar.clear()
+                    continue
+
+                # Lacuna aberta: a partir daqui o primeiro evento de entrada acorda a thread
+                self._despertar.clear()
+                self._aguardando_evento = True
+                while self._ultimo_evento == ultimo and not self._stop_event.is_set():
+                    # Prazo recalculado a cada volta: reconfigurar() acorda a thread
+                    prazo = ultimo + self.tempo_ocioso
+                    restante = prazo - time.monotonic()
+                    if restante > 0:
+                        self._despertar.wait(restante)
+                    else:
+                        if not self.ocioso_ativo:
+                            self._iniciar_ociosidade(ultimo, prazo)
+                        # Dorme até que um evento de entrada (ou stop) acorde a thread
+                        self._despertar.wait()
+                    self._despertar.clear()
+                self._aguardando_evento = False
+                if self._stop_event.is_set():
+                    break
+                if self.ocioso_ativo:
+                    self._encerrar_ociosidade()
+                if self.lacunas is not None:
+                    self.lacunas.registrar(self._para_datetime(ultimo), self._para_datetime(self._ultimo_evento))
+        finally:
+            for listener in listeners:
+                listener.stop()
+            self.atividade.parar(5)
+            if self._dono_escritor:
+                self.escritor.parar(5)
+
+    def _iniciar_ociosidade(self, ultimo, prazo):
+        # Iniciando novo período de ociosidade, exatamente no prazo
+        # Um limite reduzido pode pôr o prazo no passado; isso não é atraso da detecção
+        metricas.ATRASO_DETECCAO.observar(time.monotonic() - max(prazo, self._reconfigurado), 'inicio')
+        self.inicio_ocioso = self._para_datetime(prazo)
+        self.ocioso_ativo = True
+        if self.callback_on_estado:
+            self.callback_on_estado(True, ultimo)
+
+    def _encerrar_ociosidade(self):
+        # Terminando o período de ociosidade no instante do evento
+        metricas.ATRASO_DETECCAO.observar(time.monotonic() - self._ultimo_evento, 'fim')
+        metricas.PERIODOS_OCIOSOS.inc()
+        fim_ocioso = self._para_datetime(self._ultimo_evento)
+        duracao = (fim_ocioso - self.inicio_ocioso).total_seconds()
+        # Evento de ociosidade detectado, executa callback e enfileira a gravação
+        self.callback_on_evento_ocioso(self.inicio_ocioso, fim_ocioso, int(duracao))
+        self.escritor.enfileirar(self.inicio_ocioso, fim_ocioso, int(duracao), self.usuario, self.host)
+        self.ocioso_ativo = False
+        if self.callback_on_estado:
+            self.callback_on_estado(False, self._ultimo_evento)
+
+    def reconfigurar(self, tempo_ocioso=None, janela_movimento=None):
+        """
+        Troca as configurações com a thread rodando, sem recriar listeners nem escritor.
+        Cada valor é um único atributo, lido uma vez por volta do laço. Fora da
+        ociosidade a thread é acordada e recalcula o prazo com o novo limite (se ele já
+        passou, o período começa nesse prazo); um período ocioso já aberto continua e
+        é fechado normalmente no próximo evento de entrada.
+        """
+        if tempo_ocioso is not None:
+            if tempo_ocioso <= 0:
+                raise ValueError(f"tempo_ocioso deve ser positivo: {tempo_ocioso!r}")
+            self.tempo_ocioso = tempo_ocioso
+        if janela_movimento is not None:
+            if janela_movimento < 0:
+                raise ValueError(f"janela_movimento não pode ser negativa: {janela_movimento!r}")
+            self.janela_movimento = janela_movimento
+        self._reconfigurado = _agora()
+        if not self.ocioso_ativo:
+            self._despertar.set()
+
+    def _iniciar_listeners(self):
+        # Inicia listeners de teclado e mouse em threads separadas
+        from pynput import keyboard, mouse
+        listener_tec = keyboard.Listener(on_press=self._on_tecla)
+        listener_mou = mouse.Listener(on_move=self._on_movimento,
+                                      on_click=self._on_clique,
+                                      on_scroll=self._on_rolagem)
+        listener_tec.start()
+        listener_mou.start()
+        return [listener_tec, listener_mou]
+
+    def on_input_event(self, *args, **kwargs):
+        # Entrada genérica (sem fonte nem agrupamento), mantida por compatibilidade
+        self._resetar_timer_atividade()
+
+    # Callbacks dos listeners: assinaturas fixas para evitar o empacotamento de
+    # *args/**kwargs; o parâmetro injected existe nas versões novas do pynput.
+    def _on_tecla(self, key, injected=False):
+        self._contagem[TECLADO] += 1
+        self._resetar_timer_atividade()
+
+    def _on_movimento(self, x, y, injected=False):
+        self._contagem[MOVIMENTO] += 1
+        agora = _agora()
+        # Caminho rápido: dentro da janela o carimbo anterior ainda vale. Durante
+        # uma lacuna o último carimbo é mais antigo que a janela, então o
+        # primeiro movimento sempre acorda a thread de detecção.
+        if agora - self._ultimo_evento < self.janela_movimento:
+            return
+        self._ultimo_evento = agora
+        if self._aguardando_evento:
+            self._despertar.set()
+
+    def _on_clique(self, x, y, button, pressed, injected=False):
+        self._contagem[CLIQUE] += 1
+        self._resetar_timer_atividade()
+
+    def _on_rolagem(self, x, y, dx, dy, injected=False):
+        self._contagem[ROLAGEM] += 1
+        self._resetar_timer_atividade()
+
+    def _resetar_timer_atividade(self):
+        self._ultimo_evento = _agora()
+        # Só é preciso acordar a thread quando há uma lacuna (ou ociosidade) a fechar
+        if self._aguardando_evento:
+            self._despertar.set()
+
+    @staticmethod
+    def _para_datetime(instante_monotonico):
+        # Converte um instante de time.monotonic() para datetime local
+        return datetime.datetime.now() - datetime.timedelta(seconds=time.monotonic() - instante_monotonico)
+
+    def segundos_sem_atividade(self):
+        return _agora() - self._ultimo_evento
+
+    def contagem_eventos(self):
+        # Leitura sem lock: valores podem estar atrasados em alguns eventos
+        return dict(zip(FONTES, self._contagem))
+
+    def _copiar_metricas(self):
+        for fonte, quantidade in zip(FONTES, self._contagem):
+            metricas.EVENTOS_ENTRADA.definir(quantidade, fonte)
+
+    def stop(self):
+        self._stop_event.set()
+        self._despertar.set()
@@ -0,0 +1,533 @@
+# -*- coding: utf-8 -*-
+"""
+Dashboard de ociosidade em Tkinter, comum a monitor.py e copia02.py: tabela
+paginada, filtros, gráficos, exportação, diagnóstico e o monitor local.
+Cada script só declara o que tem de diferente (ver copia02.AppContador).
+"""
+
+import argparse
+import functools
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk, messagebox, filedialog
+
+import metricas
+import preaquecimento
+from banco import abrir_banco, fechar_pools
+from barramento import BarramentoUI
+from diagnostico import PainelDiagnostico
+from exportacao import LIMITE_LINHAS_EXCEL, exportar, montar_filtros
+from monitoramento import OciosidadeMonitor
+from tabela import TabelaLogs
+
+class AppOciosidade(tk.Tk):
+    """
+    Classe principal da interface gráfica. Monta o dashboard, integra monitoramento e relatórios.
+    """
+    # Intervalo de atualização da tabela no modo visualizador (ms)
+    INTERVALO_ATUALIZACAO = 30000
+    # Consultas dos gráficos abertos, no máximo uma a cada (ms)
+    INTERVALO_GRAFICOS = 2000
+    GEOMETRIA = "900x650"
+    # Tempo ocioso inicial da Spinbox (segundos)
+    TEMPO_OCIOSO_PADRAO = 5 * 60
+    # Limites (segundos) da aba de comparação, além do atual da Spinbox
+    LIMIARES_COMPARACAO = (60, 120, 300, 600, 900, 1800)
+
+    def __init__(self, monitorar=True, preaquecer=True, porta_metricas=None, banco=None):
+        super().__init__()
+        self.title("Monitor de Ociosidade do Usuário")
+        self.geometry(self.GEOMETRIA)
+        self.resizable(True, True)
+        self.iconbitmap(default='') # Set icone aqui se desejar.
+
+        # Parâmetros
+        self.tempo_ocioso = tk.IntVar(value=self.TEMPO_OCIOSO_PADRAO)
+        # Backend de armazenamento (URL de abrir_banco); o escritor do monitor usa o mesmo
+        self.url_banco = banco
+        self.db = abrir_banco(banco)
+        # Cache colunar dos logs; até ficar pronto as leituras vão direto ao banco
+        self.cache = None
+        self.monitor_thread = None
+        self._exportando = False
+        self._painel_diagnostico = None
+        # Aba da comparação de limites, criada no primeiro pedido
+        self._aba_limiares = None
+        # Gráficos embutidos, criados no primeiro pedido: {por: (GraficoBarras, filtros)}
+        self._graficos = {}
+        self._graficos_agendados = False
+        # Mudanças na Spinbox vão para o monitor em execução, sem reiniciá-lo
+        self._reconfiguracao_agendada = None
+        self.tempo_ocioso.trace_add('write', self._agendar_reconfiguracao)
+        # Endpoint /metrics (Prometheus) opcional, só em localhost
+        self.servidor_metricas = metricas.servir(porta_metricas) if porta_metricas else None
+        # Threads de trabalho só publicam no barramento; quem toca no Tk é a thread dele
+        self.barramento = BarramentoUI(self)
+        # Uma única thread para as consultas disparadas por eventos (sem thread por evento)
+        self._leituras = ThreadPoolExecutor(max_workers=1, thread_name_prefix='leituras')
+        self._lock_leitura = threading.Lock()
+        self._leitura_pendente = None
+        self._montar_gui()
+        self._assinar_mensagens()
+        self.barramento.iniciar()
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+
+        # Inicia monitoramento em background; como visualizador, só acompanha o banco
+        if monitorar:
+            self.iniciar_monitoramento()
+        else:
+            self._mensagem_status("Modo visualizador: o monitoramento é feito pelo agente.")
+            self.after(self.INTERVALO_ATUALIZACAO, self.atualizar_periodicamente)
+
+        # Com a janela já na tela, carrega matplotlib/openpyxl em segundo plano
+        if preaquecer:
+            self.after(500, preaquecimento.preaquecer)
+        self.after(1000, self.carregar_cache)
+
+    def _montar_gui(self):
+        # Frame superior de controles
+        frm_top = ttk.LabelFrame(self, text="Configuração e Controle")
+        frm_top.pack(fill='x', padx=10, pady=5)
+
+        ttk.Label(frm_top, text="Tempo de Ociosidade (segundos): ").pack(side='left', padx=(8,2))
+        spin = ttk.Spinbox(frm_top, from_=30, to=60*60, increment=30, textvariable=self.tempo_ocioso, width=8)
+        spin.pack(side='left')
+
+        btn_reload = ttk.Button(frm_top, text="Atualizar Relatório", command=self.carregar_dados)
+        btn_reload.pack(side='left', padx=8)
+
+        btn_graf_dia = ttk.Button(frm_top, text="Gráfico Ociosidade por Dia", command=self.gerar_grafico_dia)
+        btn_graf_dia.pack(side='left', padx=8)
+
+        btn_graf_hora = ttk.Button(frm_top, text="Gráfico Ociosidade por Hora", command=self.gerar_grafico_hora)
+        btn_graf_hora.pack(side='left', padx=8)
+
+        btn_export = ttk.Button(frm_top, text="Exportar Dados", command=self.exportar_excel)
+        btn_export.pack(side='left', padx=8)
+
+        btn_limiares = ttk.Button(frm_top, text="Comparar Limites", command=self.comparar_limiares)
+        btn_limiares.pack(side='left', padx=8)
+
+        btn_diag = ttk.Button(frm_top, text="Diagnóstico", command=self.abrir_diagnostico)
+        btn_diag.pack(side='left', padx=8)
+
+        # Filtros usados pelos gráficos e pela exportação
+        frm_filtros = ttk.LabelFrame(self, text="Filtros (gráficos e exportação)")
+        frm_filtros.pack(fill='x', padx=10, pady=5)
+        self.filtro_de = tk.StringVar()
+        self.filtro_ate = tk.StringVar()
+        self.filtro_usuario = tk.StringVar()
+        self.filtro_host = tk.StringVar()
+        for rotulo, var, largura in (("De (AAAA-MM-DD): ", self.filtro_de, 12),
+                                     ("Até (AAAA-MM-DD): ", self.filtro_ate, 12),
+                                     ("Usuário: ", self.filtro_usuario, 14),
+                                     ("Host: ", self.filtro_host, 14)):
+            ttk.Label(frm_filtros, text=rotulo).pack(side='left', padx=(8,2))
+            ttk.Entry(frm_filtros, textvariable=var, width=largura).pack(side='left')
+
+        # Abas: tabela de logs e, depois do primeiro pedido, os gráficos
+        self.abas = ttk.Notebook(self)
+        self.abas.pack(fill='both', expand=1, padx=10, pady=5)
+        aba_registros = ttk.Frame(self.abas)
+        self.abas.add(aba_registros, text="Registros")
+
+        # Frame meio/tabela de logs
+        frm_table = ttk.Frame(aba_registros)
+        frm_table.pack(fill='both', expand=1, padx=10, pady=5)
+
+        colunas = ('ID', 'Início Ocioso', 'Fim Ocioso', 'Duração (s)', 'Usuário', 'Host')
+        self.tree = ttk.Treeview(frm_table, columns=colunas, show='headings', selectmode='extended')
+        for col in colunas:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, anchor='center', width=120)
+        self.tree.pack(side='left', fill='both', expand=1)
+
+        # Scrollbar para a treeview
+        scroll = ttk.Scrollbar(frm_table, orient='vertical', command=self.tree.yview)
+        self.tree.config(yscrollcommand=scroll.set)
+        scroll.pack(side='right', fill='y')
+        # Só uma página da tabela fica carregada no widget
+        self.tabela = TabelaLogs(self.tree, self.db)
+        frm_paginas = ttk.Frame(aba_registros)
+        frm_paginas.pack(fill='x', padx=10, pady=(0, 5))
+        btn_anterior = ttk.Button(frm_paginas, text="◀ Mais recentes", command=self.pagina_anterior)
+        btn_anterior.pack(side='left')
+        btn_proxima = ttk.Button(frm_paginas, text="Mais antigos ▶", command=self.proxima_pagina)
+        btn_proxima.pack(side='left', padx=8)
+        # Status bar
+        self.status_var = tk.StringVar()
+        status = ttk.Label(self, textvariable=self.status_var, relief='sunken', anchor='w')
+        status.pack(fill='x', side='bottom')
+        self._mensagem_status("Sistema inicializado.")
+        self.carregar_dados()
+
+    def _assinar_mensagens(self):
+        self.barramento.assinar('status', self.status_var.set, so_o_ultimo=True)
+        self.barramento.assinar('novos', self._mostrar_novos)
+        self.barramento.assinar('pagina', self._mostrar_pagina)
+        self.barramento.assinar('grafico', self._mostrar_grafico)
+        self.barramento.assinar('graficos', self._mostrar_graficos)
+        self.barramento.assinar('limiares', self._mostrar_limiares)
+        self.barramento.assinar('cache', self._usar_cache)
+        # Avisos das threads de trabalho: (função do messagebox, título, texto)
+        self.barramento.assinar('aviso', lambda funcao, titulo, texto: funcao(titulo, texto))
+
+    def _mensagem_status(self, msg):
+        # Pode ser chamado de qualquer thread
+        self.barramento.publicar('status', msg)
+
+    def _agendar_reconfiguracao(self, *args):
+        # A Spinbox muda a cada tecla: aplica o limite só depois de uma pausa na digitação
+        if self._reconfiguracao_agendada is not None:
+            self.after_cancel(self._reconfiguracao_agendada)
+        self._reconfiguracao_agendada = self.after(800, self.aplicar_tempo_ocioso)
+
+    def aplicar_tempo_ocioso(self):
+        # Novo limite no monitor em execução, sem reiniciar a thread nem perder a ociosidade atual
+        self._reconfiguracao_agendada = None
+        try:
+            segundos = self.tempo_ocioso.get()
+        except tk.TclError:
+            return  # campo vazio ou incompleto
+        monitor = self.monitor_thread
+        if segundos <= 0 or not (monitor and monitor.is_alive()) or segundos == monitor.tempo_ocioso:
+            return
+        monitor.reconfigurar(tempo_ocioso=segundos)
+        self._mensagem_status(f"Tempo de ociosidade alterado para {segundos}s (vale a partir do próximo prazo).")
+
+    def iniciar_monitoramento(self):
+        # (Re)inicia a thread do monitorador
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.stop()
+            self.monitor_thread.join(1)
+        self.monitor_thread = OciosidadeMonitor(
+            self.tempo_ocioso.get(), self.on_novo_ocioso, callback_on_gravado=self.on_ocioso_gravado,
+            fabrica_db=functools.partial(abrir_banco, self.url_banco), **self._opcoes_monitor())
+        self.monitor_thread.daemon = True
+        self.monitor_thread.start()
+        self._mensagem_status(f"Monitoramento iniciado (timeout: {self.tempo_ocioso.get()}s).")
+
+    def _opcoes_monitor(self):
+        # Argumentos extras do OciosidadeMonitor (ex.: callback_on_estado)
+        return {}
+
+    def on_novo_ocioso(self, inicio, fim, duracao):
+        # Callback invocado toda vez que um novo período de ociosidade é detectado
+        self._mensagem_status(
+            f"Ociosidade detectada: início={inicio}, fim={fim}, duração={int(duracao)}s")
+
+    def on_ocioso_gravado(self, lote):
+        # Callback do escritor: os novos períodos já estão no banco, busca só eles
+        self.carregar_dados(async_load=True, incremental=True)
+
+    def atualizar_periodicamente(self):
+        # Sem monitor local não há aviso de gravação: busca os registros novos de tempos em tempos
+        self.carregar_dados(async_load=True, incremental=True)
+        self.after(self.INTERVALO_ATUALIZACAO, self.atualizar_periodicamente)
+
+    def carregar_dados(self, async_load=False, incremental=False):
+        # Carrega e exibe a página atual da tabela; com async_load, a consulta vai para a thread de leituras
+        if async_load:
+            self._agendar_leitura(incremental)
+            return
+        if self.cache is not None:
+            # Na thread da interface não espera uma carga do cache em andamento
+            self.cache.atualizar(esperar=False)
+        if incremental:
+            self._mostrar_novos(self.tabela.buscar_novos())
+        else:
+            self._mostrar_pagina(self.tabela.buscar_pagina())
+
+    def _agendar_leitura(self, incremental):
+        # Pedidos que chegam enquanto um já espera na fila se juntam a ele (recarga completa prevalece)
+        with self._lock_leitura:
+            if self._leitura_pendente is not None:
+                self._leitura_pendente = self._leitura_pendente and incremental
+                return
+            self._leitura_pendente = incremental
+        self._leituras.submit(self._ler)
+
+    def _ler(self):
+        # Thread de leituras: só consulta; o resultado vai para a thread do Tk pelo barramento
+        with self._lock_leitura:
+            incremental, self._leitura_pendente = self._leitura_pendente, None
+        try:
+            if self.cache is not None:
+                self.cache.atualizar()
+            if incremental:
+                self.barramento.publicar('novos', self.tabela.buscar_novos())
+            else:
+                self.barramento.publicar('pagina', self.tabela.buscar_pagina())
+        except Exception as e:
+            self._mensagem_status(f"Falha ao ler o banco: {e}")
+
+    def _mostrar_novos(self, novos):
+        with metricas.ATUALIZACAO_TABELA.cronometrar('incremental'):
+            inseridos = self.tabela.aplicar_novos(novos)
+        self._mensagem_status(f"Novos registros carregados: {inseridos}")
+        if inseridos:
+            self._agendar_graficos()
+
+    def _mostrar_pagina(self, pagina):
+        with metricas.ATUALIZACAO_TABELA.cronometrar('completa'):
+            lidos = self.tabela.aplicar_pagina(pagina)
+        self._mensagem_status(f"Registros carregados: {lidos} (página {self.tabela.pagina})")
+
+    @property
+    def leitura(self):
+        # Onde a tabela, os gráficos e a exportação leem os logs
+        return self.cache if self.cache is not None else self.db
+
+    def carregar_cache(self):
+        # Monta o cache (NumPy) em segundo plano; sem NumPy tudo continua lendo do banco
+        def carregar():
+            try:
+                from cache import CacheOciosidade
+            except ImportError:
+                return
+            cache = CacheOciosidade(self.db)
+            try:
+                registros = cache.atualizar()
+            except Exception as e:
+                self._mensagem_status(f"Cache de registros indisponível: {e}")
+                return
+            self.barramento.publicar('cache', cache)
+            self._mensagem_status(f"Cache de registros carregado: {registros} registros "
+                                  f"({cache.memoria() / 2**20:.1f} MB).")
+        threading.Thread(target=carregar, daemon=True).start()
+
+    def _usar_cache(self, cache):
+        self.cache = cache
+        self.tabela.db = cache
+
+    def pagina_anterior(self):
+        lidos = self.tabela.pagina_anterior()
+        self._mensagem_status(f"Registros carregados: {lidos} (página {self.tabela.pagina})")
+
+    def proxima_pagina(self):
+        if not self.tabela.proxima_pagina():
+            self._mensagem_status("Não há registros mais antigos.")
+            return
+        self._mensagem_status(f"Registros carregados: {len(self.tree.get_children())} (página {self.tabela.pagina})")
+
+    def _filtros(self):
+        # Filtros da interface no formato do DBHelper; None (com aviso) se inválidos
+        try:
+            return montar_filtros(self.filtro_de.get(), self.filtro_ate.get(),
+                                  self.filtro_usuario.get(), self.filtro_host.get())
+        except ValueError:
+            messagebox.showerror("Filtro inválido", "Use datas no formato AAAA-MM-DD.")
+            return None
+
+    def _criar_grafico(self, por):
+        # matplotlib só é carregado no primeiro gráfico (ou pelo pré-carregamento)
+        try:
+            from graficos import HORAS_DO_DIA, GraficoBarras
+        except ImportError:
+            messagebox.showerror("Dependência ausente", "Gráficos requerem o matplotlib: pip install matplotlib")
+            return None
+        aba = ttk.Frame(self.abas)
+        if por == 'dia':
+            self.abas.add(aba, text="Ociosidade por Dia")
+            return GraficoBarras(aba, 'Duração Total de Ociosidade por Dia (em minutos)', 'Data', rotacao=30)
+        self.abas.add(aba, text="Ociosidade por Hora")
+        return GraficoBarras(aba, 'Duração Total de Ociosidade por Hora do Dia (em minutos)', 'Hora',
+                             categorias_fixas=HORAS_DO_DIA)
+
+    def gerar_grafico(self, por):
+        # Mostra o gráfico na sua aba; a consulta vai para a thread de leituras
+        filtros = self._filtros()
+        if filtros is None:
+            return
+        self._mensagem_status("Gerando gráfico...")
+        self._leituras.submit(self._ler_grafico, por, filtros)
+
+    def _ler_grafico(self, por, filtros):
+        # Thread de leituras
+        try:
+            grupo = self.leitura.agregar_resumo(por, **filtros)
+        except Exception as e:
+            self._mensagem_status(f"Falha ao ler o banco: {e}")
+            return
+        self.barramento.publicar('grafico', por, filtros, grupo)
+
+    def _mostrar_grafico(self, por, filtros, grupo):
+        # A figura é criada uma vez e depois só atualizada
+        if not grupo:
+            messagebox.showinfo("Informação", "Sem dados para gerar gráfico.")
+            return
+        if por in self._graficos:
+            grafico = self._graficos[por][0]
+        else:
+            grafico = self._criar_grafico(por)
+            if grafico is None:
+                return
+        self._graficos[por] = (grafico, filtros)
+        grafico.atualizar(grupo)
+        self.abas.select(grafico.widget.master)
+        self._mensagem_status(f"Gráfico gerado: {len(grupo)} pontos")
+
+    def gerar_grafico_dia(self):
+        # Ociosidade agregada por dia (resumo por hora no banco)
+        self.gerar_grafico('dia')
+
+    def gerar_grafico_hora(self):
+        # Ociosidade agregada por hora do dia (resumo por hora no banco)
+        self.gerar_grafico('hora')
+
+    def _agendar_graficos(self):
+        # Junta as gravações próximas em uma só consulta por gráfico aberto
+        if self._graficos and not self._graficos_agendados:
+            self._graficos_agendados = True
+            self.after(self.INTERVALO_GRAFICOS, self._atualizar_graficos)
+
+    def _atualizar_graficos(self):
+        # Gráficos já abertos acompanham os novos períodos, com os filtros com que foram pedidos
+        self._graficos_agendados = False
+        pedidos = {por: filtros for por, (_, filtros) in self._graficos.items()}
+        self._leituras.submit(self._ler_graficos, pedidos)
+
+    def _ler_graficos(self, pedidos):
+        # Thread de leituras
+        try:
+            grupos = {por: self.leitura.agregar_resumo(por, **filtros) for por, filtros in pedidos.items()}
+        except Exception as e:
+            self._mensagem_status(f"Falha ao ler o banco: {e}")
+            return
+        self.barramento.publicar('graficos', grupos)
+
+    def _mostrar_graficos(self, grupos):
+        for por, grupo in grupos.items():
+            self._graficos[por][0].agendar(grupo)
+
+    def comparar_limiares(self):
+        # Ociosidade que cada limite teria dado, recalculada das lacunas gravadas pelo agente
+        filtros = self._filtros()
+        if filtros is None:
+            return
+        limites = set(self.LIMIARES_COMPARACAO)
+        try:
+            limites.add(self.tempo_ocioso.get())
+        except tk.TclError:
+            pass
+        self._mensagem_status("Comparando limites de ociosidade...")
+        self._leituras.submit(self._ler_limiares, sorted(limites), filtros)
+
+    def _ler_limiares(self, limites, filtros):
+        # Thread de leituras; o NumPy só é carregado aqui
+        try:
+            import limiares
+        except ImportError:
+            self.barramento.publicar('aviso', messagebox.showerror, "Dependência ausente",
+                                     "A comparação de limites requer o NumPy: pip install numpy")
+            return
+        try:
+            # Limites abaixo do mínimo das lacunas (ex.: uma Spinbox em 30 s) ficam de fora
+            linhas = limiares.analisar(self.db, limites, omitir_abaixo_do_minimo=True, **filtros)
+        except ValueError as e:
+            self.barramento.publicar('aviso', messagebox.showerror, "Comparação de limites", str(e))
+            return
+        except Exception as e:
+            self._mensagem_status(f"Falha ao ler o banco: {e}")
+            return
+        self.barramento.publicar('limiares', linhas)
+
+    def _mostrar_limiares(self, linhas):
+        if not any(periodos for _, _, periodos, _ in linhas):
+            messagebox.showinfo("Informação", "Sem lacunas de atividade gravadas no período.")
+            return
+        if self._aba_limiares is None:
+            self._aba_limiares = ttk.Frame(self.abas)
+            self.abas.add(self._aba_limiares, text="Comparação de Limites")
+            colunas = ('Limite (min)', 'Períodos Ociosos', 'Horas Ociosas')
+            self._tree_limiares = ttk.Treeview(self._aba_limiares, columns=colunas, show='headings')
+            for col in colunas:
+                self._tree_limiares.heading(col, text=col)
+                self._tree_limiares.column(col, anchor='center', width=160)
+            self._tree_limiares.pack(fill='both', expand=1, padx=10, pady=5)
+        self._tree_limiares.delete(*self._tree_limiares.get_children())
+        for _, limiar, periodos, segundos in linhas:
+            self._tree_limiares.insert('', 'end', values=(f"{limiar / 60:g}", periodos, f"{segundos / 3600:.2f}"))
+        self.abas.select(self._aba_limiares)
+        self._mensagem_status(f"Limites comparados: {len(linhas)}")
+
+    def exportar_excel(self):
+        # Exporta os registros filtrados para Excel, CSV ou Parquet, em segundo plano
+        if self._exportando:
+            messagebox.showinfo("Informação", "Já existe uma exportação em andamento.")
+            return
+        filtros = self._filtros()
+        if filtros is None:
+            return
+        filename = filedialog.asksaveasfilename(
+            defaultextension='.xlsx',
+            filetypes=[('Excel Files', '*.xlsx'), ('CSV', '*.csv'), ('Parquet', '*.parquet')],
+            title='Salvar como')
+        if not filename:
+            return
+
+        def progresso(linhas):
+            self._mensagem_status(f"Exportando... {linhas} registros gravados.")
+
+        def exportar_em_segundo_plano():
+            try:
+                total = exportar(self.leitura, filename, filtros, progresso)
+            except Exception as e:
+                self.barramento.publicar('aviso', messagebox.showerror, "Erro ao exportar", str(e))
+                self._mensagem_status("Falha na exportação.")
+            else:
+                if total >= LIMITE_LINHAS_EXCEL and filename.lower().endswith('.xlsx'):
+                    self.barramento.publicar('aviso', messagebox.showinfo, "Exportação completa",
+                                             f"Dados exportados para {filename}, divididos em várias planilhas "
+                                             "(limite do Excel). Para volumes assim, prefira CSV ou Parquet.")
+                elif total:
+                    self.barramento.publicar('aviso', messagebox.showinfo, "Exportação completa",
+                                             f"Dados exportados para {filename}")
+                else:
+                    self.barramento.publicar('aviso', messagebox.showinfo, "Informação", "Sem dados para exportar.")
+                self._mensagem_status(f"Dados exportados: {total} registros.")
+            finally:
+                self._exportando = False
+
+        self._exportando = True
+        threading.Thread(target=exportar_em_segundo_plano, daemon=True).start()
+
+    def abrir_diagnostico(self):
+        # Uma única janela de diagnóstico; se já estiver aberta, só a traz para frente
+        if self._painel_diagnostico is not None and self._painel_diagnostico.winfo_exists():
+            self._painel_diagnostico.lift()
+            return
+        url = None
+        if self.servidor_metricas:
+            url = "http://%s:%d/metrics" % self.servidor_metricas.server_address[:2]
+        self._painel_diagnostico = PainelDiagnostico(self, url)
+
+    def fechar(self):
+        # Finaliza monitoramento e fecha a aplicação
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.stop()
+            # Aguarda o escritor gravar os eventos ainda na fila
+            self.monitor_thread.join(5)
+        self.barramento.parar()
+        self._leituras.shutdown(wait=False, cancel_futures=True)
+        self.db.fechar()
+        fechar_pools()
+        if self.servidor_metricas:
+            self.servidor_metricas.shutdown()
+        self.destroy()
+
+def main(classe=AppOciosidade):
+    parser = argparse.ArgumentParser(description="Dashboard do monitor de ociosidade")
+    parser.add_argument('--visualizador', action='store_true',
+                        help='só consulta o banco, sem monitorar esta máquina (use com agente.py)')
+    parser.add_argument('--sem-preaquecer', action='store_true',
+                        help='não pré-carrega matplotlib/openpyxl depois de abrir a janela')
+    parser.add_argument('--metricas', type=int, metavar='PORTA',
+                        help='expõe as métricas em http://127.0.0.1:PORTA/metrics (Prometheus)')
+    parser.add_argument('--banco', help='URL do backend (mysql://, sqlite:///arquivo.db, memoria:); '
+                                        'padrão: variável OCIOSIDADE_BANCO ou o MySQL local')
+    args = parser.parse_args()
+    app = classe(monitorar=not args.visualizador, preaquecer=not args.sem_preaquecer,
+                 porta_metricas=args.metricas, banco=args.banco)
+    app.mainloop()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Pré-carregamento, em segundo plano, das dependências pesadas do dashboard.
+
+matplotlib (via graficos) e openpyxl só são importados quando o usuário pede um
+gráfico ou uma exportação. Depois que a janela aparece, preaquecer() pode importá-los em uma
+thread para que o primeiro clique não espere; se o clique vier antes, o import
+do clique simplesmente aguarda o que já está em andamento (lock de import do Python).
+"""
+
+import importlib
+import threading
+
+# Módulos carregados sob demanda pelo dashboard, na ordem em que valem a pena
+MODULOS_PESADOS = ('graficos', 'openpyxl')
+
+def preaquecer(modulos=MODULOS_PESADOS, ao_terminar=None):
+    """
+    Importa os módulos em uma thread daemon. ao_terminar(falhas), se informado, recebe
+    {nome: exceção} dos que não puderam ser importados. Devolve a thread.
+    """
+    def carregar():
+        falhas = {}
+        for nome in modulos:
+            try:
+                importlib.import_module(nome)
+            except Exception as e:
+                # Dependência ausente: o erro aparece de novo (com aviso) no primeiro uso
+                falhas[nome] = e
+        if ao_terminar:
+            ao_terminar(falhas)
+
+    thread = threading.Thread(target=carregar, name='preaquecimento', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Relatórios por usuário e por estação sobre períodos longos, em paralelo.
+
+Para cada usuário, host ou par (usuário, host): períodos, total e média da
+ociosidade, p50/p90/p99 da duração, fração do expediente em que esteve ocioso e
+as maiores sequências de ociosidade (períodos separados por no máximo
+`tolerancia` segundos de atividade, como uma reunião com o mouse mexido de vez em
+quando). A fração do expediente é o tempo ocioso dentro do horário `expediente`
+dos dias úteis sobre o expediente dos dias úteis cobertos por algum registro
+(somado por par usuário/host nos relatórios por usuário ou por host).
+
+O intervalo de datas é dividido em partições de `dias_por_particao` dias (pela
+data de início de cada período, sem perder os que atravessam a fronteira). Cada
+partição é lida em blocos por um processo do pool, com a sua própria conexão, e
+resumida em NumPy em um Parcial por (usuário, host): a memória de cada processo
+depende do tamanho da partição, não do intervalo. Os parciais são juntados em
+ordem cronológica no processo principal; os quantis vêm de um esboço logarítmico
+(EsbocoQuantis) que se junta somando contagens, com erro relativo de até `alfa`.
+"""
+
+import concurrent.futures
+import datetime
+import math
+import os
+
+import numpy as np
+
+from banco_sqlite import BancoMemoria
+from intervalos import DIA, para_epoca, repartir
+
+EPOCA = datetime.datetime(1970, 1, 1)
+
+# Chaves aceitas por gerar_relatorio(por=...); None = par (usuario, host)
+AGRUPAMENTOS = ('usuario', 'host', None)
+
+class EsbocoQuantis:
+    """
+    Histograma de durações em baldes logarítmicos: o balde i cobre (g^(i-1), g^i],
+    com g = (1 + alfa) / (1 - alfa), e o quantil é estimado pelo meio do balde, com
+    erro relativo de até alfa. Juntar dois esboços é somar as contagens por balde,
+    então partições podem ser resumidas em qualquer ordem e processo.
+    """
+    def __init__(self, alfa=0.01):
+        self.alfa = alfa
+        self.gama = (1 + alfa) / (1 - alfa)
+        self.baldes = {}
+        self.zeros = 0
+        self.contagem = 0
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        positivos = valores[valores > 0]
+        self.zeros += int(valores.size - positivos.size)
+        self.contagem += int(valores.size)
+        if positivos.size:
+            indices, contagens = np.unique(np.ceil(np.log(positivos) / math.log(self.gama)).astype(np.int64),
+                                           return_counts=True)
+            self._somar(zip(indices.tolist(), contagens.tolist()))
+
+    def _somar(self, pares):
+        baldes = self.baldes
+        for indice, contagem in pares:
+            baldes[indice] = baldes.get(indice, 0) + contagem
+
+    def juntar(self, outro):
+        if outro.gama != self.gama:
+            raise ValueError("Esboços com precisões diferentes não podem ser juntados.")
+        self._somar(outro.baldes.items())
+        self.zeros += outro.zeros
+        self.contagem += outro.contagem
+        return self
+
+    def quantil(self, q):
+        if not self.contagem:
+            return None
+        posicao = q * (self.contagem - 1)
+        acumulado = self.zeros
+        if posicao < acumulado:
+            return 0.0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if posicao < acumulado:
+                return 2 * self.gama ** indice / (self.gama + 1)
+        return 2 * self.gama ** max(self.baldes) / (self.gama + 1)
+
+class Parcial:
+    """
+    Resumo de um (usuario, host) em um trecho contínuo de datas. juntar() recebe o
+    trecho seguinte; as sequências nas pontas são emendadas quando se tocam (os
+    períodos de um mesmo par não se sobrepõem, como o monitor os grava).
+    """
+    def __init__(self, alfa=0.01):
+        self.periodos = 0
+        self.total = 0
+        self.maior = 0
+        self.esboco = EsbocoQuantis(alfa)
+        self.no_expediente = 0
+        # Dias (desde a época) cobertos por algum período
+        self.dias = set()
+        # Expediente dos dias úteis com registro; preenchido por par ao fim (ver gerar_relatorio)
+        self.segundos_expediente = 0
+        # Sequências (inicio, fim) em segundos desde a época: a primeira e a última do
+        # trecho (podem continuar nos vizinhos) e as maiores, incluindo as pontas
+        self.primeira = None
+        self.ultima = None
+        self.maiores = []
+
+    def juntar(self, posterior, tolerancia, quantidade):
+        self.periodos += posterior.periodos
+        self.total += posterior.total
+        self.maior = max(self.maior, posterior.maior)
+        self.esboco.juntar(posterior.esboco)
+        self.no_expediente += posterior.no_expediente
+        self.segundos_expediente += posterior.segundos_expediente
+        self.dias |= posterior.dias
+        if posterior.primeira is None:
+            return self
+        if self.ultima is None:
+            self.primeira, self.ultima, self.maiores = posterior.primeira, posterior.ultima, posterior.maiores
+            return self
+        maiores = self.maiores + posterior.maiores
+        if posterior.primeira[0] - self.ultima[1] <= tolerancia:
+            emendada = (self.ultima[0], max(self.ultima[1], posterior.primeira[1]))
+            for ponta in (self.ultima, posterior.primeira):
+                if ponta in maiores:
+                    maiores.remove(ponta)
+            maiores.append(emendada)
+            if self.primeira == self.ultima:
+                self.primeira = emendada
+            self.ultima = emendada if posterior.primeira == posterior.ultima else posterior.ultima
+        else:
+            self.ultima = posterior.ultima
+        self.maiores = _maiores(maiores, quantidade)
+        return self
+
+    def agrupar(self, outro, quantidade):
+        # Mesmo período, outra estação (ex.: total por usuário): as sequências não se emendam
+        self.juntar(_sem_sequencias(outro), 0, quantidade)
+        self.maiores = _maiores(self.maiores + outro.maiores, quantidade)
+        return self
+
+def _sem_sequencias(parcial):
+    copia = Parcial.__new__(Parcial)
+    copia.__dict__.update(parcial.__dict__, primeira=None, ultima=None, maiores=[])
+    return copia
+
+def _maiores(sequencias, quantidade):
+    return sorted(sequencias, key=lambda s: (s[0] - s[1], s[0]))[:quantidade]
+
+def _ler_particao(db, inicio, fim, filtros, tamanho_bloco):
+    # Colunas da partição (períodos com início em [inicio, fim)), lidas em blocos
+    inicios, fins, duracoes, chaves = [], [], [], []
+    for bloco in db.iterar_logs(dt_inicio=inicio, inicio_antes_de=fim, tamanho_bloco=tamanho_bloco, **filtros):
+        inicios.append(para_epoca([linha[1] for linha in bloco]))
+        fins.append(para_epoca([linha[2] or linha[1] for linha in bloco]))
+        duracoes.append(np.fromiter((linha[3] or 0 for linha in bloco), np.int64, len(bloco)))
+        chaves.extend((linha[4] or '', linha[5] or '') for linha in bloco)
+    if not chaves:
+        return None
+    return np.concatenate(inicios), np.concatenate(fins), np.concatenate(duracoes), chaves
+
+def resumir_particao(fabrica_db, inicio, fim, filtros=None, expediente=(8, 18), dias_uteis=(0, 1, 2, 3, 4),
+                     tolerancia=120, quantidade=3, alfa=0.01, tamanho_bloco=20000):
+    """
+    {(usuario, host): Parcial} dos períodos que começam em [inicio, fim). Roda no
+    processo do pool: abre a sua conexão com fabrica_db() e devolve só os resumos.
+    """
+    db = fabrica_db()
+    try:
+        colunas = _ler_particao(db, inicio, fim, filtros or {}, tamanho_bloco)
+    finally:
+        db.fechar()
+    if colunas is None:
+        return {}
+    inicios, fins, duracoes, chaves = colunas
+    fins = np.maximum(fins, inicios)
+    codigos = {}
+    grupos = np.fromiter((codigos.setdefault(chave, len(codigos)) for chave in chaves), np.int64, len(chaves))
+    n = len(codigos)
+    parciais = [Parcial(alfa) for _ in range(n)]
+
+    periodos = np.bincount(grupos, minlength=n)
+    totais = np.bincount(grupos, weights=duracoes, minlength=n)
+    maiores = np.zeros(n, dtype=np.int64)
+    np.maximum.at(maiores, grupos, duracoes)
+
+    # Segundos de cada período dentro do expediente dos dias úteis que ele cobre
+    indice, dia, _ = repartir(inicios, fins, DIA)
+    abre = dia * DIA + expediente[0] * 3600
+    fecha = dia * DIA + expediente[1] * 3600
+    sobreposicao = np.clip(np.minimum(fins[indice], fecha) - np.maximum(inicios[indice], abre), 0, None)
+    # 1970-01-01 foi uma quinta-feira (weekday 3)
+    sobreposicao[~np.isin((dia + 3) % 7, dias_uteis)] = 0
+    no_expediente = np.bincount(grupos[indice], weights=sobreposicao, minlength=n)
+
+    # Dias com registro: pares (grupo, dia coberto por algum período) distintos
+    largura = int(dia.max()) + 1
+    dias_grupo = np.unique(grupos[indice] * largura + dia)
+
+    # Sequências: em ordem de (grupo, início), uma nova começa quando o período
+    # começa mais de `tolerancia` depois do maior fim anterior do mesmo grupo
+    ordem = np.lexsort((inicios, grupos))
+    g, s, e = grupos[ordem], inicios[ordem], fins[ordem]
+    deslocamento = int(e.max() - e.min()) + tolerancia + 1
+    base = g * deslocamento - int(e.min())
+    maior_fim = np.maximum.accumulate(e + base) - base
+    nova = np.ones(g.size, dtype=bool)
+    nova[1:] = (g[1:] != g[:-1]) | (s[1:] > maior_fim[:-1] + tolerancia)
+    posicoes = np.flatnonzero(nova)
+    seq_grupo = g[posicoes]
+    seq_inicio = s[posicoes]
+    seq_fim = np.maximum.reduceat(e, posicoes)
+    limites = np.searchsorted(seq_grupo, np.arange(n + 1))
+
+    for i, parcial in enumerate(parciais):
+        parcial.periodos = int(periodos[i])
+        parcial.total = int(totais[i])
+        parcial.maior = int(maiores[i])
+        parcial.no_expediente = int(no_expediente[i])
+        de, ate = limites[i], limites[i + 1]
+        sequencias = list(zip(seq_inicio[de:ate].tolist(), seq_fim[de:ate].tolist()))
+        parcial.primeira, parcial.ultima = sequencias[0], sequencias[-1]
+        duracao = seq_fim[de:ate] - seq_inicio[de:ate]
+        topo = np.argsort(-duracao, kind='stable')[:quantidade]
+        parcial.maiores = _maiores([sequencias[j] for j in topo], quantidade)
+    for codigo, dia_ in zip((dias_grupo // largura).tolist(), (dias_grupo % largura).tolist()):
+        parciais[codigo].dias.add(dia_)
+    # Durações ordenadas por grupo: um esboço por fatia
+    ordem = np.argsort(grupos, kind='stable')
+    cortes = np.searchsorted(grupos[ordem], np.arange(n + 1))
+    duracoes = duracoes[ordem]
+    for i, parcial in enumerate(parciais):
+        parcial.esboco.adicionar(duracoes[cortes[i]:cortes[i + 1]])
+    return {chave: parciais[codigo] for chave, codigo in codigos.items()}
+
+def particoes(dt_inicio, dt_fim, dias_por_particao=7):
+    """
+    [(inicio, fim)] consecutivos cobrindo [dt_inicio, dt_fim] (fim exclusivo; a
+    última termina um segundo depois de dt_fim, que vem inclusivo dos filtros).
+    """
+    limite = dt_fim + datetime.timedelta(seconds=1)
+    passo = datetime.timedelta(days=dias_por_particao)
+    resultado = []
+    inicio = dt_inicio
+    while inicio < limite:
+        resultado.append((inicio, min(inicio + passo, limite)))
+        inicio += passo
+    return resultado
+
+def _datetime(segundos):
+    return EPOCA + datetime.timedelta(seconds=segundos)
+
+def gerar_relatorio(fabrica_db, dt_inicio, dt_fim, por='usuario', usuario=None, host=None, processos=None,
+                    dias_por_particao=7, expediente=(8, 18), dias_uteis=(0, 1, 2, 3, 4), tolerancia=120,
+                    quantidade=3, alfa=0.01, progresso=None):
+    """
+    Estatísticas de ociosidade entre dt_inicio e dt_fim, uma linha (dicionário) por
+    usuário, host ou par (usuario, host), em ordem de chave. fabrica_db deve poder
+    ser enviada a outro processo (ex.: functools.partial(abrir_banco, url)); com o
+    banco em memória, ou processos=1, as partições são lidas neste processo.
+    progresso(feitas, total) é chamado a cada partição juntada.
+    """
+    if por not in AGRUPAMENTOS:
+        raise ValueError(f"Agrupamento inválido: {por!r} (use usuario, host ou None)")
+    if not 0 <= expediente[0] < expediente[1] <= 24:
+        raise ValueError(f"Expediente inválido: {expediente!r}")
+    filtros = {chave: valor for chave, valor in (('usuario', usuario), ('host', host)) if valor}
+    opcoes = dict(filtros=filtros, expediente=expediente, dias_uteis=tuple(dias_uteis),
+                  tolerancia=tolerancia, quantidade=quantidade, alfa=alfa)
+    lista = particoes(dt_inicio, dt_fim, dias_por_particao)
+    processos = processos or os.cpu_count() or 1
+    db = fabrica_db()
+    try:
+        # O banco em memória só existe neste processo
+        if isinstance(db, BancoMemoria):
+            processos = 1
+    finally:
+        db.fechar()
+
+    acumulado = {}
+    def juntar(feitas, parciais):
+        for chave, parcial in parciais.items():
+            anterior = acumulado.get(chave)
+            acumulado[chave] = parcial if anterior is None else anterior.juntar(parcial, tolerancia, quantidade)
+        if progresso:
+            progresso(feitas, len(lista))
+
+    if processos <= 1 or len(lista) <= 1:
+        for feitas, (inicio, fim) in enumerate(lista, 1):
+            juntar(feitas, resumir_particao(fabrica_db, inicio, fim, **opcoes))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(processos, len(lista))) as executor:
+            futuros = [executor.submit(resumir_particao, fabrica_db, inicio, fim, **opcoes) for inicio, fim in lista]
+            # Em ordem cronológica, para emendar as sequências entre partições
+            for feitas, futuro in enumerate(futuros, 1):
+                juntar(feitas, futuro.result())
+                # Libera o resultado já juntado
+                futuros[feitas - 1] = None
+
+    grupos = {}
+    for (u, h), parcial in sorted(acumulado.items()):
+        dias = sum(1 for dia in parcial.dias if (dia + 3) % 7 in dias_uteis)
+        parcial.segundos_expediente = dias * (expediente[1] - expediente[0]) * 3600
+        chave = (u, h) if por is None else (u if por == 'usuario' else h)
+        if chave in grupos:
+            grupos[chave].agrupar(parcial, quantidade)
+        else:
+            grupos[chave] = parcial
+    return [_linha(chave, parcial) for chave, parcial in grupos.items()]
+
+def _linha(chave, parcial):
+    quantil = parcial.esboco.quantil
+    return {
+        'chave': chave,
+        'periodos': parcial.periodos,
+        'total_segundos': parcial.total,
+        'media_segundos': parcial.total / parcial.periodos if parcial.periodos else 0.0,
+        'p50_segundos': quantil(0.5),
+        'p90_segundos': quantil(0.9),
+        'p99_segundos': quantil(0.99),
+        'maior_periodo_segundos': parcial.maior,
+        'dias': len(parcial.dias),
+        'fracao_expediente': (parcial.no_expediente / parcial.segundos_expediente
+                              if parcial.segundos_expediente else 0.0),
+        'maiores_sequencias': [(_datetime(inicio), _datetime(fim)) for inicio, fim in parcial.maiores],
+    }
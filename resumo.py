@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Manutenção da tabela ociosidade_resumo_hora (dia, hora, usuario, host).
+
+O tempo de cada período ocioso é repartido entre as horas que ele realmente cobre;
+o número de eventos conta só na hora em que o período começou. Na gravação em
+lote o repartimento é feito em Python puro (poucos registros, e o agente não
+precisa carregar o NumPy); na reconstrução de todo o histórico usa o motor
+vetorizado de intervalos.py quando o NumPy está disponível.
+"""
+
+import datetime
+
+EPOCA = datetime.datetime(1970, 1, 1)
+HORA = 3600
+
+# VALUES() em vez de alias na atualização para funcionar também no MariaDB do XAMPP
+SQL_SOMAR_RESUMO = """
+INSERT INTO ociosidade_resumo_hora (dia, hora, usuario, host, total_segundos, eventos)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    total_segundos = total_segundos + VALUES(total_segundos),
+    eventos = eventos + VALUES(eventos)
+"""
+
+def _segundos(data):
+    # Segundos desde a época no relógio de parede, como intervalos.para_epoca
+    return int((data - EPOCA).total_seconds())
+
+def _chave_hora(balde, usuario, host):
+    inicio_hora = EPOCA + datetime.timedelta(hours=int(balde))
+    return (inicio_hora.date(), inicio_hora.hour, usuario or '', host or '')
+
+def acumular_registros(somas, registros):
+    """
+    Soma registros (inicio, fim, duracao, usuario, host) em `somas`, um dicionário
+    {(dia, hora, usuario, host): [segundos, eventos]}, repartindo cada período pelas horas.
+    """
+    for inicio, fim, _, usuario, host in registros:
+        s = _segundos(inicio)
+        e = max(_segundos(fim), s)
+        balde = s // HORA
+        eventos = 1
+        while True:
+            fim_balde = (balde + 1) * HORA
+            chave = _chave_hora(balde, usuario, host)
+            soma = somas.get(chave)
+            if soma is None:
+                soma = somas[chave] = [0, 0]
+            soma[0] += min(e, fim_balde) - max(s, balde * HORA)
+            soma[1] += eventos
+            if e <= fim_balde:
+                break
+            balde += 1
+            eventos = 0
+    return somas
+
+def resumir_registros(registros):
+    """
+    Agrupa registros (inicio, fim, duracao, usuario, host) por hora, no formato dos
+    parâmetros de SQL_SOMAR_RESUMO.
+    """
+    return [chave + tuple(soma) for chave, soma in acumular_registros({}, registros).items()]
+
+def _acumular_vetorizado(somas, bloco):
+    import numpy as np
+    from intervalos import para_epoca, somar_por_balde
+
+    if not bloco:
+        return somas
+    codigos = {}
+    grupos = np.fromiter((codigos.setdefault((u or '', h or ''), len(codigos)) for _, _, _, u, h in bloco),
+                         dtype=np.int64, count=len(bloco))
+    pares = list(codigos)
+    inicios = para_epoca([r[0] for r in bloco])
+    fins = para_epoca([r[1] for r in bloco])
+    grupo, balde, segundos = somar_por_balde(inicios, fins, HORA, grupos)
+    for g, b, seg in zip(grupo.tolist(), balde.tolist(), segundos.tolist()):
+        somas.setdefault(_chave_hora(b, *pares[g]), [0, 0])[0] += seg
+    # Eventos: um por período, na hora de início
+    baldes_inicio = inicios // HORA
+    menor = int(baldes_inicio.min())
+    largura = int(baldes_inicio.max()) - menor + 1
+    chaves, contagem = np.unique(grupos * largura + (baldes_inicio - menor), return_counts=True)
+    for chave, n in zip(chaves.tolist(), contagem.tolist()):
+        g, b = divmod(chave, largura)
+        somas.setdefault(_chave_hora(b + menor, *pares[g]), [0, 0])[1] += n
+    return somas
+
+def acumulador():
+    # Função de acumulação mais rápida disponível: NumPy se instalado, senão Python puro
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return acumular_registros
+    return _acumular_vetorizado
+
+def preencher_resumo(cursor, tamanho_bloco=50000):
+    """
+    Soma todo o ociosidade_log no resumo por hora (a tabela deve estar vazia ou ser
+    limpa antes). O log é lido em blocos e só os totais por hora ficam em memória.
+    Devolve o número de linhas do resumo gravadas.
+    """
+    acumular = acumulador()
+    cursor.execute("""
+    SELECT inicio_ocioso, fim_ocioso, duracao_segundos, usuario, host
+    FROM ociosidade_log WHERE inicio_ocioso IS NOT NULL AND fim_ocioso IS NOT NULL
+    """)
+    somas = {}
+    while True:
+        bloco = cursor.fetchmany(tamanho_bloco)
+        if not bloco:
+            break
+        acumular(somas, bloco)
+    linhas = [chave + tuple(soma) for chave, soma in somas.items()]
+    for i in range(0, len(linhas), 1000):
+        cursor.executemany(SQL_SOMAR_RESUMO, linhas[i:i + 1000])
+    return len(linhas)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Tabela de logs paginada e incremental sobre um ttk.Treeview.
+
+Só uma página (tamanho_pagina linhas) fica materializada no widget. A navegação
+usa paginação por chave (inicio_ocioso, id) em ordem decrescente, que usa o
+índice de data e custa o mesmo em qualquer ponto da tabela. Na primeira página,
+a atualização busca apenas os registros com id acima do maior id já visto e os
+insere no topo, descartando o excedente no fim.
+"""
+
+import metricas
+
+class TabelaLogs:
+    """
+    Controla o conteúdo de um Treeview com colunas (id, início, fim, duração, usuário, host).
+    """
+    def __init__(self, tree, db, tamanho_pagina=200):
+        self.tree = tree
+        self.db = db
+        self.tamanho_pagina = tamanho_pagina
+        self.maior_id = 0
+        # Chave (inicio_ocioso, id) de onde cada página visitada começa; None = mais recente
+        self._limites = [None]
+        self._proxima = None
+
+    @property
+    def pagina(self):
+        return len(self._limites)
+
+    def recarregar(self):
+        # Busca novamente a página atual inteira
+        with metricas.ATUALIZACAO_TABELA.cronometrar('completa'):
+            return self.aplicar_pagina(self.buscar_pagina())
+
+    def buscar_pagina(self):
+        # Só a consulta (pode rodar fora da thread do Tk): (limite da página, linhas, próxima chave)
+        limite = self._limites[-1]
+        return (limite,) + tuple(self.db.buscar_pagina_logs(limite, self.tamanho_pagina))
+
+    def aplicar_pagina(self, pagina):
+        # Thread do Tk; uma página buscada antes de o usuário navegar para outra é descartada
+        limite, rows, proxima = pagina
+        if limite != self._limites[-1]:
+            return 0
+        self._proxima = proxima
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert('', 'end', iid=str(row[0]), values=row)
+        if len(self._limites) == 1 and rows:
+            self.maior_id = max(self.maior_id, max(row[0] for row in rows))
+        return len(rows)
+
+    def atualizar(self):
+        # Incremental: só registros novos; fora da primeira página nada é buscado
+        with metricas.ATUALIZACAO_TABELA.cronometrar('incremental'):
+            return self.aplicar_novos(self.buscar_novos())
+
+    def buscar_novos(self):
+        # Só a consulta (pode rodar fora da thread do Tk)
+        if len(self._limites) > 1:
+            return []
+        return self.db.buscar_logs_por_id(depois_de_id=self.maior_id, limite=self.tamanho_pagina)
+
+    def aplicar_novos(self, novos):
+        # Thread do Tk; buscas que se cruzaram podem repetir registros, que são ignorados
+        if not novos or len(self._limites) > 1:
+            return 0
+        self.maior_id = max(self.maior_id, novos[0][0])
+        for row in reversed(novos):
+            if not self.tree.exists(str(row[0])):
+                self.tree.insert('', 0, iid=str(row[0]), values=row)
+        excedente = self.tree.get_children()[self.tamanho_pagina:]
+        if excedente:
+            self.tree.delete(*excedente)
+        return len(novos)
+
+    def proxima_pagina(self):
+        if self._proxima is None:
+            return 0
+        self._limites.append(self._proxima)
+        lidos = self.recarregar()
+        if not lidos:
+            # Não há registros mais antigos: volta para a página anterior
+            self._limites.pop()
+            self.recarregar()
+        return lidos
+
+    def pagina_anterior(self):
+        if len(self._limites) > 1:
+            self._limites.pop()
+        return self.recarregar()